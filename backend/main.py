@@ -1,16 +1,63 @@
 from fastapi import FastAPI, Query, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from sse_starlette.sse import EventSourceResponse
-import time
-import json
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware
+import asyncio
+import os
 import re
+from contextlib import asynccontextmanager
 from urllib.parse import urlparse, urlunparse
-import socket
-import ipaddress
-from collections import deque
-from typing import Deque, Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
-app = FastAPI(title="Marketing Command Center API")
+from pydantic import BaseModel, Field
+
+from backend.rate_limit import limiter_from_env
+from backend.seo_batch import BatchStats, SiteResult, run_batch
+from backend.seo_checkpoint import CHECKPOINT_DIR
+from backend.seo_crawler import make_client, shutdown_analysis_pool
+from backend.seo_encode import (
+    COMPRESS_MIN_BYTES, GZIP_LEVEL, STREAMED_CONTENT_TYPES, StreamingGZipMiddleware, accepted_encoding, json_dumps,
+)
+from backend.seo_jobs import FINISHED, QUEUED, RUNNING, JobQueueFull, ScanJob, ScanJobManager, parse_event_id
+from backend.seo_resolver import default_resolver
+from backend.seo_rules import OPERATORS, PAGE_METRICS, PRIORITIES, RULES_MAX, SCAN_METRICS, default_rules
+from backend.seo_scheduler import (
+    SCHEDULE_DEFAULT_INTERVAL_S, SCHEDULE_MAX_INTERVAL_S, SCHEDULE_MIN_INTERVAL_S, ScanScheduler, ScheduleLimitReached,
+    default_schedule_store,
+)
+from backend.seo_columns import DEFAULT_SCORE_WEIGHTS
+from backend.seo_results import ISSUE_TYPES, RESULTS_PAGE_MAX, read_issues, rescore_scan
+from backend.seo_store import default_store
+from backend.seo_trace import METRICS
+
+# =========================
+# Client HTTP du crawler (partagé, durée de vie de l'app)
+# =========================
+# Un seul client pour tous les scans : pools de connexions keep-alive (et HTTP/2
+# si h2 est installé) réutilisés d'un scan à l'autre. Profils : cf. seo_transport
+SCAN_TRANSPORT_PROFILE = os.getenv("SEO_TRANSPORT_PROFILE", "shared")
+SCAN_CLIENT_TIMEOUT_S = 12.0
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with make_client(
+        timeout_s=SCAN_CLIENT_TIMEOUT_S, resolver=default_resolver(), transport=SCAN_TRANSPORT_PROFILE
+    ) as client:
+        app.state.scan_client = client
+        scan_jobs.client = client
+        # Scans récurrents : dispatchés via scan_jobs, dans la boucle de l'app
+        scan_scheduler.start()
+        try:
+            yield
+        finally:
+            await scan_scheduler.stop()
+            scan_jobs.client = None
+            app.state.scan_client = None
+    # Workers du pool d'analyse (process) arrêtés avec l'app
+    shutdown_analysis_pool()
+
+app = FastAPI(title="Marketing Command Center API", lifespan=lifespan)
 
 # =========================
 # CORS (frontend Next.js)
@@ -24,34 +71,44 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=False,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
 
 # =========================
-# Rate limit simple (in-memory)
+# Compression des réponses
+# =========================
+# JSON classiques : GZipMiddleware ; SSE / NDJSON : compressés message par
+# message (cf. seo_encode.StreamingGZipMiddleware), sans retenir les events
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=COMPRESS_MIN_BYTES,
+    compresslevel=GZIP_LEVEL,
+    exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + STREAMED_CONTENT_TYPES,
+)
+app.add_middleware(StreamingGZipMiddleware)
+
+# =========================
+# Rate limit (sliding window, backend configurable)
 # =========================
 # Exemple: max 10 scans / 5 minutes / IP
 RATE_LIMIT_MAX = 10
 RATE_LIMIT_WINDOW_S = 300
 
-_ip_hits: Dict[str, Deque[float]] = {}
-
-def rate_limit_or_429(ip: str):
-    now = time.time()
-    q = _ip_hits.setdefault(ip, deque())
-    # purge old
-    while q and (now - q[0]) > RATE_LIMIT_WINDOW_S:
-        q.popleft()
+# RATE_LIMIT_BACKEND = memory (défaut, par process) | sqlite:///... | redis://...
+# -> sqlite/redis pour partager les limites entre plusieurs workers uvicorn
+rate_limiter = limiter_from_env(RATE_LIMIT_MAX, RATE_LIMIT_WINDOW_S)
 
-    if len(q) >= RATE_LIMIT_MAX:
+async def rate_limit_or_429(ip: str):
+    # Backend sqlite (verrou, busy timeout) / redis (aller-retour réseau) : hors de la boucle d'events
+    res = await asyncio.to_thread(rate_limiter.hit, ip)
+    if not res.allowed:
         raise HTTPException(
             status_code=429,
-            detail=f"Too many scans. Try later. ({RATE_LIMIT_MAX}/{RATE_LIMIT_WINDOW_S}s)"
+            detail=f"Too many scans. Try later. ({RATE_LIMIT_MAX}/{RATE_LIMIT_WINDOW_S}s)",
+            headers={"Retry-After": str(res.retry_after_s)},
         )
 
-    q.append(now)
-
 # =========================
 # Validation INPUT (URL/email/IP)
 # =========================
@@ -95,69 +152,148 @@ def normalize_url(raw: str) -> str:
 
     return urlunparse(parsed)
 
-def host_is_blocked(host: str) -> bool:
+# Résolution DNS async + cache TTL (positifs et négatifs), partagée avec le crawler
+resolver = default_resolver()
+
+async def host_is_blocked(host: str) -> bool:
     """
     Block localhost / private IP / loopback / link-local / multicast / reserved.
     If host is a domain, resolve and block if any resolved IP is private.
+    Le crawler revalide chaque host suivi et se connecte sur les IP validées.
     """
-    h = host.strip().lower()
+    return await resolver.is_blocked(host)
 
-    # Block obvious local hostnames
-    if h in ("localhost",):
-        return True
-
-    # If host is already an IP
-    try:
-        ip_obj = ipaddress.ip_address(h)
-        if (
-            ip_obj.is_private
-            or ip_obj.is_loopback
-            or ip_obj.is_link_local
-            or ip_obj.is_multicast
-            or ip_obj.is_reserved
-            or ip_obj.is_unspecified
-        ):
-            return True
-        return False
-    except ValueError:
-        pass
-
-    # Domain -> resolve IPs -> block if any is private/loopback/etc
-    try:
-        infos = socket.getaddrinfo(h, None)
-        ips = set()
-        for info in infos:
-            sockaddr = info[4]
-            ip = sockaddr[0]
-            ips.add(ip)
-
-        for ip in ips:
-            ip_obj = ipaddress.ip_address(ip)
-            if (
-                ip_obj.is_private
-                or ip_obj.is_loopback
-                or ip_obj.is_link_local
-                or ip_obj.is_multicast
-                or ip_obj.is_reserved
-                or ip_obj.is_unspecified
-            ):
-                return True
-
-        return False
-    except Exception:
-        # If DNS fails -> refuse
-        return True
-
-def validate_target_url(raw: str) -> str:
+async def validate_target_url(raw: str) -> str:
     url = normalize_url(raw)
     parsed = urlparse(url)
     host = parsed.hostname or ""
 
-    if host_is_blocked(host):
+    if await host_is_blocked(host):
         raise HTTPException(status_code=403, detail="Blocked host (localhost/private IP/DNS invalid)")
 
     return url
 
+# =========================
+# Jobs de scan (dédup + file bornée + reprise SSE)
+# =========================
+SCAN_MAX_RUNNING = 4
+SCAN_MAX_QUEUED = 50
+
+# Pages max par scan ; plus en mode streaming (issues sur disque, pas de gros "done")
+SCAN_MAX_PAGES = 200
+STREAM_MAX_PAGES = 20000
+
+# Crawls checkpointés : un job interrompu puis relancé reprend au dernier checkpoint
+scan_jobs = ScanJobManager(max_running=SCAN_MAX_RUNNING, max_queued=SCAN_MAX_QUEUED, checkpoint_dir=CHECKPOINT_DIR)
+# Règles d'alerte évaluées pendant chaque scan (persistées si SEO_RULES_PATH est défini)
+scan_jobs.rules = default_rules()
+
+# =========================
+# Scans planifiés (récurrents)
+# =========================
+# Planifications persistées si SEO_SCHEDULE_PATH est défini (SQLite)
+SCHEDULER_MAX_RUNNING = 2
+
+scan_scheduler = ScanScheduler(scan_jobs, default_schedule_store(), max_running=SCHEDULER_MAX_RUNNING)
+
+class ScanRequest(BaseModel):
+    url: str
+    max_pages: int = Field(25, ge=1, le=STREAM_MAX_PAGES)
+    stream_issues: bool = False
+    trace: bool = False
+    profile: bool = False
+    # "pagerank" : pages les plus liées crawlées d'abord (cf. seo_graph)
+    crawl_order: str = Field("depth", pattern="^(depth|pagerank)$")
+
+def check_max_pages(max_pages: int, stream_issues: bool):
+    if not stream_issues and max_pages > SCAN_MAX_PAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"max_pages > {SCAN_MAX_PAGES} requires stream_issues=true",
+        )
+
+def submit_scan_or_503(url: str, **params) -> Tuple[ScanJob, bool]:
+    try:
+        return scan_jobs.submit(url, **params)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def get_job_or_404(job_id: str) -> ScanJob:
+    job = scan_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown scan job")
+    return job
+
+def job_event_response(job: ScanJob, after_seq: int = 0, client_ip: Optional[str] = None) -> EventSourceResponse:
+    async def event_generator():
+        # id = "<job_id>:<seq>" -> renvoyé par le navigateur en Last-Event-ID à la reconnexion
+        # Events déjà encodés par le job ; seul le "done" personnalisé est ré-encodé
+        async for seq, event, data, encoded in scan_jobs.stream(job, after_seq):
+            if event == "done" and client_ip:
+                encoded = json_dumps({**data, "meta": {**data["meta"], "client_ip": client_ip}})
+            yield {"id": job.event_id(seq), "event": event, "data": encoded}
+
+    return EventSourceResponse(event_generator())
+
+# =========================
+# Batch multi-sites (NDJSON)
+# =========================
+BATCH_MAX_SITES = 50
+BATCH_MAX_RUNNING = 1
+
+batches_running = 0
+
+class ReleasingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse qui appelle `release` une fois la réponse terminée, même sans itération du flux.
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+class ScheduleRequest(BaseModel):
+    url: str
+    interval_s: float = Field(SCHEDULE_DEFAULT_INTERVAL_S, ge=SCHEDULE_MIN_INTERVAL_S, le=SCHEDULE_MAX_INTERVAL_S)
+    max_pages: int = Field(25, ge=1, le=STREAM_MAX_PAGES)
+    stream_issues: bool = False
+    crawl_order: str = Field("depth", pattern="^(depth|pagerank)$")
+    # Scan précédent encore en cours à l'échéance : "skip" ou "defer"
+    overlap: str = Field("skip", pattern="^(skip|defer)$")
+
+class ScheduleUpdate(BaseModel):
+    enabled: bool
+
+class AlertRule(BaseModel):
+    id: str = Field(..., pattern=r"^[A-Za-z0-9_.-]{1,64}$")
+    name: str = Field("", max_length=200)
+    # Métrique de page (évaluée sur chaque page) ou du scan (cf. GET /seo/rules)
+    metric: str
+    operator: str
+    threshold: float
+    priority: str = "P1"
+    # Hosts concernés ; absent = tous les sites
+    sites: Optional[List[str]] = None
+    enabled: bool = True
+
+class RulesUpdate(BaseModel):
+    rules: List[AlertRule] = Field(..., max_length=RULES_MAX)
+
+class RescoreRequest(BaseModel):
+    thin_words_threshold: int = Field(250, ge=0, le=100000)
+    # Pénalité par item (cf. seo_columns.DEFAULT_SCORE_WEIGHTS)
+    weights: Dict[str, float] = Field(default_factory=dict)
+
+class BatchScanRequest(BaseModel):
+    urls: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_SITES)
+    max_pages: int = Field(25, ge=1, le=200)
+
 # =========================
 # Routes
 # =========================
@@ -165,82 +301,292 @@ def validate_target_url(raw: str) -> str:
 def health():
     return {"ok": True}
 
+@app.get("/metrics")
+def metrics():
+    """
+    Métriques Prometheus (format texte) : requêtes HTTP et phases, parsing, files, jobs.
+    """
+    jobs = scan_jobs.jobs()
+    METRICS.set("seo_jobs", sum(1 for j in jobs if j.status == RUNNING), help_text="Scan jobs by status", status="running")
+    METRICS.set("seo_jobs", sum(1 for j in jobs if j.status == QUEUED), help_text="Scan jobs by status", status="queued")
+    sched = scan_scheduler.stats()
+    METRICS.set("seo_scheduled_scans_running", sched["running"], help_text="Scheduled scans running")
+    METRICS.set("seo_schedules", sched["schedules"], help_text="Recurring scan schedules")
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/seo/scan/stream")
-def seo_scan_stream(
+async def seo_scan_stream(
     request: Request,
-    url: str = Query(..., description="Target website URL (domain or full URL)")
+    url: str = Query(..., description="Target website URL (domain or full URL)"),
+    max_pages: int = Query(25, ge=1, le=STREAM_MAX_PAGES),
+    stream_issues: bool = Query(False, description="Emit issues as 'issue' events; done carries a handle"),
+    trace: bool = Query(False, description="Add per-phase timings to the done payload"),
+    profile: bool = Query(False, description="Add a cProfile summary of the scan to the timings"),
+    crawl_order: str = Query("depth", pattern="^(depth|pagerank)$", description="Crawl order: BFS depth or internal PageRank"),
 ):
     # Client IP
     client_ip = request.client.host if request.client else "unknown"
-    rate_limit_or_429(client_ip)
 
-    # Validate URL (blocks email, localhost, private IP, bad scheme)
-    safe_url = validate_target_url(url)
-    parsed = urlparse(safe_url)
-    host = parsed.hostname or ""
+    # Reconnexion EventSource : reprise du même job à partir de Last-Event-ID
+    job_id, after_seq = parse_event_id(request.headers.get("last-event-id"))
+    job = scan_jobs.get(job_id) if job_id else None
+
+    if job is None:
+        check_max_pages(max_pages, stream_issues)
+        await rate_limit_or_429(client_ip)
+
+        # Validate URL (blocks email, localhost, private IP, bad scheme)
+        safe_url = await validate_target_url(url)
+        job, _ = submit_scan_or_503(
+            safe_url,
+            max_pages=max_pages,
+            stream_issues=stream_issues,
+            trace=trace,
+            profile=profile,
+            crawl_order=crawl_order,
+        )
+        after_seq = 0
+
+    return job_event_response(job, after_seq, client_ip=client_ip)
+
+@app.post("/seo/scan/jobs")
+async def create_scan_job(request: Request, body: ScanRequest):
+    client_ip = request.client.host if request.client else "unknown"
+    check_max_pages(body.max_pages, body.stream_issues)
+    await rate_limit_or_429(client_ip)
+
+    safe_url = await validate_target_url(body.url)
+    job, coalesced = submit_scan_or_503(
+        safe_url,
+        max_pages=body.max_pages,
+        stream_issues=body.stream_issues,
+        trace=body.trace,
+        profile=body.profile,
+        crawl_order=body.crawl_order,
+    )
+    return {**job.summary(), "coalesced": coalesced}
+
+@app.get("/seo/scan/jobs/{job_id}")
+def get_scan_job(job_id: str):
+    return get_job_or_404(job_id).summary()
+
+@app.get("/seo/scan/jobs/{job_id}/stream")
+async def stream_scan_job(request: Request, job_id: str):
+    job = get_job_or_404(job_id)
+    last_job_id, after_seq = parse_event_id(request.headers.get("last-event-id"))
+    if last_job_id != job.id:
+        after_seq = 0
+    return job_event_response(job, after_seq)
+
+@app.get("/seo/scan/jobs/{job_id}/result")
+def get_scan_job_result(request: Request, job_id: str):
+    """
+    Payload "done" d'un job terminé, compressé (brotli si installé, sinon gzip)
+    selon Accept-Encoding ; encodé une fois par encodage puis servi du cache du job.
+    """
+    job = get_job_or_404(job_id)
+    if job.result is None:
+        if job.status not in FINISHED:
+            raise HTTPException(status_code=409, detail="Scan job is not finished")
+        raise HTTPException(status_code=404, detail="Scan job has no result")
+    encoding = accepted_encoding(request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(job.result_body(encoding), media_type="application/json", headers=headers)
+
+def get_schedule_or_404(schedule_id: str):
+    schedule = scan_scheduler.get(schedule_id)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Unknown schedule")
+    return schedule
+
+def schedule_summary(schedule) -> Dict:
+    return {**schedule.summary(), "running": scan_scheduler.is_running(schedule.id)}
+
+@app.post("/seo/schedules")
+async def create_schedule(request: Request, body: ScheduleRequest):
+    """
+    Scan récurrent d'un site (nocturne par défaut). Même URL + mêmes paramètres :
+    la planification existante est renvoyée.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    check_max_pages(body.max_pages, body.stream_issues)
+    await rate_limit_or_429(client_ip)
+    safe_url = await validate_target_url(body.url)
+    # Mêmes paramètres qu'un scan interactif : fusion avec un scan identique en cours
+    try:
+        schedule = scan_scheduler.add(
+            safe_url,
+            interval_s=body.interval_s,
+            overlap=body.overlap,
+            max_pages=body.max_pages,
+            stream_issues=body.stream_issues,
+            trace=False,
+            profile=False,
+            crawl_order=body.crawl_order,
+        )
+    except ScheduleLimitReached as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return schedule_summary(schedule)
+
+@app.get("/seo/schedules")
+def list_schedules():
+    return {
+        "scheduler": scan_scheduler.stats(),
+        "schedules": [schedule_summary(s) for s in scan_scheduler.schedules()],
+    }
+
+@app.get("/seo/schedules/{schedule_id}")
+def get_schedule(schedule_id: str):
+    return schedule_summary(get_schedule_or_404(schedule_id))
+
+# async : réveille la boucle du scheduler (asyncio.Event, pas thread-safe)
+@app.patch("/seo/schedules/{schedule_id}")
+async def update_schedule(schedule_id: str, body: ScheduleUpdate):
+    get_schedule_or_404(schedule_id)
+    scan_scheduler.set_enabled(schedule_id, body.enabled)
+    return schedule_summary(get_schedule_or_404(schedule_id))
+
+@app.delete("/seo/schedules/{schedule_id}")
+def delete_schedule(schedule_id: str):
+    if not scan_scheduler.remove(schedule_id):
+        raise HTTPException(status_code=404, detail="Unknown schedule")
+    return {"deleted": schedule_id}
+
+@app.post("/seo/schedules/{schedule_id}/run")
+async def run_schedule_now(schedule_id: str):
+    """
+    Avance la prochaine échéance à maintenant (budget et espacement par host respectés).
+    """
+    get_schedule_or_404(schedule_id)
+    scan_scheduler.run_now(schedule_id)
+    return schedule_summary(get_schedule_or_404(schedule_id))
+
+@app.get("/seo/schedules/{schedule_id}/runs")
+def get_schedule_runs(
+    schedule_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[int] = Query(None, ge=1, description="Run id cursor (older runs)"),
+):
+    """
+    Historique des runs (plus récent d'abord) : statut, KPIs, score de santé.
+    """
+    get_schedule_or_404(schedule_id)
+    return {"runs": scan_scheduler.store.runs(schedule_id, limit=limit, before=before)}
+
+def rules_summary() -> Dict:
+    return {
+        "rules": [rule.to_dict() for rule in scan_jobs.rules.rules()],
+        "metrics": {"page": list(PAGE_METRICS), "scan": list(SCAN_METRICS)},
+        "operators": list(OPERATORS),
+        "priorities": list(PRIORITIES),
+    }
+
+@app.get("/seo/rules")
+def get_rules():
+    return rules_summary()
+
+@app.put("/seo/rules")
+def replace_rules(body: RulesUpdate):
+    """
+    Remplace toutes les règles d'alerte ; prises en compte par les scans suivants.
+    """
+    try:
+        scan_jobs.rules.replace(rule.model_dump() for rule in body.rules)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return rules_summary()
+
+@app.get("/seo/scan/results/{scan_id}/issues")
+def get_scan_issues(
+    scan_id: str,
+    type: Optional[str] = Query(None, description="Issue type filter"),
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=RESULTS_PAGE_MAX),
+):
+    """
+    Lecture paginée des issues d'un scan en mode streaming (handle "issues_handle.scan_id").
+    """
+    if type is not None and type not in ISSUE_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown issue type: {type}")
+    page = read_issues(scan_id, kind=type, cursor=cursor, limit=limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Unknown scan results")
+    return page
+
+@app.post("/seo/scan/results/{scan_id}/rescore")
+async def rescore_scan_results(scan_id: str, body: RescoreRequest):
+    """
+    KPIs + score recalculés (autre seuil "thin", autres poids), sans re-crawl.
+    Tout scan terminé avec un store (SEO_STORE_PATH) : id "meta.scan_id" du payload,
+    historique des SCAN_HISTORY_MAX_PER_TARGET derniers scans par cible.
+    """
+    unknown = sorted(set(body.weights) - set(DEFAULT_SCORE_WEIGHTS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown score weight(s): {', '.join(unknown)}")
+    store = default_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Scan history is disabled (SEO_STORE_PATH)")
+    result = await asyncio.to_thread(
+        rescore_scan, store, scan_id, thin_words_threshold=body.thin_words_threshold, weights=body.weights
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown scan")
+    return result
+
+@app.post("/seo/scan/batch")
+async def seo_scan_batch(request: Request, body: BatchScanRequest):
+    """
+    Scan de plusieurs sites : une ligne NDJSON par site terminé, puis une ligne de stats.
+    """
+    global batches_running
+    client_ip = request.client.host if request.client else "unknown"
+    if batches_running >= BATCH_MAX_RUNNING:
+        raise HTTPException(status_code=503, detail="A batch scan is already running")
+    await rate_limit_or_429(client_ip)
+
+    # Re-vérifié après l'await, puis place réservée sans await entre les deux :
+    # deux requêtes simultanées ne passent pas toutes les deux
+    if batches_running >= BATCH_MAX_RUNNING:
+        raise HTTPException(status_code=503, detail="A batch scan is already running")
+    batches_running += 1
+    released = False
+
+    def release_slot():
+        global batches_running
+        nonlocal released
+        if not released:
+            released = True
+            batches_running -= 1
 
-    def event_generator():
-        # IMPORTANT: en SSE, on envoie aussi des pings pour garder la connexion
-        def send_progress(pct: int, label: str):
-            return {"event": "progress", "data": json.dumps({"progress": pct, "label": label})}
-
-        # Etape 1: start
-        yield send_progress(5, "Starting scan")
-
-        # Etape 2: fetch/crawl (ici tu mettras ton vrai crawler)
-        yield send_progress(10, "Fetching & crawling pages")
-
-        # Simule crawl pages (10 pages)
-        max_pages = 10
-        for i in range(1, max_pages + 1):
-            yield send_progress(10 + int((60 * i) / max_pages), f"Crawling pages ({i}/{max_pages})")
-            time.sleep(0.6)
-
-        # Analyse (simulé)
-        yield send_progress(75, "Checking internal links")
-        time.sleep(0.7)
-
-        # Ping keepalive (optionnel)
-        yield {"event": "ping", "data": json.dumps({"ts": time.time()})}
-
-        yield send_progress(85, "Computing SEO score")
-        time.sleep(0.7)
-
-        yield send_progress(100, "Scan completed")
-
-        # DONE payload (format attendu par ton front)
-        payload = {
-            "kpis": {
-                "pages_crawled": max_pages,
-                "critical_issues": 0,
-                "missing_meta_descriptions": 0,
-                "thin_pages": 2,
-            },
-            "health": {
-                "score": 91,
-                "main_issue": "Thin content pages on 2 item(s)",
-            },
-            "issues": {
-                "missing_meta_descriptions": [],
-                "broken_links": [],
-                "duplicate_titles": {},
-                "thin_pages": [
-                    {"url": f"https://{host}/contact/", "words": 123},
-                    {"url": f"https://{host}/category/google-ads-sea/", "words": 228},
-                ],
-                "missing_h1": [],
-            },
-            "meta": {
-                "target_url": safe_url,
-                "host": host,
-                "max_pages": max_pages,
-                "thin_words_threshold": 250,
-                "duration_s": 3.14,
-                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-                "client_ip": client_ip,
-            },
-        }
-
-        yield {"event": "done", "data": json.dumps(payload)}
-
-    return EventSourceResponse(event_generator())
\ No newline at end of file
+    try:
+        # URLs refusées (email, host privé...) : signalées dans le flux, pas scannées
+        targets, rejected = [], []
+        for raw in body.urls:
+            try:
+                targets.append(await validate_target_url(raw))
+            except HTTPException as e:
+                rejected.append(SiteResult(raw, False, 0.0, error=str(e.detail)))
+    except BaseException:
+        release_slot()
+        raise
+
+    async def ndjson_lines():
+        stats = BatchStats(len(targets) + len(rejected))
+        try:
+            for res in rejected:
+                stats.add(res)
+                yield json_dumps(res.record()) + "\n"
+            if targets:
+                shared_client = getattr(request.app.state, "scan_client", None)
+                batch = run_batch(targets, max_pages=body.max_pages, client=shared_client)
+                async for res in batch:
+                    stats.add(res)
+                    yield json_dumps(res.record()) + "\n"
+            yield json_dumps({"summary": {**stats.summary(), "client_ip": client_ip}}) + "\n"
+        finally:
+            release_slot()
+
+    # Libérée aussi si le flux n'est jamais itéré (client parti avant l'envoi du corps)
+    return ReleasingStreamingResponse(ndjson_lines(), release_slot, media_type="application/x-ndjson")
@@ -0,0 +1,200 @@
+# backend/rate_limit.py
+from __future__ import annotations
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# Sliding window counter : pour chaque clé on ne garde que le compteur de la
+# fenêtre courante et celui de la précédente (O(1) mémoire par clé active).
+# Estimation = prev * (part de la fenêtre précédente encore couverte) + curr
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    retry_after_s: int
+
+
+def _estimate(prev: int, curr: int, now: float, window_s: float) -> float:
+    elapsed = (now % window_s) / window_s
+    return prev * (1.0 - elapsed) + curr
+
+
+def _retry_after(prev: int, curr: int, limit: int, now: float, window_s: float) -> int:
+    """
+    Secondes avant que l'estimation repasse sous la limite (approximation).
+    """
+    into = now % window_s
+    if prev and curr < limit:
+        # Le poids de prev décroît linéairement jusqu'à la fin de la fenêtre courante
+        needed = 1.0 - (limit - curr) / prev
+        wait = max(0.0, needed * window_s - into)
+    else:
+        wait = window_s - into
+    return max(1, math.ceil(wait))
+
+
+class MemoryBackend:
+    """
+    Backend in-process. Clés inactives évincées (LRU), nombre de clés borné.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> [window_idx, prev, curr, last_seen]
+        self._data: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def hit(self, key: str, limit: int, window_s: float, now: float) -> Tuple[bool, int, int]:
+        idx = int(now // window_s)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                entry = self._data[key] = [idx, 0, 0, now]
+            else:
+                self._data.move_to_end(key)
+            self._evict(now, window_s)
+            w, prev, curr, _ = entry
+            if idx != w:
+                # Fenêtre suivante : curr devient prev ; au-delà, tout est expiré
+                prev, curr = (curr if idx == w + 1 else 0), 0
+            allowed = _estimate(prev, curr, now, window_s) < limit
+            if allowed:
+                curr += 1
+            entry[:] = [idx, prev, curr, now]
+            return allowed, int(prev), int(curr)
+
+    def _evict(self, now: float, window_s: float) -> None:
+        # Les plus anciennes en tête : on s'arrête à la première encore active
+        while self._data:
+            key, entry = next(iter(self._data.items()))
+            if now - entry[3] > 2 * window_s or len(self._data) > self.max_keys:
+                self._data.popitem(last=False)
+            else:
+                break
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """
+    Backend partagé entre process (plusieurs workers uvicorn) via un fichier SQLite.
+    """
+
+    def __init__(self, path: str, cleanup_every: int = 1000):
+        self.path = path
+        self.cleanup_every = cleanup_every
+        self._hits = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limit (
+                key TEXT PRIMARY KEY,
+                window INTEGER NOT NULL,
+                prev INTEGER NOT NULL,
+                curr INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+
+    def hit(self, key: str, limit: int, window_s: float, now: float) -> Tuple[bool, int, int]:
+        idx = int(now // window_s)
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT window, prev, curr FROM rate_limit WHERE key = ?", (key,)).fetchone()
+                w, prev, curr = row if row else (idx, 0, 0)
+                if idx != w:
+                    prev, curr = (curr if idx == w + 1 else 0), 0
+                allowed = _estimate(prev, curr, now, window_s) < limit
+                if allowed:
+                    curr += 1
+                db.execute(
+                    "INSERT OR REPLACE INTO rate_limit (key, window, prev, curr, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, idx, prev, curr, now),
+                )
+                self._hits += 1
+                if self._hits % self.cleanup_every == 0:
+                    db.execute("DELETE FROM rate_limit WHERE updated_at < ?", (now - 2 * window_s,))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            return allowed, prev, curr
+
+
+class RedisBackend:
+    """
+    Backend partagé sur une API compatible Redis (INCR / DECR / GET / EXPIRE).
+    `client` : redis.Redis ou tout objet exposant ces méthodes.
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit"):
+        self.client = client
+        self.prefix = prefix
+
+    def hit(self, key: str, limit: int, window_s: float, now: float) -> Tuple[bool, int, int]:
+        idx = int(now // window_s)
+        curr_key = f"{self.prefix}:{key}:{idx}"
+        prev = int(self.client.get(f"{self.prefix}:{key}:{idx - 1}") or 0)
+        curr = int(self.client.incr(curr_key))
+        if curr == 1:
+            self.client.expire(curr_key, int(math.ceil(2 * window_s)))
+        # Incrément optimiste, annulé si la limite est dépassée
+        if _estimate(prev, curr - 1, now, window_s) >= limit:
+            self.client.decr(curr_key)
+            return False, prev, curr - 1
+        return True, prev, curr
+
+
+def backend_from_url(url: Optional[str]):
+    """
+    "memory" (défaut) | "sqlite:///chemin/fichier.db" | "redis://host:6379/0"
+    """
+    url = (url or "memory").strip()
+    if url == "memory":
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://")):
+        import redis  # dépendance optionnelle (pip install redis)
+
+        return RedisBackend(redis.Redis.from_url(url))
+    raise ValueError(f"Unknown rate limit backend: {url}")
+
+
+class RateLimiter:
+    """
+    Limite `limit` hits par `window_s` secondes et par clé (sliding window counter).
+    """
+
+    def __init__(self, limit: int, window_s: float, backend=None):
+        self.limit = limit
+        self.window_s = window_s
+        self.backend = backend if backend is not None else MemoryBackend()
+
+    def hit(self, key: str, now: Optional[float] = None) -> RateLimitResult:
+        now = time.time() if now is None else now
+        allowed, prev, curr = self.backend.hit(key, self.limit, self.window_s, now)
+        used = int(math.ceil(_estimate(prev, curr, now, self.window_s)))
+        return RateLimitResult(
+            allowed=allowed,
+            remaining=max(0, self.limit - used),
+            retry_after_s=0 if allowed else _retry_after(prev, curr, self.limit, now, self.window_s),
+        )
+
+
+def limiter_from_env(limit: int, window_s: float) -> RateLimiter:
+    return RateLimiter(limit, window_s, backend=backend_from_url(os.getenv("RATE_LIMIT_BACKEND")))
@@ -0,0 +1,282 @@
+# backend/seo_batch.py
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from backend.seo_canonical import canonical_netloc
+from backend.seo_crawler import make_client, normalize_target_url, run_seo_scan_async
+from backend.seo_resolver import HostResolver
+
+# Sites scannés en même temps, connexions au total pour tout le batch
+BATCH_SITE_CONCURRENCY = 4
+BATCH_MAX_CONNECTIONS = 32
+
+
+@dataclass
+class SiteResult:
+    url: str
+    ok: bool
+    duration_s: float
+    payload: Optional[Dict[str, Any]] = None
+    error: str = ""
+
+    def record(self) -> Dict[str, Any]:
+        rec: Dict[str, Any] = {"url": self.url, "ok": self.ok, "duration_s": self.duration_s}
+        if self.ok:
+            rec["result"] = self.payload
+        else:
+            rec["error"] = self.error
+        return rec
+
+
+class BatchStats:
+    """
+    Compteurs du batch : débit en sites/heure (et pages/s) depuis le démarrage.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.ok = 0
+        self.errors = 0
+        self.pages = 0
+        self.started = time.monotonic()
+
+    def add(self, res: SiteResult) -> None:
+        if res.ok:
+            self.ok += 1
+            self.pages += (res.payload or {}).get("kpis", {}).get("pages_crawled", 0)
+        else:
+            self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        done = self.ok + self.errors
+        return {
+            "sites": self.total,
+            "done": done,
+            "ok": self.ok,
+            "errors": self.errors,
+            "pages_crawled": self.pages,
+            "duration_s": round(elapsed, 2),
+            "sites_per_hour": round(done * 3600 / elapsed, 1),
+            "pages_per_s": round(self.pages / elapsed, 2),
+        }
+
+
+def group_by_host(targets: Iterable[str]) -> "OrderedDict[str, List[str]]":
+    """
+    URLs normalisées, dédupliquées et regroupées par host (ordre d'arrivée conservé).
+    Les URLs invalides sont gardées telles quelles : leur scan finira en erreur.
+    """
+    lanes: "OrderedDict[str, List[str]]" = OrderedDict()
+    seen = set()
+    for raw in targets:
+        raw = (raw or "").strip()
+        if not raw or raw.startswith("#"):
+            continue
+        try:
+            url = normalize_target_url(raw)
+        except ValueError:
+            url = raw
+        if url in seen:
+            continue
+        seen.add(url)
+        u = urlparse(url)
+        lanes.setdefault(canonical_netloc(u.netloc, u.scheme) or url, []).append(url)
+    return lanes
+
+
+async def _scan_site(url: str, **scan_opts) -> SiteResult:
+    t0 = time.monotonic()
+    try:
+        payload = None
+        async for event, data in run_seo_scan_async(url, **scan_opts):
+            if event == "done":
+                payload = data
+        if payload is None:
+            raise RuntimeError("Scan ended without result")
+        return SiteResult(url, True, round(time.monotonic() - t0, 2), payload=payload)
+    except Exception as e:
+        return SiteResult(url, False, round(time.monotonic() - t0, 2), error=str(e) or type(e).__name__)
+
+
+async def run_batch(
+    targets: Iterable[str],
+    max_pages: int = 25,
+    site_concurrency: int = BATCH_SITE_CONCURRENCY,
+    max_connections: int = BATCH_MAX_CONNECTIONS,
+    timeout_s: float = 12.0,
+    resolver: Optional[HostResolver] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    **scan_opts,
+) -> AsyncIterator[SiteResult]:
+    """
+    Scanne une liste de sites ; yield un SiteResult par site, dans l'ordre de fin.
+
+    - un seul client httpx (pools de connexions + cache DNS partagés) : `client`
+      (client longue durée de l'app, non fermé ici) ou un client "shared" dédié
+    - budget global : `site_concurrency` sites à la fois, chacun avec
+      `max_connections // site_concurrency` requêtes simultanées au plus
+    - équité par host : les URLs d'un même host passent l'une après l'autre,
+      les hosts se partagent les créneaux à tour de rôle
+    `scan_opts` : options de `run_seo_scan_async` (polite_delay_s, store...).
+    """
+    lanes = group_by_host(targets)
+    site_concurrency = max(1, int(site_concurrency))
+    per_site = max(1, int(max_connections) // site_concurrency)
+    scan_opts.setdefault("per_host_limit", min(4, per_site))
+
+    slots = asyncio.Semaphore(site_concurrency)
+    results: "asyncio.Queue[SiteResult]" = asyncio.Queue()
+
+    own_client = client is None
+    if own_client:
+        client = make_client(
+            timeout_s=timeout_s, max_connections=per_site * site_concurrency, resolver=resolver, transport="shared"
+        )
+    try:
+
+        async def lane(urls: List[str]) -> None:
+            for url in urls:
+                # Le sémaphore réveille les attentes en FIFO : une lane qui vient de
+                # finir un site repasse derrière les autres hosts
+                async with slots:
+                    res = await _scan_site(
+                        url,
+                        max_pages=max_pages,
+                        timeout_s=timeout_s,
+                        concurrency=per_site,
+                        client=client,
+                        **scan_opts,
+                    )
+                await results.put(res)
+
+        tasks = [asyncio.create_task(lane(urls)) for urls in lanes.values()]
+        try:
+            for _ in range(sum(len(urls) for urls in lanes.values())):
+                yield await results.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if own_client:
+            await client.aclose()
+
+
+# =========================
+# Sorties fichiers
+# =========================
+def site_filename(url: str) -> str:
+    u = urlparse(url)
+    slug = re.sub(r"[^A-Za-z0-9.-]+", "_", u.netloc + u.path).strip("_.")
+    return (slug or "site") + ".json"
+
+
+def write_site_result(out_dir: str, res: SiteResult, used: Optional[set] = None) -> str:
+    """
+    Un fichier JSON par site (suffixe -2, -3... si deux URLs donnent le même nom).
+    """
+    name = site_filename(res.url)
+    if used is not None:
+        base, n = name[:-5], 2
+        while name in used:
+            name, n = f"{base}-{n}.json", n + 1
+        used.add(name)
+    path = os.path.join(out_dir, name)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(res.record(), f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+# =========================
+# CLI : python -m backend.seo_batch
+# =========================
+def _read_targets(args) -> List[str]:
+    targets = list(args.urls)
+    if args.file:
+        f = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+        with f:
+            targets.extend(line.strip() for line in f)
+    return targets
+
+
+async def _main(args) -> int:
+    targets = _read_targets(args)
+    total = sum(len(urls) for urls in group_by_host(targets).values())
+    if not total:
+        print("No target URL", file=sys.stderr)
+        return 2
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    ndjson = None
+    if args.ndjson:
+        ndjson = sys.stdout if args.ndjson == "-" else open(args.ndjson, "w", encoding="utf-8")
+
+    stats = BatchStats(total)
+    used: set = set()
+    try:
+        batch = run_batch(
+            targets,
+            max_pages=args.max_pages,
+            site_concurrency=args.sites,
+            max_connections=args.connections,
+            timeout_s=args.timeout,
+            polite_delay_s=args.delay,
+        )
+        async for res in batch:
+            stats.add(res)
+            if args.out_dir:
+                write_site_result(args.out_dir, res, used)
+            if ndjson is not None:
+                ndjson.write(json.dumps(res.record(), ensure_ascii=False) + "\n")
+                ndjson.flush()
+            s = stats.summary()
+            status = "ok" if res.ok else f"error: {res.error}"
+            print(
+                f"[{s['done']}/{total}] {res.url} {status} ({res.duration_s}s, {s['sites_per_hour']} sites/h)",
+                file=sys.stderr,
+            )
+    finally:
+        if ndjson is not None and ndjson is not sys.stdout:
+            ndjson.close()
+
+    print(json.dumps(stats.summary()), file=sys.stderr)
+    return 0 if stats.errors == 0 else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.seo_batch", description="Batch SEO scan of several sites")
+    parser.add_argument("urls", nargs="*", help="Target URLs")
+    parser.add_argument("-f", "--file", help="File with one URL per line ('-' = stdin)")
+    parser.add_argument("-o", "--out-dir", help="Write one JSON result file per site in this directory")
+    parser.add_argument("--ndjson", help="Write all results as NDJSON to this file ('-' = stdout)")
+    parser.add_argument("--max-pages", type=int, default=25)
+    parser.add_argument("--sites", type=int, default=BATCH_SITE_CONCURRENCY, help="Sites scanned concurrently")
+    parser.add_argument("--connections", type=int, default=BATCH_MAX_CONNECTIONS, help="Global request budget")
+    parser.add_argument("--timeout", type=float, default=12.0)
+    parser.add_argument("--delay", type=float, default=0.0, help="Polite delay between requests to one host (s)")
+    args = parser.parse_args(argv)
+
+    if not args.out_dir and not args.ndjson:
+        args.ndjson = "-"
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,483 @@
+# backend/seo_bench.py
+from __future__ import annotations
+
+import os
+
+# Bench uniquement : le site fixture tourne sur 127.0.0.1 (bloqué sinon par la
+# protection SSRF). Doit être posé avant l'import du resolver.
+os.environ.setdefault("SEO_ALLOW_PRIVATE_HOSTS", "1")
+# Pas de store : chaque run refait tout le travail
+os.environ.pop("SEO_STORE_PATH", None)
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, replace
+from typing import Any, Dict, List, Optional
+
+from backend.seo_crawler import analyze_html
+from backend.seo_encode import JSON_ENCODER, brotli, compress, json_dumps_bytes
+from backend.seo_fixture_site import FixtureSite, SiteShape
+from backend.seo_rules import OPERATORS, PAGE_METRICS, PRIORITIES, SCAN_METRICS, RuleSet
+from backend.seo_transport import TRANSPORT_PROFILES
+
+# Formes de sites prédéfinies (surchargées par les options de la CLI)
+SCENARIOS: Dict[str, SiteShape] = {
+    "small": SiteShape(pages=50, fanout=8, page_kb=10, latency_ms=5),
+    "medium": SiteShape(pages=500, fanout=12, page_kb=20, latency_ms=10),
+    "large": SiteShape(pages=3000, fanout=20, page_kb=30, latency_ms=10),
+    "hostile": SiteShape(
+        pages=300, fanout=12, page_kb=20, latency_ms=30,
+        error_rate=0.1, redirect_rate=0.1, non_html_rate=0.1,
+    ),
+    # Serveur limité en débit (429 + Retry-After au-delà) : throttling adaptatif
+    "throttled": SiteShape(pages=200, fanout=10, page_kb=10, latency_ms=10, max_rps=30),
+}
+
+# Nombre de pages re-parsées pour mesurer le CPU de parsing
+PARSE_SAMPLE_PAGES = 50
+# max_pages accepté par l'API SSE sans stream_issues (cf. main.SCAN_MAX_PAGES)
+SSE_MAX_PAGES = 200
+# Répétitions pour chronométrer l'encodage du payload "done"
+ENCODE_REPEAT = 5
+# Règles d'alerte synthétiques : RULES_BENCH règles sur RULES_BENCH_SITES sites
+# (un tiers globales), évaluées sur autant de pages que le scénario
+RULES_BENCH = 3000
+RULES_BENCH_SITES = 200
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, int(round(q / 100.0 * (len(values) - 1)))))
+    return values[idx]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class LatencyRecorder:
+    """
+    Hooks httpx : temps entre l'envoi d'une requête et la réception des en-têtes.
+    """
+
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self._starts: Dict[int, float] = {}
+
+    async def on_request(self, request) -> None:
+        self._starts[id(request)] = time.perf_counter()
+
+    async def on_response(self, response) -> None:
+        t0 = self._starts.pop(id(response.request), None)
+        if t0 is not None:
+            self.latencies_ms.append((time.perf_counter() - t0) * 1000.0)
+
+    def hooks(self) -> Dict[str, List]:
+        return {"request": [self.on_request], "response": [self.on_response]}
+
+    def summary(self) -> Dict[str, Any]:
+        lat = self.latencies_ms
+        return {
+            "requests": len(lat),
+            "latency_p50_ms": round(percentile(lat, 50), 2),
+            "latency_p99_ms": round(percentile(lat, 99), 2),
+        }
+
+
+# =========================
+# Mesures (exécutées dans un process neuf : RSS max propre à chaque run)
+# =========================
+def _bench_crawl(url: str, max_pages: int, crawl_opts: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.seo_crawler import run_seo_scan_real, shutdown_analysis_pool
+
+    recorder = LatencyRecorder()
+    events = 0
+    done: Dict[str, Any] = {}
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    try:
+        scan = run_seo_scan_real(url, max_pages=max_pages, event_hooks=recorder.hooks(), trace=True, **crawl_opts)
+        for event, data in scan:
+            events += 1
+            if event == "done":
+                done = data
+    finally:
+        shutdown_analysis_pool()
+    wall = time.perf_counter() - t0
+
+    pages = done.get("kpis", {}).get("pages_crawled", 0)
+    # Réutilisation des connexions : connexions TCP ouvertes vs requêtes envoyées
+    timings = done.pop("timings", {})
+    requests = timings.get("requests", {}).get("total", {}).get("count", 0)
+    connections = timings.get("phases", {}).get("connect", {}).get("count", 0)
+    return {
+        "wall_s": round(wall, 3),
+        "pages_crawled": pages,
+        "pages_per_s": round(pages / wall, 2) if wall else 0.0,
+        **recorder.summary(),
+        "connections": connections,
+        "requests_per_connection": round(requests / connections, 2) if connections else 0.0,
+        "cpu_s": round(time.process_time() - cpu0, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "events": events,
+        "done_bytes": len(json.dumps(done)),
+        "encode": measure_encoding(done),
+    }
+
+
+def _best_ms(fn, *args) -> float:
+    best = float("inf")
+    for _ in range(ENCODE_REPEAT):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return round(best * 1000, 3)
+
+
+def measure_encoding(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Encodage du payload "done" d'un vrai scan : json de la stdlib (ancien chemin)
+    vs seo_encode (orjson si installé), puis taille / coût gzip et brotli.
+    """
+    data = json_dumps_bytes(payload)
+    out: Dict[str, Any] = {
+        "encoder": JSON_ENCODER,
+        "payload_bytes": len(data),
+        "stdlib_json_ms": _best_ms(json.dumps, payload),
+        "fast_json_ms": _best_ms(json_dumps_bytes, payload),
+        "gzip_bytes": len(compress(data, "gzip")),
+        "gzip_ms": _best_ms(compress, data, "gzip"),
+    }
+    if brotli is not None:
+        out["br_bytes"] = len(compress(data, "br"))
+        out["br_ms"] = _best_ms(compress, data, "br")
+    return out
+
+
+def measure_rules(pages: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Règles d'alerte (seo_rules) : compilation pour tous les sites, puis évaluation
+    incrémentale d'un scan de `pages` pages (métriques synthétiques, reproductibles).
+    """
+    rnd = random.Random(seed)
+    sites = [f"site{i}.example" for i in range(RULES_BENCH_SITES)]
+    items = [
+        {
+            "id": f"r{i}",
+            "metric": rnd.choice(PAGE_METRICS + SCAN_METRICS),
+            "operator": rnd.choice(OPERATORS),
+            "threshold": rnd.randint(0, 500),
+            "priority": rnd.choice(PRIORITIES),
+            "sites": None if i % 3 == 0 else rnd.sample(sites, 2),
+        }
+        for i in range(RULES_BENCH)
+    ]
+    records = [
+        {
+            "status": 200, "depth": rnd.randint(0, 8), "word_count": rnd.randint(0, 2000),
+            "h1_count": rnd.randint(0, 2), "has_meta": rnd.randint(0, 1),
+            "title_length": rnd.randint(0, 90), "internal_links": rnd.randint(0, 200),
+        }
+        for _ in range(max(1, pages))
+    ]
+    final = {m: rnd.randint(0, 500) for m in SCAN_METRICS}
+    rules = RuleSet.from_dicts(items)
+
+    t0 = time.perf_counter()
+    for site in sites:
+        rules.compiled(site)
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    def scan() -> int:
+        evaluator = rules.evaluator(sites[0])
+        for i, record in enumerate(records):
+            evaluator.observe_page(f"/p/{i}", record)
+            evaluator.observe_scan({"pages_crawled": i + 1, "thin_pages": i // 4})
+        evaluator.finish(final)
+        return len(evaluator.alerts())
+
+    return {
+        "rules": RULES_BENCH,
+        "sites": RULES_BENCH_SITES,
+        "rules_per_site": rules.compiled(sites[0]).size,
+        "pages": len(records),
+        "compile_ms": round(compile_ms, 2),
+        "scan_eval_ms": _best_ms(scan),
+        "alerts": scan(),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _bench_sse(url: str, max_pages: int, stream_issues: bool) -> Dict[str, Any]:
+    import httpx
+    import uvicorn
+
+    from backend import main
+    from backend.rate_limit import RateLimiter
+    from backend.seo_crawler import shutdown_analysis_pool
+    from backend.seo_trace import METRICS
+
+    # La limite par IP n'a pas de sens ici (tous les runs viennent de 127.0.0.1)
+    main.rate_limiter = RateLimiter(10**9, 1)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    params = {"url": url, "max_pages": max_pages, "stream_issues": str(stream_issues).lower()}
+
+    def one_scan(client: httpx.Client) -> Dict[str, Any]:
+        events, progress, received, done_bytes = 0, 0, 0, 0
+        first_event_s: Optional[float] = None
+        connections0 = METRICS.value("seo_http_phase_seconds", phase="connect")
+        t0 = time.perf_counter()
+        with client.stream("GET", f"http://127.0.0.1:{port}/seo/scan/stream", params=params) as r:
+            r.raise_for_status()
+            event = ""
+            for line in r.iter_lines():
+                received += len(line) + 1
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                    events += 1
+                    progress += event == "progress"
+                    if first_event_s is None:
+                        first_event_s = time.perf_counter() - t0
+                elif line.startswith("data:") and event == "done":
+                    done_bytes += len(line) - 5
+                elif not line and event == "done":
+                    break
+            # Octets reçus sur le réseau (flux gzip si le serveur compresse)
+            wire_bytes = r.num_bytes_downloaded
+        return {
+            "wall_s": round(time.perf_counter() - t0, 3),
+            "first_event_s": round(first_event_s or 0.0, 3),
+            "events": events,
+            "progress_events": progress,
+            "bytes": received,
+            "wire_bytes": wire_bytes,
+            "done_bytes": done_bytes,
+            "connections": int(METRICS.value("seo_http_phase_seconds", phase="connect") - connections0),
+        }
+
+    cpu0 = time.process_time()
+    try:
+        with httpx.Client(timeout=None) as client:
+            cold = one_scan(client)
+            # Même scan relancé : le client partagé de l'app garde ses connexions
+            warm = one_scan(client)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+        shutdown_analysis_pool()
+
+    return {
+        **cold,
+        "warm_wall_s": warm["wall_s"],
+        "warm_connections": warm["connections"],
+        "cpu_s": round(time.process_time() - cpu0, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _in_fresh_process(fn, *args) -> Dict[str, Any]:
+    # Workers non-daemon : le crawl peut lui-même démarrer son pool d'analyse
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def measure_parse_cpu(site: FixtureSite, sample: int = PARSE_SAMPLE_PAGES) -> Dict[str, Any]:
+    """
+    CPU de parsing (analyze_html) par page, mesuré hors crawl sur les pages du fixture.
+    """
+    n = max(1, min(sample, site.shape.pages))
+    pages = [(f"{site.url}p/{i}", site.page_html(i)) for i in range(n)]
+    cpu0 = time.process_time()
+    for url, html in pages:
+        analyze_html(url, html)
+    per_page = (time.process_time() - cpu0) / n
+    return {"parse_cpu_ms_per_page": round(per_page * 1000, 3), "parse_sample_pages": n}
+
+
+def run_scenario(
+    name: str,
+    shape: SiteShape,
+    max_pages: int,
+    crawl_opts: Dict[str, Any],
+    sse: bool = True,
+) -> Dict[str, Any]:
+    with FixtureSite(shape) as site:
+        result: Dict[str, Any] = {
+            "name": name,
+            "shape": asdict(shape),
+            "max_pages": max_pages,
+            "crawl_opts": crawl_opts,
+            "parse": measure_parse_cpu(site),
+        }
+        site.requests = site.throttled = 0
+        result["crawl"] = _in_fresh_process(_bench_crawl, site.url, max_pages, crawl_opts)
+        result["crawl"]["server_requests"] = site.requests
+        result["crawl"]["server_throttled"] = site.throttled
+        crawl = result["crawl"]
+        crawl["parse_cpu_s_est"] = round(result["parse"]["parse_cpu_ms_per_page"] * crawl["pages_crawled"] / 1000, 3)
+        result["encode"] = crawl.pop("encode")
+        result["rules"] = measure_rules(crawl["pages_crawled"])
+
+        if sse:
+            stream_issues = max_pages > SSE_MAX_PAGES
+            site.requests = 0
+            result["sse"] = _in_fresh_process(_bench_sse, site.url, max_pages, stream_issues)
+            result["sse"]["stream_issues"] = stream_issues
+            result["sse"]["server_requests"] = site.requests
+    return result
+
+
+# =========================
+# Rapport / comparaison
+# =========================
+# Métriques comparées à la baseline (True = plus grand est meilleur)
+COMPARED = {
+    ("crawl", "pages_per_s"): True,
+    ("crawl", "latency_p50_ms"): False,
+    ("crawl", "latency_p99_ms"): False,
+    ("crawl", "requests_per_connection"): True,
+    ("crawl", "cpu_s"): False,
+    ("crawl", "peak_rss_mb"): False,
+    ("parse", "parse_cpu_ms_per_page"): False,
+    ("sse", "wall_s"): False,
+    ("sse", "first_event_s"): False,
+    ("sse", "warm_wall_s"): False,
+    ("sse", "events"): False,
+    ("sse", "wire_bytes"): False,
+    ("encode", "fast_json_ms"): False,
+    ("rules", "scan_eval_ms"): False,
+}
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Écarts en % par rapport à une baseline (même scénario), "!" si régression > 10 %.
+    """
+    old = {s["name"]: s for s in baseline.get("scenarios", [])}
+    lines = []
+    for s in report["scenarios"]:
+        b = old.get(s["name"])
+        if b is None:
+            continue
+        for (section, key), higher_is_better in COMPARED.items():
+            new_v = s.get(section, {}).get(key)
+            old_v = b.get(section, {}).get(key)
+            if not new_v or not old_v:
+                continue
+            delta = (new_v - old_v) / old_v * 100
+            worse = delta < -10 if higher_is_better else delta > 10
+            lines.append(f"{'!' if worse else ' '} {s['name']:<8} {section}.{key:<24} {old_v:>10} -> {new_v:<10} ({delta:+.1f}%)")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.seo_bench", description="SEO crawler benchmark")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="Repeatable (default: small, hostile)")
+    parser.add_argument("-o", "--out", default="seo-bench.json", help="JSON report path")
+    parser.add_argument("--baseline", help="Previous JSON report to compare with")
+    parser.add_argument("--max-pages", type=int, help="Default: all pages of the site")
+    parser.add_argument("--pages", type=int)
+    parser.add_argument("--fanout", type=int)
+    parser.add_argument("--page-kb", type=float)
+    parser.add_argument("--latency-ms", type=float)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--per-host-limit", type=int, default=8)
+    parser.add_argument("--analysis-workers", type=int, help="0 = inline parsing, default: auto")
+    parser.add_argument("--transport", choices=sorted(TRANSPORT_PROFILES), help="Crawler transport profile")
+    parser.add_argument("--no-sse", action="store_true", help="Skip the SSE endpoint runs")
+    args = parser.parse_args(argv)
+
+    overrides = {
+        k: v for k, v in {
+            "pages": args.pages, "fanout": args.fanout, "page_kb": args.page_kb, "latency_ms": args.latency_ms,
+        }.items() if v is not None
+    }
+    crawl_opts: Dict[str, Any] = {"concurrency": args.concurrency, "per_host_limit": args.per_host_limit}
+    if args.analysis_workers is not None:
+        crawl_opts["analysis_workers"] = args.analysis_workers
+    if args.transport:
+        crawl_opts["transport"] = args.transport
+
+    report: Dict[str, Any] = {
+        "revision": _git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "scenarios": [],
+    }
+    for name in args.scenario or ["small", "hostile"]:
+        shape = replace(SCENARIOS[name], **overrides)
+        max_pages = args.max_pages or shape.pages + 1
+        print(f"[bench] {name}: {shape}", file=sys.stderr)
+        res = run_scenario(name, shape, max_pages, crawl_opts, sse=not args.no_sse)
+        report["scenarios"].append(res)
+        c = res["crawl"]
+        print(
+            f"[bench] {name}: {c['pages_per_s']} pages/s, p50 {c['latency_p50_ms']} ms, "
+            f"p99 {c['latency_p99_ms']} ms, {c['requests_per_connection']} req/conn, rss {c['peak_rss_mb']} MB, "
+            f"parse {res['parse']['parse_cpu_ms_per_page']} ms/page",
+            file=sys.stderr,
+        )
+        e = res["encode"]
+        print(
+            f"[bench] {name}: done payload {e['payload_bytes']} B, json {e['stdlib_json_ms']} ms -> "
+            f"{e['encoder']} {e['fast_json_ms']} ms, gzip {e['gzip_bytes']} B ({e['gzip_ms']} ms)",
+            file=sys.stderr,
+        )
+        ru = res["rules"]
+        print(
+            f"[bench] {name}: {ru['rules']} alert rules / {ru['sites']} sites compiled in {ru['compile_ms']} ms, "
+            f"{ru['rules_per_site']} rules x {ru['pages']} pages evaluated in {ru['scan_eval_ms']} ms",
+            file=sys.stderr,
+        )
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[bench] report written to {args.out}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            for line in compare(report, json.load(f)):
+                print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+# backend/seo_canonical.py
+from __future__ import annotations
+
+import hashlib
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import unquote_plus, urldefrag, urlsplit, urlunsplit
+
+# Paramètres de tracking retirés des URLs (en plus des préfixes ci-dessous)
+DEFAULT_STRIP_PARAMS = frozenset({
+    "gclid", "gbraid", "wbraid", "dclid", "fbclid", "msclkid", "yclid",
+    "igshid", "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi",
+})
+DEFAULT_STRIP_PREFIXES = ("utm_",)
+
+# Fichiers index équivalents au répertoire (clé de dédup uniquement)
+INDEX_FILES = frozenset({
+    "index.html", "index.htm", "index.php", "index.asp", "index.aspx",
+    "default.htm", "default.html", "default.asp", "default.aspx",
+})
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def canonical_netloc(netloc: str, scheme: str = "") -> str:
+    """
+    Host en minuscules, sans point final ni port par défaut.
+    """
+    netloc = (netloc or "").strip().lower()
+    userinfo, at, hostport = netloc.rpartition("@")
+
+    if hostport.startswith("["):
+        # IPv6 : [::1]:8080
+        end = hostport.find("]")
+        host, rest = hostport[: end + 1], hostport[end + 1:]
+        port = rest[1:] if rest.startswith(":") else ""
+    else:
+        host, _, port = hostport.partition(":")
+
+    host = host.rstrip(".")
+    if port == DEFAULT_PORTS.get(scheme.lower()):
+        port = ""
+    return (userinfo + "@" if at else "") + host + (":" + port if port else "")
+
+
+class Canonicalizer:
+    """
+    Normalisation d'URLs pour le crawl.
+
+    - clean(url) : forme "fetchable" (fragment retiré, scheme/host en minuscules,
+      port par défaut retiré, paramètres de tracking retirés, chemin vide -> "/")
+    - key(url)   : clé de dédup, en plus : scheme ignoré (http == https), fichiers
+      index et slash final retirés, paramètres triés
+    """
+
+    def __init__(
+        self,
+        strip_params: Iterable[str] = DEFAULT_STRIP_PARAMS,
+        strip_prefixes: Tuple[str, ...] = DEFAULT_STRIP_PREFIXES,
+        ignore_scheme: bool = True,
+    ):
+        self.strip_params = frozenset(p.lower() for p in strip_params)
+        self.strip_prefixes = tuple(p.lower() for p in strip_prefixes)
+        self.ignore_scheme = ignore_scheme
+
+    def _keep_param(self, pair: str) -> bool:
+        name = unquote_plus(pair.split("=", 1)[0]).lower()
+        return bool(pair) and name not in self.strip_params and not name.startswith(self.strip_prefixes)
+
+    def _split(self, url: str):
+        url, _ = urldefrag((url or "").strip())
+        u = urlsplit(url)
+        scheme = u.scheme.lower()
+        # Pas de ré-encodage : on garde chaque paire "k=v" telle quelle
+        params = [p for p in u.query.split("&") if self._keep_param(p)]
+        return scheme, canonical_netloc(u.netloc, scheme), u.path or "/", params
+
+    def clean(self, url: str) -> str:
+        scheme, netloc, path, params = self._split(url)
+        return urlunsplit((scheme, netloc, path, "&".join(params), ""))
+
+    def key(self, url: str) -> str:
+        scheme, netloc, path, params = self._split(url)
+
+        head, _, last = path.rpartition("/")
+        if last.lower() in INDEX_FILES:
+            path = head + "/"
+        if len(path) > 1 and path.endswith("/"):
+            path = path.rstrip("/") or "/"
+
+        query = "&".join(sorted(params))
+        prefix = "//" if self.ignore_scheme else scheme + "://"
+        return prefix + netloc + path + ("?" + query if query else "")
+
+
+DEFAULT_CANONICALIZER = Canonicalizer()
+
+
+def url_key(url: str) -> str:
+    return DEFAULT_CANONICALIZER.key(url)
+
+
+def clean_url(url: str) -> str:
+    return DEFAULT_CANONICALIZER.clean(url)
+
+
+# =========================
+# Empreinte de contenu (simhash 64 bits)
+# =========================
+SIMHASH_BITS = 64
+# Distance de Hamming max pour considérer deux pages comme quasi-identiques
+NEAR_DUPLICATE_DISTANCE = 3
+# Mots par shingle pour l'empreinte des pages ; au-delà de SHINGLE_SAMPLE_MIN
+# shingles, on n'en garde qu'environ 1 sur SHINGLE_SAMPLE_RATE
+SHINGLE_SIZE = 3
+SHINGLE_SAMPLE_MIN = 256
+SHINGLE_SAMPLE_RATE = 4
+
+# Pour chaque bit : indices (position d'octet * 256 + valeur) des octets où ce bit est à 1
+_BIT_SLOTS: List[List[int]] = [
+    [(bit // 8) * 256 + v for v in range(256) if v >> (bit % 8) & 1] for bit in range(SIMHASH_BITS)
+]
+
+
+@lru_cache(maxsize=65536)
+def _term_digest(term: str) -> bytes:
+    # Hash stable entre process (hash() de Python est salé)
+    return hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest()
+
+
+def simhash(terms: Mapping[str, int]) -> int:
+    """
+    Simhash des termes pondérés par leur fréquence.
+    Les digests (répétés selon le poids) sont histogrammés par position d'octet,
+    puis chaque bit est décidé à partir de l'histogramme : pas de boucle Python
+    de 64 itérations par terme.
+    """
+    if not terms:
+        return 0
+    data = b"".join(_term_digest(t) * w for t, w in terms.items())
+    total = len(data) // 8
+
+    table: List[int] = []
+    for pos in range(8):
+        hist = Counter(data[pos::8])
+        table.extend(hist.get(v, 0) for v in range(256))
+
+    fp = 0
+    for bit, slots in enumerate(_BIT_SLOTS):
+        # Bit à 1 si le poids des termes qui l'ont à 1 dépasse la moitié du total
+        if 2 * sum(map(table.__getitem__, slots)) > total:
+            fp |= 1 << (SIMHASH_BITS - 1 - bit)
+    return fp
+
+
+def shingle_fingerprint(words: Sequence[str], size: int = SHINGLE_SIZE) -> int:
+    """
+    Simhash des shingles de `size` mots consécutifs (casse ignorée) : l'ordre
+    des mots compte, deux pages au vocabulaire proche ne sont pas confondues.
+    Pages longues : seuls les shingles qui commencent par un mot "ancre" (choisi
+    par son hash, donc identique d'une page à sa copie) sont gardés.
+    """
+    words = [w.lower() for w in words]
+    n = len(words) - size + 1
+    if n <= 0:
+        return simhash(Counter(words))
+    starts: Iterable[int] = range(n)
+    if n > SHINGLE_SAMPLE_MIN:
+        starts = [i for i in starts if _term_digest(words[i])[0] % SHINGLE_SAMPLE_RATE == 0]
+    return simhash(Counter(" ".join(words[i:i + size]) for i in starts))
+
+
+class SimhashIndex:
+    """
+    Recherche de quasi-doublons (distance de Hamming <= k) en O(1) par requête :
+    l'empreinte est découpée en k+1 bandes, deux empreintes proches partagent
+    forcément au moins une bande identique.
+    """
+
+    def __init__(self, k: int = NEAR_DUPLICATE_DISTANCE):
+        self.k = k
+        self.bands = k + 1
+        self.width = SIMHASH_BITS // self.bands
+        self._buckets: Dict[Tuple[int, int], List[Tuple[int, str]]] = {}
+
+    def _band_keys(self, fp: int):
+        mask = (1 << self.width) - 1
+        for i in range(self.bands):
+            yield i, (fp >> (i * self.width)) & mask
+
+    def find(self, fp: int) -> Optional[str]:
+        for bk in self._band_keys(fp):
+            for other, url in self._buckets.get(bk, ()):
+                if bin(fp ^ other).count("1") <= self.k:
+                    return url
+        return None
+
+    def add(self, fp: int, url: str) -> None:
+        for bk in self._band_keys(fp):
+            self._buckets.setdefault(bk, []).append((fp, url))
+
+    def entries(self) -> List[Tuple[int, str]]:
+        # Chaque empreinte est présente une fois dans les buckets de la bande 0
+        return [item for (band, _), items in self._buckets.items() if band == 0 for item in items]
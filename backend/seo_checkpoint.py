@@ -0,0 +1,147 @@
+# backend/seo_checkpoint.py
+from __future__ import annotations
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from array import array
+from typing import Any, Dict, Optional
+
+# Checkpoints des crawls en cours : un fichier (JSON gzippé) par scan, réécrit
+# atomiquement, supprimé quand le scan se termine
+CHECKPOINT_DIR = os.getenv("SEO_CHECKPOINT_DIR") or os.path.join(tempfile.gettempdir(), "seo-checkpoints")
+CHECKPOINT_INTERVAL_S = 30.0
+CHECKPOINT_RETENTION_S = 7 * 24 * 3600
+# Au-delà, le checkpoint est ignoré : un scan relancé repart de zéro plutôt que
+# de mélanger des pages crawlées il y a longtemps avec les nouvelles
+CHECKPOINT_MAX_RESUME_AGE_S = float(os.getenv("SEO_CHECKPOINT_MAX_RESUME_AGE_S") or 3600)
+CHECKPOINT_VERSION = 3
+
+
+# =========================
+# Encodage compact des colonnes (tableaux d'entiers -> base64, little-endian)
+# =========================
+def pack_array(values: array) -> str:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def unpack_array(typecode: str, data: str) -> array:
+    values = array(typecode)
+    values.frombytes(base64.b64decode(data))
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def pack_bytes(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def unpack_bytes(data: str) -> bytes:
+    return base64.b64decode(data)
+
+
+class CrawlCheckpoint:
+    """
+    Checkpoint disque d'un crawl : état sérialisé par le crawler (frontier,
+    pages vues, agrégats partiels, avancement de la vérification des liens),
+    sauvé toutes les `interval_s` secondes.
+
+    Écriture atomique (fichier temporaire + os.replace) : un crash pendant la
+    sauvegarde laisse le checkpoint précédent intact. La compression et l'écriture
+    se font dans un thread, la sérialisation JSON dans la boucle (état cohérent).
+    Un checkpoint sauvé il y a plus de `max_resume_age_s` n'est pas repris.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        interval_s: float = CHECKPOINT_INTERVAL_S,
+        max_resume_age_s: float = CHECKPOINT_MAX_RESUME_AGE_S,
+    ):
+        self.path = path
+        self.interval_s = interval_s
+        self.max_resume_age_s = max_resume_age_s
+        self.saves = 0
+        self._last = time.monotonic()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Dernier état sauvé, None si absent, illisible, d'une autre version ou trop ancien.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                state = json.loads(gzip.decompress(f.read()))
+        except (OSError, EOFError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get("version") != CHECKPOINT_VERSION:
+            return None
+        if time.time() - state.get("saved_at", 0) > self.max_resume_age_s:
+            return None
+        return state
+
+    def due(self) -> bool:
+        return time.monotonic() - self._last >= self.interval_s
+
+    async def save(self, state: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._write, self._dumps(state))
+        self._saved()
+
+    def save_now(self, state: Dict[str, Any]) -> None:
+        # Sauvegarde bloquante (scan interrompu) : à lancer dans un thread depuis la boucle
+        self._write(self._dumps(state))
+        self._saved()
+
+    def _dumps(self, state: Dict[str, Any]) -> bytes:
+        state = {**state, "version": CHECKPOINT_VERSION, "saved_at": time.time()}
+        return json.dumps(state, separators=(",", ":")).encode()
+
+    def _saved(self) -> None:
+        self._last = time.monotonic()
+        self.saves += 1
+
+    def _write(self, data: bytes) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(data, compresslevel=5))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def checkpoint_for(key: str, directory: str = CHECKPOINT_DIR, **kwargs) -> CrawlCheckpoint:
+    """
+    Checkpoint associé à une clé de scan (ex. clé de job : URL + paramètres) :
+    le même scan relancé après une coupure reprend au même fichier.
+    """
+    os.makedirs(directory, exist_ok=True)
+    purge_checkpoints(directory)
+    name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+    return CrawlCheckpoint(os.path.join(directory, f"{name}.ckpt.gz"), **kwargs)
+
+
+def purge_checkpoints(directory: str = CHECKPOINT_DIR, retention_s: float = CHECKPOINT_RETENTION_S) -> None:
+    limit = time.time() - retention_s
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < limit:
+                os.remove(path)
+        except OSError:
+            pass
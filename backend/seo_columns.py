@@ -0,0 +1,222 @@
+# backend/seo_columns.py
+from __future__ import annotations
+
+import json
+import sys
+from array import array
+from collections import Counter
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# Pénalité par item (score sur 100) ; surchargeable au scan ou au re-scoring
+DEFAULT_SCORE_WEIGHTS: Dict[str, float] = {
+    "broken_links": 10,
+    "missing_meta": 5,
+    "duplicate_titles": 3,
+    "thin_pages": 2,
+    "missing_h1": 2,
+}
+
+# Libellés du "main issue", dans l'ordre de départage à poids égal
+_ISSUE_LABELS = (
+    ("broken_links", "Broken internal links"),
+    ("missing_meta", "Missing meta descriptions"),
+    ("duplicate_titles", "Duplicate titles"),
+    ("thin_pages", "Thin content pages"),
+    ("missing_h1", "Missing H1"),
+)
+
+NO_MAJOR_ISSUE = "No major issue detected"
+
+
+def resolve_weights(weights: Optional[Mapping[str, float]] = None) -> Dict[str, float]:
+    """
+    Poids par défaut + surcharges. ValueError si un nom de poids est inconnu.
+    """
+    out = dict(DEFAULT_SCORE_WEIGHTS)
+    for name, value in (weights or {}).items():
+        if name not in out:
+            raise ValueError(f"Unknown score weight: {name}")
+        out[name] = float(value)
+    return out
+
+
+def compute_health_score(
+    missing_meta: int,
+    broken_links: int,
+    duplicate_titles_groups: int,
+    thin_pages: int,
+    missing_h1_pages: int,
+    weights: Optional[Mapping[str, float]] = None,
+) -> Tuple[int, str]:
+    w = resolve_weights(weights)
+    items = {
+        "broken_links": broken_links,
+        "missing_meta": missing_meta,
+        "duplicate_titles": duplicate_titles_groups,
+        "thin_pages": thin_pages,
+        "missing_h1": missing_h1_pages,
+    }
+    penalties = [(label, items[name] * w[name]) for name, label in _ISSUE_LABELS]
+    score = max(0, min(100, round(100 - sum(p for _, p in penalties))))
+
+    # Main issue = le plus "grave" en poids total
+    penalties.sort(key=lambda x: x[1], reverse=True)
+    main = penalties[0][0] if penalties[0][1] > 0 else NO_MAJOR_ISSUE
+    return score, main
+
+
+class PageColumns:
+    """
+    Pages analysées d'un scan, en colonnes compactes (une entrée par page) :
+    nb de mots, nb de H1, meta description présente, id du titre (0 = sans titre).
+
+    Pendant le crawl, les agrégats (compteurs, groupes de titres, histogramme
+    des nb de mots) sont tenus à jour à chaque ajout. Seules les colonnes sont
+    sauvegardées : relues (scan stocké, checkpoint), les agrégats sont recalculés
+    par des passes groupées sur les tableaux, puis le re-scoring avec un autre
+    seuil "thin" ne parcourt que l'histogramme.
+    """
+
+    VERSION = 3
+
+    def __init__(self):
+        self.word_count = array("I")
+        self.h1_count = array("I")
+        self.has_meta = bytearray()
+        self.title_id = array("I")
+        # None : colonnes relues du stockage (lecture seule)
+        self._title_ids: Optional[Dict[str, int]] = {"": 0}
+        self._title_counts: Counter = Counter()
+        self._word_hist: Counter = Counter()
+        self.missing_meta = 0
+        self.missing_h1 = 0
+        self.duplicate_titles = 0  # titres (non vides) portés par plus d'une page
+
+    def __len__(self) -> int:
+        return len(self.word_count)
+
+    def add(self, word_count: int, h1_count: int, has_meta: bool, title: str) -> None:
+        if self._title_ids is None:
+            raise ValueError("Stored page columns are read-only")
+        title = (title or "").strip()
+        tid = self._title_ids.get(title)
+        if tid is None:
+            tid = self._title_ids[title] = len(self._title_ids)
+        word_count, h1_count = max(0, int(word_count)), max(0, int(h1_count))
+
+        self.word_count.append(word_count)
+        self.h1_count.append(h1_count)
+        self.has_meta.append(1 if has_meta else 0)
+        self.title_id.append(tid)
+
+        self._word_hist[word_count] += 1
+        self.missing_meta += not has_meta
+        self.missing_h1 += h1_count == 0
+        if tid:
+            self._title_counts[tid] += 1
+            self.duplicate_titles += self._title_counts[tid] == 2
+
+    def _aggregate(self) -> None:
+        # Agrégats recalculés depuis les colonnes (passes en C : count / Counter)
+        self.missing_meta = self.has_meta.count(0)
+        self.missing_h1 = self.h1_count.count(0)
+        self._word_hist = Counter(self.word_count)
+        self._title_counts = Counter(self.title_id)
+        del self._title_counts[0]
+        self.duplicate_titles = sum(1 for n in self._title_counts.values() if n > 1)
+
+    def thin_pages(self, thin_words_threshold: int = 250) -> int:
+        return sum(n for words, n in self._word_hist.items() if words < thin_words_threshold)
+
+    def counts(self, thin_words_threshold: int = 250) -> Dict[str, int]:
+        """
+        Compteurs d'issues "page" pour un seuil donné.
+        """
+        return {
+            "pages": len(self),
+            "missing_meta_descriptions": self.missing_meta,
+            "thin_pages": self.thin_pages(thin_words_threshold),
+            "missing_h1": self.missing_h1,
+            "duplicate_titles": self.duplicate_titles,
+        }
+
+    # Sérialisation : en-tête JSON (1 ligne) + colonnes brutes. `titles` : garde
+    # aussi les titres (reprise d'un scan depuis un checkpoint)
+    def to_bytes(self, titles: bool = False) -> bytes:
+        header = {"version": self.VERSION, "pages": len(self), "byteorder": sys.byteorder}
+        if titles and self._title_ids is not None:
+            header["titles"] = list(self._title_ids)  # ordre d'insertion = ordre des ids
+        return b"".join([
+            json.dumps(header, separators=(",", ":")).encode() + b"\n",
+            self.word_count.tobytes(),
+            self.h1_count.tobytes(),
+            bytes(self.has_meta),
+            self.title_id.tobytes(),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PageColumns":
+        head, _, body = data.partition(b"\n")
+        header = json.loads(head)
+        if header.get("version") != cls.VERSION:
+            raise ValueError("Unsupported page columns version")
+        n = int(header["pages"])
+        cols = cls()
+        size = cols.word_count.itemsize * n
+        offsets = (0, size, 2 * size, 2 * size + n, 3 * size + n)
+        if len(body) != offsets[-1]:
+            raise ValueError("Truncated page columns")
+        cols.word_count.frombytes(body[offsets[0]:offsets[1]])
+        cols.h1_count.frombytes(body[offsets[1]:offsets[2]])
+        cols.has_meta = bytearray(body[offsets[2]:offsets[3]])
+        cols.title_id.frombytes(body[offsets[3]:offsets[4]])
+        if header.get("byteorder") != sys.byteorder:
+            for col in (cols.word_count, cols.h1_count, cols.title_id):
+                col.byteswap()
+        cols._aggregate()
+
+        if "titles" in header:
+            # Colonnes reprises d'un checkpoint : les ajouts continuent
+            cols._title_ids = {title: tid for tid, title in enumerate(header["titles"])}
+        else:
+            # Scan stocké : les titres eux-mêmes ne sont pas gardés, seuls les ids
+            # servent au regroupement ; plus d'ajout possible
+            cols._title_ids = None
+        return cols
+
+
+def score_pages(
+    columns: PageColumns,
+    thin_words_threshold: int = 250,
+    broken_links: int = 0,
+    critical_broken: int = 0,
+    weights: Optional[Mapping[str, float]] = None,
+) -> Dict[str, Any]:
+    """
+    KPIs + score de santé d'un scan à partir des colonnes de pages et des
+    compteurs de liens cassés (`critical_broken` : liens en 4xx/5xx).
+    Même calcul en fin de scan et au re-scoring d'un scan stocké.
+    """
+    c = columns.counts(thin_words_threshold)
+    score, main_issue = compute_health_score(
+        missing_meta=c["missing_meta_descriptions"],
+        broken_links=broken_links,
+        duplicate_titles_groups=c["duplicate_titles"],
+        thin_pages=c["thin_pages"],
+        missing_h1_pages=c["missing_h1"],
+        weights=weights,
+    )
+    worst = max(c["missing_meta_descriptions"], broken_links, c["duplicate_titles"], c["thin_pages"], c["missing_h1"])
+    return {
+        "kpis": {
+            "pages_crawled": c["pages"],
+            "critical_issues": c["missing_meta_descriptions"] + critical_broken,
+            "missing_meta_descriptions": c["missing_meta_descriptions"],
+            "thin_pages": c["thin_pages"],
+        },
+        "health": {
+            "score": score,
+            "main_issue": f"{main_issue} on {worst} item(s)" if main_issue != NO_MAJOR_ISSUE else main_issue,
+        },
+        "counts": {**{k: v for k, v in c.items() if k != "pages"}, "broken_links": broken_links},
+    }
@@ -1,14 +1,48 @@
 # backend/seo_crawler.py
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Set, Tuple, Optional
-from urllib.parse import urlparse, urljoin, urldefrag
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, fields
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Set, Tuple, Optional, Union
+from urllib.parse import urlparse, urljoin
 
+import asyncio
+import codecs
+import multiprocessing
+import os
 import re
+import threading
 import time
 import httpx
 from bs4 import BeautifulSoup
+from lxml import etree
+
+from backend.seo_canonical import (
+    DEFAULT_CANONICALIZER,
+    DEFAULT_STRIP_PARAMS,
+    NEAR_DUPLICATE_DISTANCE,
+    Canonicalizer,
+    SimhashIndex,
+    canonical_netloc,
+    clean_url,
+    shingle_fingerprint,
+)
+from backend.seo_checkpoint import CrawlCheckpoint
+# compute_health_score : défini dans seo_columns, importable ici comme avant
+from backend.seo_columns import compute_health_score, resolve_weights, score_pages
+from backend.seo_frontier import CrawlFrontier
+from backend.seo_graph import LinkGraph
+from backend.seo_linkcheck import LinkChecker, is_broken
+from backend.seo_resolver import HostResolver, PinnedTransport
+from backend.seo_results import ScanResults, SpooledResults, restore_results
+from backend.seo_rules import RuleSet, scan_metrics
+from backend.seo_sitemap import RobotsRules, fetch_robots, iter_sitemap_urls
+from backend.seo_store import ScanStore, content_hasher
+from backend.seo_throttle import MAX_THROTTLE_RETRIES, THROTTLE_STATUSES, HostLimiter
+from backend.seo_trace import ScanTracer
+from backend.seo_transport import TransportProfile, http2_available, no_cookies, release_response, transport_profile
 
 
 def normalize_target_url(raw: str) -> str:
@@ -24,9 +58,8 @@ def normalize_target_url(raw: str) -> str:
     if not u.netloc:
         raise ValueError("URL invalide (netloc manquant)")
 
-    # Remove fragment
-    raw, _ = urldefrag(raw)
-    return raw
+    # Fragment, paramètres de tracking, host en minuscules, port par défaut
+    return clean_url(raw)
 
 
 def is_http_url(href: str) -> bool:
@@ -42,17 +75,25 @@ def is_http_url(href: str) -> bool:
 
 
 def same_host(a: str, b: str) -> bool:
-    return urlparse(a).netloc == urlparse(b).netloc
+    ua, ub = urlparse(a), urlparse(b)
+    return canonical_netloc(ua.netloc, ua.scheme) == canonical_netloc(ub.netloc, ub.scheme)
 
 
-def extract_text_words(soup: BeautifulSoup) -> int:
+WORD_RE = re.compile(r"\b[\wÀ-ÿ'-]+\b")
+META_DESC_NAME_RE = re.compile(r"^description$", re.I)
+
+
+def _text_words(soup: BeautifulSoup) -> List[str]:
     # Enlève scripts/styles
     for tag in soup(["script", "style", "noscript"]):
         tag.extract()
     text = soup.get_text(" ", strip=True)
+    return WORD_RE.findall(text)
+
+
+def extract_text_words(soup: BeautifulSoup) -> int:
     # Word count simple
-    words = re.findall(r"\b[\wÀ-ÿ'-]+\b", text)
-    return len(words)
+    return len(_text_words(soup))
 
 
 @dataclass
@@ -63,266 +104,1173 @@ class PageAnalysis:
     h1_count: int
     word_count: int
     internal_links: List[str]
+    # <link rel="canonical"> (absolu, vide si absent) et simhash du texte (0 = inconnu)
+    canonical: str = ""
+    fingerprint: int = 0
+
+
+# Texte ignoré dans le word count : scripts/styles (cf. extract_text_words)
+# + conteneurs que BeautifulSoup exclut déjà de get_text()
+SKIP_TEXT_TAGS = frozenset({"script", "style", "noscript", "template", "rt", "rp"})
+
+
+def _internal_links(page_url: str, hrefs: List[str]) -> List[str]:
+    links = []
+    for href in hrefs:
+        # Fragment + paramètres de tracking retirés (cf. seo_canonical)
+        links.append(clean_url(urljoin(page_url, href.strip())))
+
+    # Garde uniquement internes
+    internal_links = [u for u in links if same_host(u, page_url)]
+    # Dédupe en gardant l'ordre
+    seen = set()
+    uniq = []
+    for u in internal_links:
+        if u not in seen:
+            uniq.append(u)
+            seen.add(u)
+    return uniq
+
+
+class _PageCollector:
+    """
+    Target pour le parser lxml : collecte title, meta description, nb de H1,
+    mots, lien canonical et liens en une seule passe, sans construire d'arbre.
+    """
+
+    def __init__(self):
+        self.title_parts: List[str] = []
+        self.meta_description: Optional[str] = None
+        self.h1_count = 0
+        self.words: List[str] = []
+        self.canonical: Optional[str] = None
+        self.hrefs: List[str] = []
+        self._title_seen = False
+        self._in_title = False
+        self._skip = 0
+        self._buf: List[str] = []
+
+    def _flush(self):
+        # Un "noeud texte" = tout le texte entre deux events de balise
+        if not self._buf:
+            return
+        text = "".join(self._buf).strip()
+        self._buf = []
+        if not text:
+            return
+        if self._in_title:
+            self.title_parts.append(text)
+        if not self._skip:
+            self.words.extend(WORD_RE.findall(text))
+
+    def start(self, tag, attrib):
+        self._flush()
+        if tag in SKIP_TEXT_TAGS:
+            self._skip += 1
+        elif tag == "title" and not self._title_seen:
+            self._title_seen = self._in_title = True
+        elif tag == "h1":
+            self.h1_count += 1
+        elif tag == "meta" and self.meta_description is None:
+            name = attrib.get("name")
+            if name and META_DESC_NAME_RE.search(name):
+                self.meta_description = (attrib.get("content") or "").strip()
+        elif tag == "a":
+            href = attrib.get("href")
+            if href and is_http_url(href):
+                self.hrefs.append(href)
+        elif tag == "link" and self.canonical is None:
+            if "canonical" in (attrib.get("rel") or "").lower().split() and attrib.get("href"):
+                self.canonical = attrib.get("href")
+
+    def end(self, tag):
+        self._flush()
+        if tag in SKIP_TEXT_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag == "title":
+            self._in_title = False
+
+    def data(self, data):
+        self._buf.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def pi(self, target, data=None):
+        self._flush()
+
+    def doctype(self, *args):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return self
+
+
+def _canonical_url(page_url: str, href: Optional[str]) -> str:
+    href = (href or "").strip()
+    return clean_url(urljoin(page_url, href)) if href and is_http_url(href) else ""
+
+
+class PageParser:
+    """
+    Analyse incrémentale : le HTML est passé par morceaux (`feed`) au fil du
+    téléchargement, `close()` retourne le PageAnalysis. `parse_s` cumule le
+    temps passé dans le parser.
+    """
+
+    def __init__(self, page_url: str):
+        self.page_url = page_url
+        self.parse_s = 0.0
+        self._collector = _PageCollector()
+        self._parser = etree.HTMLParser(target=self._collector, recover=True)
+        self._fed = False
+
+    def feed(self, html: str) -> None:
+        if not html:
+            return
+        t0 = time.perf_counter()
+        self._parser.feed(html)
+        self._fed = True
+        self.parse_s += time.perf_counter() - t0
+
+    def close(self) -> PageAnalysis:
+        t0 = time.perf_counter()
+        if not self._fed:
+            self._parser.feed(" ")
+        self._parser.close()
+        collector, page_url = self._collector, self.page_url
+        analysis = PageAnalysis(
+            url=page_url,
+            title="".join(collector.title_parts).strip(),
+            meta_description=collector.meta_description or "",
+            h1_count=collector.h1_count,
+            word_count=len(collector.words),
+            internal_links=_internal_links(page_url, collector.hrefs),
+            canonical=_canonical_url(page_url, collector.canonical),
+            fingerprint=shingle_fingerprint(collector.words),
+        )
+        self.parse_s += time.perf_counter() - t0
+        return analysis
 
 
 def analyze_html(page_url: str, html: str) -> PageAnalysis:
+    """
+    Analyse en streaming (events lxml) : un seul passage sur le HTML.
+    Même résultat que `analyze_html_soup`, sans le coût de l'arbre BeautifulSoup.
+    """
+    parser = PageParser(page_url)
+    parser.feed(html)
+    return parser.close()
+
+
+def analyze_html_soup(page_url: str, html: str) -> PageAnalysis:
+    """
+    Implémentation de référence (BeautifulSoup), gardée pour comparer.
+    """
     soup = BeautifulSoup(html, "lxml")
 
     title = (soup.title.get_text(strip=True) if soup.title else "").strip()
 
     meta_desc = ""
-    md = soup.find("meta", attrs={"name": re.compile(r"^description$", re.I)})
+    md = soup.find("meta", attrs={"name": META_DESC_NAME_RE})
     if md and md.get("content"):
         meta_desc = str(md.get("content")).strip()
 
     h1_count = len(soup.find_all("h1"))
-    word_count = extract_text_words(soup)
 
-    links = []
+    canonical = None
+    for link in soup.find_all("link", href=True):
+        if "canonical" in [r.lower() for r in (link.get("rel") or [])]:
+            canonical = str(link.get("href"))
+            break
+
+    words = _text_words(soup)
+
+    hrefs = []
     for a in soup.find_all("a"):
         href = a.get("href")
         if not href or not is_http_url(href):
             continue
-
-        abs_url = urljoin(page_url, href)
-        abs_url, _ = urldefrag(abs_url)
-
-        # Normalisation légère
-        abs_url = abs_url.strip()
-
-        links.append(abs_url)
-
-    # Garde uniquement internes
-    internal_links = [u for u in links if same_host(u, page_url)]
-    # Dédupe en gardant l'ordre
-    seen = set()
-    uniq = []
-    for u in internal_links:
-        if u not in seen:
-            uniq.append(u)
-            seen.add(u)
+        hrefs.append(href)
 
     return PageAnalysis(
         url=page_url,
         title=title,
         meta_description=meta_desc,
         h1_count=h1_count,
-        word_count=word_count,
-        internal_links=uniq,
+        word_count=len(words),
+        internal_links=_internal_links(page_url, hrefs),
+        canonical=_canonical_url(page_url, canonical),
+        fingerprint=shingle_fingerprint(words),
     )
 
 
-def compute_health_score(
-    missing_meta: int,
-    broken_links: int,
-    duplicate_titles_groups: int,
-    thin_pages: int,
-    missing_h1_pages: int,
-) -> Tuple[int, str]:
-    # Score simple mais cohérent (tu ajusteras après)
-    score = 100
-    score -= missing_meta * 5
-    score -= broken_links * 10
-    score -= duplicate_titles_groups * 3
-    score -= thin_pages * 2
-    score -= missing_h1_pages * 2
-
-    score = max(0, min(100, score))
-
-    # Main issue = le plus "grave" en poids total
-    candidates = [
-        ("Broken internal links", broken_links * 10),
-        ("Missing meta descriptions", missing_meta * 5),
-        ("Duplicate titles", duplicate_titles_groups * 3),
-        ("Thin content pages", thin_pages * 2),
-        ("Missing H1", missing_h1_pages * 2),
-    ]
-    candidates.sort(key=lambda x: x[1], reverse=True)
-    main = candidates[0][0] if candidates and candidates[0][1] > 0 else "No major issue detected"
-    return score, main
+# =========================
+# Crawl concurrent (asyncio)
+# =========================
+DEFAULT_HEADERS = {
+    "User-Agent": "MarketingCommandCenterBot/0.1 (SEO Scan; local dev)",
+    "Accept": "text/html,application/xhtml+xml",
+}
 
+# Intervalle du ping keepalive quand aucun autre event n'est émis
+PING_INTERVAL_S = 10.0
 
-def run_seo_scan_real(
+# Seeds sitemap : priorité des pages de profondeur 1, au plus max_pages * facteur URLs lues
+SITEMAP_PRIORITY = 1
+SITEMAP_SEED_FACTOR = 4
+
+# Ordre de crawl : "depth" (BFS) ou "pagerank" (PageRank du graphe partiel,
+# recalculé après PAGERANK_REFRESH_PAGES pages puis tous les x GROWTH pages)
+CRAWL_ORDERS = ("depth", "pagerank")
+PAGERANK_REFRESH_PAGES = 50
+PAGERANK_REFRESH_GROWTH = 1.5
+# L'ordre suffit : convergence moins poussée que pour le rapport final
+PAGERANK_REFRESH_TOL = 1e-4
+# Calcul dans un thread, mais les grosses passes C (tri du CSR...) gardent le GIL :
+# au-delà de ce nombre d'arêtes, l'ordre n'est plus recalculé pendant le crawl
+PAGERANK_REFRESH_MAX_EDGES = 200_000
+
+# Corps HTML lu par chunks ; au-delà du budget par page, la suite n'est pas
+# téléchargée et l'analyse porte sur le début de la page
+MAX_HTML_BYTES = 5 * 1024 * 1024
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# En dessous de ce nombre de mots, l'empreinte n'est pas assez fiable pour
+# déclarer deux pages quasi-identiques (pages vides, erreurs "soft 404"...)
+NEAR_DUPLICATE_MIN_WORDS = 50
+
+
+def make_client(
+    timeout_s: float = 12.0,
+    max_connections: Optional[int] = None,
+    resolver: Optional[HostResolver] = None,
+    event_hooks: Optional[Dict[str, List]] = None,
+    transport: Union[str, TransportProfile, None] = None,
+) -> httpx.AsyncClient:
+    """
+    Client httpx du crawler : redirections suivies, validation SSRF + IP épinglée
+    (PinnedTransport). `transport` : profil (seo_transport) ou nom de profil ;
+    `max_connections` (par host) le surcharge. `event_hooks` : hooks httpx
+    ("request" / "response", coroutines) pour mesurer les requêtes.
+    HTTP/2 n'est activé que si le profil le demande et que h2 est installé.
+    """
+    profile = transport_profile(transport, max_connections=max_connections)
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=httpx.Timeout(timeout_s),
+        headers=DEFAULT_HEADERS,
+        cookies=None if profile.cookies else no_cookies(),
+        transport=PinnedTransport(
+            resolver,
+            max_hosts=profile.max_hosts,
+            limits=profile.limits(),
+            http2=profile.http2 and http2_available(),
+        ),
+        event_hooks=event_hooks,
+    )
+
+
+@asynccontextmanager
+async def _scan_client(client: Optional[httpx.AsyncClient], **client_opts):
+    # Client partagé (batch) : fermé par son propriétaire, pas par le scan
+    if client is not None:
+        yield client
+        return
+    async with make_client(**client_opts) as own:
+        yield own
+
+
+# =========================
+# Analyse HTML (inline ou pool de process)
+# =========================
+# En dessous de ce nombre de pages, le démarrage d'un pool ne vaut pas le coup
+INLINE_ANALYSIS_MAX_PAGES = 40
+ANALYSIS_POOL_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+_shared_pool: Optional[ProcessPoolExecutor] = None
+_shared_pool_lock = threading.Lock()
+
+# Erreurs de fetch (réseau, TLS, timeout, host bloqué, URL invalide) : la page
+# est comptée comme cassée. Une erreur d'analyse ne l'est pas (AnalysisError)
+FETCH_ERRORS = (httpx.HTTPError, httpx.InvalidURL)
+
+
+class AnalysisError(Exception):
+    """
+    Échec de l'analyse HTML d'une page récupérée (pas un lien cassé du site).
+    """
+
+
+def _decoder(encoding: Optional[str]) -> codecs.IncrementalDecoder:
+    # Charset inconnu annoncé par le serveur : utf-8 (avec remplacement)
+    try:
+        return codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def _analyze_bytes(page_url: str, body: bytes, encoding: Optional[str]) -> Tuple[PageAnalysis, float]:
+    # Exécuté dans un worker : décodage + parsing hors de la boucle asyncio.
+    # Retourne aussi la durée du parsing (mesurée dans le worker)
+    t0 = time.perf_counter()
+    analysis = analyze_html(page_url, _decoder(encoding).decode(body, final=True))
+    return analysis, time.perf_counter() - t0
+
+
+def shared_analysis_pool() -> ProcessPoolExecutor:
+    """
+    Pool de process partagé par tous les scans (démarré une seule fois).
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ProcessPoolExecutor(
+                max_workers=ANALYSIS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _shared_pool
+
+
+def discard_analysis_pool(pool: Executor) -> None:
+    """
+    Pool cassé (worker tué, OOM) : retiré s'il est partagé, le prochain scan
+    en démarre un neuf.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is pool:
+            _shared_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_analysis_pool() -> None:
+    """
+    Arrête le pool partagé (arrêt de l'app, fin de process). Un process lancé par
+    multiprocessing sort sans les hooks atexit de threading : sans cet arrêt
+    explicite, il attendrait indéfiniment les workers du pool.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        pool, _shared_pool = _shared_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class AnalysisStage:
+    """
+    Étape d'analyse HTML branchée entre le fetch et les collecteurs.
+
+    - avec un executor : le HTML brut (bytes) part dans un worker, seul le
+      PageAnalysis revient -> le parsing n'occupe plus la boucle (ni le GIL)
+    - sans executor : parsing inline (petits scans), incrémental pendant le
+      téléchargement (`parser()` / `finish()`)
+    - backpressure : au plus `max_pending` pages en attente d'analyse ;
+      au-delà, les fetchers attendent au lieu d'accumuler du HTML en mémoire
+    - `tracer` (optionnel) : durée de parsing, octets et attente par page
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_pending: int = 8):
+        self.executor = executor
+        self.tracer: Optional[ScanTracer] = None
+        self.backlog = 0  # pages en attente ou en cours d'analyse
+        self._sem = asyncio.Semaphore(max(1, int(max_pending)))
+
+    @classmethod
+    def for_scan(cls, max_pages: int, workers: Optional[int] = None) -> "AnalysisStage":
+        """
+        workers=None : auto (pool partagé si le scan est assez gros), 0 : inline.
+        """
+        if workers == 0 or (workers is None and max_pages < INLINE_ANALYSIS_MAX_PAGES):
+            return cls(executor=None)
+        if workers is None:
+            return cls(executor=shared_analysis_pool(), max_pending=ANALYSIS_POOL_WORKERS * 2)
+        return cls(executor=ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+        ), max_pending=workers * 2)
+
+    async def analyze(self, page_url: str, body: bytes, encoding: Optional[str]) -> PageAnalysis:
+        t0 = time.perf_counter()
+        self.backlog += 1
+        try:
+            async with self._sem:
+                analysis, parse_s = await self._run(page_url, body, encoding)
+        except Exception as e:
+            raise AnalysisError(f"HTML analysis failed: {e}") from e
+        finally:
+            self.backlog -= 1
+        if self.tracer is not None:
+            # Attente = backpressure + file du pool + aller-retour du worker
+            self.tracer.parsed(len(body), parse_s, max(0.0, time.perf_counter() - t0 - parse_s))
+        return analysis
+
+    async def _run(self, page_url: str, body: bytes, encoding: Optional[str]) -> Tuple[PageAnalysis, float]:
+        executor = self.executor
+        if executor is not None:
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(executor, _analyze_bytes, page_url, body, encoding)
+            except BrokenProcessPool:
+                # Worker mort : pool jeté, la suite du scan est analysée inline
+                discard_analysis_pool(executor)
+                if self.executor is executor:
+                    self.executor = None
+        return _analyze_bytes(page_url, body, encoding)
+
+    def parser(self, page_url: str) -> Optional[PageParser]:
+        """
+        Parser incrémental à alimenter pendant le téléchargement (mode inline),
+        None si l'analyse passe par le pool (le corps complet y est envoyé).
+        """
+        return PageParser(page_url) if self.executor is None else None
+
+    def finish(self, parser: PageParser, nbytes: int) -> PageAnalysis:
+        try:
+            analysis = parser.close()
+        except Exception as e:
+            raise AnalysisError(f"HTML analysis failed: {e}") from e
+        if self.tracer is not None:
+            self.tracer.parsed(nbytes, parser.parse_s, 0.0)
+        return analysis
+
+    def close(self) -> None:
+        # Le pool partagé reste vivant pour les scans suivants
+        if self.executor is not None and self.executor is not _shared_pool:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _feed(parser: PageParser, text: str) -> None:
+    try:
+        parser.feed(text)
+    except Exception as e:
+        raise AnalysisError(f"HTML analysis failed: {e}") from e
+
+
+async def _read_html(
+    r: httpx.Response, parser: Optional[PageParser], max_bytes: int
+) -> Tuple[bytes, int, str, bool]:
+    """
+    Lit le corps HTML par chunks, au plus `max_bytes` (décompressés).
+    Avec un parser, le texte décodé lui est passé au fil de l'eau et le corps
+    n'est pas gardé. Retourne (body, taille lue, hash, tronqué).
+    """
+    hasher = content_hasher()
+    decoder = _decoder(r.encoding) if parser is not None else None
+    chunks: List[bytes] = []
+    size = 0
+    truncated = False
+    async for chunk in r.aiter_bytes(STREAM_CHUNK_BYTES):
+        if size + len(chunk) > max_bytes:
+            chunk = chunk[: max_bytes - size]
+            truncated = True
+        size += len(chunk)
+        hasher.update(chunk)
+        if decoder is not None:
+            _feed(parser, decoder.decode(chunk))
+        else:
+            chunks.append(chunk)
+        if truncated:
+            # La suite n'est pas téléchargée : la connexion est fermée avec la réponse
+            break
+    if decoder is not None:
+        _feed(parser, decoder.decode(b"", final=True))
+    return b"".join(chunks), size, hasher.hexdigest(), truncated
+
+
+def _is_html(r: httpx.Response) -> bool:
+    return "text/html" in r.headers.get("content-type", "")
+
+
+async def _fetch(
+    client: httpx.AsyncClient,
+    limiter: HostLimiter,
+    stage: AnalysisStage,
+    store: Optional[ScanStore],
+    url: str,
+    tracer: ScanTracer,
+    max_html_bytes: int = MAX_HTML_BYTES,
+) -> Tuple[httpx.Response, Optional[PageAnalysis], bool, bool]:
+    """
+    Fetch + analyse d'une page. Retourne (response, analysis, reused, truncated) ;
+    reused=True si l'analyse vient du store (304 ou contenu inchangé),
+    truncated=True si le HTML dépassait `max_html_bytes`.
+    La réponse est lue en streaming : statut et content-type sont vérifiés avant
+    de lire le corps (jamais téléchargé pour une erreur ou un fichier non HTML).
+    Page déjà en store : le corps est gardé (borné par `max_html_bytes`) et
+    n'est analysé que si son hash a changé.
+    """
+    # SQLite hors de la boucle d'événements (lecture / écriture à chaque page)
+    cached = await asyncio.to_thread(store.get, url) if store is not None else None
+    parser = stage.parser(url) if cached is None else None
+
+    async with limiter.slot(url) as slot:
+        rt = tracer.request("page")
+        status = "error"
+        try:
+            request = client.build_request(
+                "GET", url, headers=ScanStore.conditional_headers(cached), extensions=rt.extensions
+            )
+            r = await client.send(request, stream=True)
+            try:
+                status = r.status_code
+                # Latence / back-pressure du host : débit adapté par le limiter
+                slot.record(status, r.headers.get("retry-after"))
+                if status == 304 and cached is not None:
+                    await release_response(r)
+                    await asyncio.to_thread(store.touch, url)
+                    return r, PageAnalysis(**cached.analysis), True, False
+
+                # Analyse uniquement les pages HTML accessibles
+                if status >= 400 or not _is_html(r):
+                    await release_response(r)
+                    return r, None, False, False
+
+                body, size, digest, truncated = await _read_html(r, parser, max_html_bytes)
+            finally:
+                await r.aclose()
+        finally:
+            rt.finish(status)
+
+    if cached is not None and cached.content_hash == digest:
+        analysis, reused = PageAnalysis(**cached.analysis), True
+    elif parser is not None:
+        analysis, reused = stage.finish(parser, size), False
+    else:
+        analysis, reused = await stage.analyze(url, body, r.encoding), False
+
+    if store is not None:
+        await asyncio.to_thread(
+            store.put,
+            url,
+            digest,
+            asdict(analysis),
+            etag=r.headers.get("etag"),
+            last_modified=r.headers.get("last-modified"),
+        )
+    return r, analysis, reused, truncated
+
+
+@dataclass(frozen=True)
+class ScanOptions:
+    """
+    Fonctions optionnelles d'un scan (cf. run_seo_scan_async).
+    """
+
+    # "pagerank" : frontier re-triée au fil du crawl par PageRank du graphe partiel (seo_graph)
+    crawl_order: str = "depth"
+    # Débit par host adapté à la latence (seo_throttle, AIMD) ; 429 / 503 refaits, pas cassés
+    adaptive_throttle: bool = True
+    # État du crawl sauvé périodiquement, repris par un scan identique (seo_checkpoint, meta.resumed)
+    checkpoint: Optional[CrawlCheckpoint] = None
+    # Règles d'alerte évaluées au fil du crawl : events "alert" + payload "alerts" (seo_rules)
+    rules: Optional[RuleSet] = None
+    # Détail des timings dans le payload (seo_trace) ; `profile` : profil cProfile (analyse inline)
+    trace: bool = False
+    profile: bool = False
+
+
+SCAN_OPTION_NAMES = frozenset(f.name for f in fields(ScanOptions))
+
+
+def split_scan_options(params: Mapping[str, Any], **extra) -> Tuple[ScanOptions, Dict[str, Any]]:
+    """
+    Paramètres "à plat" (API, job, CLI) -> (ScanOptions, autres paramètres du scan).
+    """
+    opts = {k: v for k, v in params.items() if k in SCAN_OPTION_NAMES}
+    rest = {k: v for k, v in params.items() if k not in SCAN_OPTION_NAMES}
+    return ScanOptions(**opts, **extra), rest
+
+
+async def run_seo_scan_async(
     raw_url: str,
     max_pages: int = 25,
     timeout_s: float = 12.0,
     thin_words_threshold: int = 250,
-):
+    concurrency: int = 8,
+    per_host_limit: int = 4,
+    polite_delay_s: float = 0.0,
+    max_depth: Optional[int] = None,
+    max_link_checks: Optional[int] = None,
+    analysis_workers: Optional[int] = None,
+    store: Optional[ScanStore] = None,
+    resolver: Optional[HostResolver] = None,
+    use_sitemaps: bool = True,
+    respect_robots: bool = True,
+    strip_params: Optional[Iterable[str]] = None,
+    near_duplicate_distance: Optional[int] = NEAR_DUPLICATE_DISTANCE,
+    client: Optional[httpx.AsyncClient] = None,
+    stream_issues: bool = False,
+    event_hooks: Optional[Dict[str, List]] = None,
+    max_html_bytes: int = MAX_HTML_BYTES,
+    transport: Union[str, TransportProfile, None] = None,
+    score_weights: Optional[Mapping[str, float]] = None,
+    options: Optional[ScanOptions] = None,
+) -> AsyncIterator[Tuple[str, Dict]]:
     """
-    Générateur (yield) d'events de progression + retourne un payload final (done).
+    Crawl asyncio d'un site : yield des events "progress" / "issue" / "alert" / "ping",
+    puis "done" avec le payload (KPIs, score, issues, link_graph, meta).
     """
-    target = normalize_target_url(raw_url)
+    options = options or ScanOptions()
+    crawl_order, checkpoint, rules = options.crawl_order, options.checkpoint, options.rules
+    adaptive_throttle, trace, profile = options.adaptive_throttle, options.trace, options.profile
+    if crawl_order not in CRAWL_ORDERS:
+        raise ValueError(f"Unknown crawl order: {crawl_order}")
+    weights = resolve_weights(score_weights)
+    canon = DEFAULT_CANONICALIZER
+    if strip_params:
+        canon = Canonicalizer(strip_params=DEFAULT_STRIP_PARAMS | frozenset(strip_params))
+    target = canon.clean(normalize_target_url(raw_url))
     host = urlparse(target).netloc
+    concurrency = max(1, int(concurrency))
 
-    # Collecteurs
-    crawled: List[PageAnalysis] = []
-    visited: Set[str] = set()
-    queue: List[str] = [target]
-
-    # Issues détaillées
-    missing_meta_pages: List[Dict] = []
-    missing_h1_pages: List[Dict] = []
-    thin_pages: List[Dict] = []
-    broken_links_items: List[Dict] = []
-    titles_map: Dict[str, List[str]] = {}
-
-    # HTTP client
-    headers = {
-        "User-Agent": "MarketingCommandCenterBot/0.1 (SEO Scan; local dev)",
-        "Accept": "text/html,application/xhtml+xml",
+    # Paramètres qui déterminent le résultat : un checkpoint n'est repris que s'ils sont identiques
+    scan_params = {
+        "target": target,
+        "max_pages": max_pages,
+        "max_depth": max_depth,
+        "thin_words_threshold": thin_words_threshold,
+        "max_link_checks": max_link_checks,
+        "use_sitemaps": use_sitemaps,
+        "respect_robots": respect_robots,
+        "strip_params": sorted(strip_params or ()),
+        "near_duplicate_distance": near_duplicate_distance,
+        "stream_issues": stream_issues,
+        "crawl_order": crawl_order,
     }
+    resume = checkpoint.load() if checkpoint is not None else None
+    if resume is not None and resume.get("params") != scan_params:
+        resume = None
+
+    # Collecteurs : issues, titres et graphe de liens (en mémoire ou sur disque)
+    results = restore_results(resume["results"]) if resume is not None else None
+    if results is None:
+        # Fichier du scan spoolé purgé entre-temps : on repart de zéro
+        resume = None
+        results = SpooledResults() if stream_issues else ScanResults()
+    fetched = 0
+    reused_pages = 0
+    truncated_pages = 0
+    requeued = 0
+    analysis_errors = 0
+    sitemap_seeded = 0
+    robots_skipped = 0
+    robots = RobotsRules()
+    frontier = CrawlFrontier(max_depth=max_depth, key_fn=canon.key)
+    frontier.push(target, depth=0)
+
+    # Graphe des liens internes ; PageRank partiel pour l'ordre "pagerank"
+    graph = LinkGraph(key_fn=canon.key)
+    redirect_chains: List[Dict] = []
+    ranks: Optional[List[float]] = None
+    next_rank_refresh = PAGERANK_REFRESH_PAGES if crawl_order == "pagerank" else None
+
+    def link_priority(url: str) -> Optional[int]:
+        # None : priorité = profondeur (BFS)
+        return graph.priority(url, ranks) if ranks is not None else None
+
+    # Doublons : clé canonique -> URL analysée, index simhash des pages analysées
+    analyzed_keys: Dict[str, str] = {}
+    deferred: Set[str] = set()
+    fingerprints = SimhashIndex(near_duplicate_distance) if near_duplicate_distance is not None else None
+
+    # Règles d'alerte compilées pour ce host (aucune règle : évaluation à vide)
+    alerting = (rules if rules is not None else RuleSet()).evaluator(host)
+
+    # Reprise : l'état sauvé remplace l'état initial
+    elapsed_before = 0.0
+    if resume is not None:
+        counters = resume["counters"]
+        fetched = counters["fetched"]
+        reused_pages = counters["reused_pages"]
+        truncated_pages = counters["truncated_pages"]
+        requeued = counters.get("requeued", 0)
+        analysis_errors = counters.get("analysis_errors", 0)
+        sitemap_seeded = counters["sitemap_seeded"]
+        robots_skipped = counters["robots_skipped"]
+        frontier = CrawlFrontier.from_state(resume["frontier"], max_depth=max_depth, key_fn=canon.key)
+        graph = LinkGraph.from_state(resume["graph"], key_fn=canon.key)
+        redirect_chains = resume["redirect_chains"]
+        next_rank_refresh = resume["next_rank_refresh"]
+        analyzed_keys = resume["analyzed_keys"]
+        deferred = set(resume["deferred"])
+        if fingerprints is not None:
+            for fp, url in resume["fingerprints"]:
+                fingerprints.add(fp, url)
+        elapsed_before = resume["elapsed_s"]
+        alerting.restore(resume.get("alerts", {}))
+
+    # Étape en cours, pour le checkpoint ("crawl" / "link_check", None = rien à reprendre)
+    phase: Optional[str] = None
+
+    def checkpoint_state() -> Dict[str, Any]:
+        return {
+            "params": scan_params,
+            "phase": phase,
+            "elapsed_s": elapsed_before + time.time() - start_ts,
+            "counters": {
+                "fetched": fetched,
+                "reused_pages": reused_pages,
+                "truncated_pages": truncated_pages,
+                "requeued": requeued,
+                "analysis_errors": analysis_errors,
+                "sitemap_seeded": sitemap_seeded,
+                "robots_skipped": robots_skipped,
+            },
+            # Requêtes en vol : pas encore traitées, refaites à la reprise
+            "frontier": frontier.state(requeue=pending.values() if phase == "crawl" else ()),
+            "results": results.state(),
+            "links_checked": checker.state(),
+            "graph": graph.state(),
+            "redirect_chains": redirect_chains,
+            "next_rank_refresh": next_rank_refresh,
+            "analyzed_keys": analyzed_keys,
+            "deferred": list(deferred),
+            "fingerprints": fingerprints.entries() if fingerprints is not None else [],
+            "alerts": alerting.state(),
+        }
 
     yield ("progress", {"progress": 5, "label": "Starting scan"})
     start_ts = time.time()
 
-    with httpx.Client(
-        follow_redirects=True,
-        timeout=httpx.Timeout(timeout_s),
-        headers=headers,
-    ) as client:
+    tracer = ScanTracer()
+    # Un worker du pool échappe au profiler : parsing inline pour le voir
+    if profile and tracer.start_profile():
+        analysis_workers = 0
 
-        # Petit ping régulier utile pour éviter “silence” (UX + timeouts)
-        last_ping = time.time()
+    limiter = HostLimiter(per_host=per_host_limit, delay_s=polite_delay_s, adaptive=adaptive_throttle)
+    # Essais par URL après un 429 / 503
+    throttle_retries: Dict[str, int] = {}
+    stage = AnalysisStage.for_scan(max_pages, workers=analysis_workers)
+    stage.tracer = tracer
 
-        def maybe_ping():
-            nonlocal last_ping
-            if time.time() - last_ping > 10:
-                last_ping = time.time()
-                # event "ping" optionnel (le front peut l'ignorer)
-                yield ("ping", {"ts": time.time()})
+    # Requêtes en vol : task -> (url, depth)
+    pending: Dict[asyncio.Task, Tuple[str, int, int]] = {}
 
-        yield ("progress", {"progress": 10, "label": "Fetching & crawling pages"})
+    async with _scan_client(
+        client,
+        timeout_s=timeout_s,
+        max_connections=None if transport is not None else concurrency,
+        resolver=resolver,
+        event_hooks=event_hooks,
+        transport=transport,
+    ) as client:
+        checker = LinkChecker(client, limiter, concurrency=concurrency, tracer=tracer, key_fn=canon.key)
+        if resume is not None:
+            checker.restore(resume["links_checked"])
+        try:
+            # robots.txt + sitemaps : règles, crawl-delay et seeds de la frontier
+            # (reprise : robots.txt relu, les seeds sont déjà dans la frontier)
+            if respect_robots or (use_sitemaps and resume is None):
+                yield ("progress", {"progress": 7, "label": "Reading robots.txt & sitemaps"})
+                tracer.begin("robots")
+                robots = await fetch_robots(client, target, DEFAULT_HEADERS["User-Agent"], limiter=limiter)
+                if not respect_robots:
+                    robots = RobotsRules(sitemaps=robots.sitemaps)
+                if robots.crawl_delay:
+                    limiter.delay_s = max(limiter.delay_s, robots.crawl_delay)
 
-        while queue and len(visited) < max_pages:
-            current = queue.pop(0)
-            if current in visited:
-                continue
+                if use_sitemaps and resume is None:
+                    sitemaps = robots.sitemaps or [urljoin(target, "/sitemap.xml")]
+                    seeds = iter_sitemap_urls(
+                        client, sitemaps, max_urls=max_pages * SITEMAP_SEED_FACTOR, limiter=limiter
+                    )
+                    async for loc in seeds:
+                        if not same_host(loc, target):
+                            continue
+                        graph.mark_sitemap(canon.clean(loc))
+                        if not robots.can_fetch(loc):
+                            robots_skipped += 1
+                            continue
+                        sitemap_seeded += frontier.push(canon.clean(loc), depth=1, priority=SITEMAP_PRIORITY)
+                tracer.end("robots")
 
-            # Ping
-            for ev in maybe_ping() or []:
-                yield ev
+            if resume is not None:
+                label = f"Resuming scan from checkpoint ({fetched}/{max_pages})"
+            else:
+                label = "Fetching & crawling pages"
+            yield ("progress", {"progress": 10, "label": label})
+            tracer.begin("crawl")
+            # Reprise en phase "link_check" : crawl déjà terminé, la boucle sort aussitôt
+            phase = "crawl"
 
-            try:
-                r = client.get(current)
-                status = r.status_code
-                if status >= 400:
-                    # On note la page comme "broken" (page elle-même inaccessible)
-                    broken_links_items.append({"from": None, "to": current, "status": status})
-                    visited.add(current)
+            while frontier or pending:
+                # Remplit le pool de workers (sans dépasser max_pages)
+                while frontier and len(pending) < concurrency and fetched + len(pending) < max_pages:
+                    current, depth, priority = frontier.pop_entry()
+                    pending[asyncio.create_task(
+                        _fetch(client, limiter, stage, store, current, tracer, max_html_bytes)
+                    )] = (current, depth, priority)
+                tracer.queues(frontier=len(frontier), fetching=len(pending), analysis=stage.backlog)
+
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(
+                    pending, timeout=PING_INTERVAL_S, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # event "ping" optionnel (le front peut l'ignorer)
+                    yield ("ping", {"ts": time.time()})
                     continue
 
-                content_type = r.headers.get("content-type", "")
-                if "text/html" not in content_type:
-                    visited.add(current)
+                for task in done:
+                    current, depth, priority = pending.pop(task)
+                    fetched += 1
+                    try:
+                        r, analysis, reused, truncated = task.result()
+                        truncated_pages += truncated
+                        status = r.status_code
+                        tries = throttle_retries.get(current, 0)
+                        if status in THROTTLE_STATUSES and adaptive_throttle and tries < MAX_THROTTLE_RETRIES:
+                            # Back-pressure : la page est refaite plus tard (le limiter
+                            # attend le Retry-After / espace les requêtes), pas comptée
+                            throttle_retries[current] = tries + 1
+                            # Même priorité qu'au premier passage (PageRank, sitemap...)
+                            frontier.requeue(current, depth, priority)
+                            fetched -= 1
+                            requeued += 1
+                            continue
+                        if r.history:
+                            # Chaque saut est une arête du graphe ; 2 sauts ou plus = chaîne
+                            chain = [str(h.url) for h in r.history] + [str(r.url)]
+                            for a, b in zip(chain, chain[1:]):
+                                graph.add_edge(a, b)
+                            if len(r.history) > 1:
+                                redirect_chains.append({
+                                    "from": current,
+                                    "to": chain[-1],
+                                    "hops": len(r.history),
+                                    "chain": chain,
+                                })
+                        # Résultat réutilisé par la vérification des liens
+                        checker.record(current, status)
+                        if str(r.url) != current:
+                            checker.record(str(r.url), status)
+                        if status >= 400:
+                            # On note la page comme "broken" (page elle-même inaccessible)
+                            results.add_issue("broken_links", {"from": None, "to": current, "status": status})
+                            alerting.observe_page(current, {"status": status, "depth": depth})
+                            continue
+
+                        # Page non HTML : pas d'analyse
+                        if analysis is None:
+                            continue
+
+                        # Cible d'une redirection : inutile de la re-fetcher
+                        final_url = str(r.url)
+                        frontier.mark_seen(final_url)
+
+                        # rel=canonical vers une autre URL du site : c'est elle qu'on analyse
+                        # (sauf boucle de canonicals, où la page courante est gardée)
+                        page_key = canon.key(final_url)
+                        canonical = analysis.canonical
+                        canonical_key = canon.key(canonical) if canonical else page_key
+                        if (
+                            canonical_key != page_key
+                            and canonical_key not in deferred
+                            and same_host(canonical, target)
+                            and robots.can_fetch(canonical)
+                        ):
+                            deferred.add(page_key)
+                            results.add_issue("canonicalized", {"url": current, "canonical": canonical})
+                            graph.add_edge(final_url, canonical)
+                            frontier.push(canon.clean(canonical), depth=depth, priority=link_priority(canonical))
+                            continue
+
+                        # Même page atteinte par une autre URL (redirection)
+                        if page_key in analyzed_keys:
+                            results.add_issue("near_duplicates", {"url": current, "duplicate_of": analyzed_keys[page_key]})
+                            continue
+                        analyzed_keys[page_key] = current
+
+                        # Quasi-doublon d'une page déjà analysée : ni issues ni liens suivis
+                        fp = analysis.fingerprint
+                        if fingerprints is not None and fp and analysis.word_count >= NEAR_DUPLICATE_MIN_WORDS:
+                            original = fingerprints.find(fp)
+                            if original is not None:
+                                results.add_issue("near_duplicates", {"url": current, "duplicate_of": original})
+                                continue
+                            fingerprints.add(fp, current)
+
+                        # Titre (duplicate titles) + liens internes (vérification des liens)
+                        results.add_page(
+                            analysis.url,
+                            analysis.title,
+                            analysis.internal_links,
+                            word_count=analysis.word_count,
+                            h1_count=analysis.h1_count,
+                            has_meta=bool(analysis.meta_description),
+                        )
+                        graph.add_page(final_url, analysis.internal_links)
+                        reused_pages += reused
+                        alerting.observe_page(analysis.url, {
+                            "status": status,
+                            "depth": depth,
+                            "word_count": analysis.word_count,
+                            "h1_count": analysis.h1_count,
+                            "has_meta": int(bool(analysis.meta_description)),
+                            "title_length": len(analysis.title or ""),
+                            "internal_links": len(analysis.internal_links),
+                        })
+
+                        # Issues page
+                        if not analysis.meta_description:
+                            results.add_issue("missing_meta_descriptions", {"url": analysis.url})
+
+                        if analysis.h1_count == 0:
+                            results.add_issue("missing_h1", {"url": analysis.url})
+
+                        if analysis.word_count < thin_words_threshold:
+                            results.add_issue("thin_pages", {"url": analysis.url, "words": analysis.word_count})
+
+                        # Enqueue internes (dédup O(1) dans la frontier)
+                        for link in analysis.internal_links:
+                            if not same_host(link, target) or link in frontier:
+                                continue
+                            if robots.can_fetch(link):
+                                frontier.push(canon.clean(link), depth=depth + 1, priority=link_priority(link))
+                            else:
+                                frontier.mark_seen(link)
+                                robots_skipped += 1
+
+                    except AnalysisError:
+                        # Page récupérée mais non analysable : pas un lien cassé du site
+                        analysis_errors += 1
+                        continue
+                    except FETCH_ERRORS as e:
+                        # erreur réseau
+                        if checker.get(current) is None:
+                            checker.record(current, "error", str(e))
+                        results.add_issue("broken_links", {"from": None, "to": current, "status": "error", "error": str(e)})
+                        continue
+
+                    # Progress dynamique 10% -> 70% selon pages traitées
+                    pct = 10 + int((fetched / max_pages) * 60)
+                    pct = min(70, max(10, pct))
+                    yield ("progress", {
+                        "progress": pct,
+                        "label": f"Crawling pages ({fetched}/{max_pages})",
+                        "rate": limiter.stats(target),
+                    })
+
+                # Mode streaming : issues émises dès qu'elles sont connues
+                for kind, item in results.drain():
+                    yield ("issue", {"type": kind, **item})
+
+                # Règles sur les compteurs du scan : seuils franchis pendant le crawl
+                if alerting.early_metrics:
+                    alerting.observe_scan(scan_metrics(results, thin_words_threshold, alerting.early_metrics))
+                for alert in alerting.drain():
+                    yield ("alert", alert)
+
+                # Ordre "pagerank" : re-tri de la frontier, de plus en plus espacé
+                if next_rank_refresh is not None and fetched >= next_rank_refresh and frontier:
+                    if graph.edge_count > PAGERANK_REFRESH_MAX_EDGES:
+                        # Graphe trop gros : on garde le dernier ordre calculé
+                        next_rank_refresh = None
+                    else:
+                        tracer.begin("pagerank")
+                        # Calcul hors de la boucle d'events : les fetchs en vol continuent
+                        # (le graphe n'est modifié que par cette boucle, en pause ici)
+                        ranks = await asyncio.to_thread(graph.pagerank, tol=PAGERANK_REFRESH_TOL)
+                        frontier.reprioritize(lambda url, _depth: graph.priority(url, ranks))
+                        next_rank_refresh = max(fetched + 1, int(fetched * PAGERANK_REFRESH_GROWTH))
+                        tracer.end("pagerank")
+
+                if checkpoint is not None and checkpoint.due():
+                    await checkpoint.save(checkpoint_state())
+
+            tracer.end("crawl")
+            tracer.queues(frontier=0, fetching=0, analysis=0)
+
+            # Vérification des liens internes : cibles dédupliquées sur tout le scan,
+            # résultats du crawl réutilisés, le reste vérifié en parallèle
+            yield ("progress", {"progress": 75, "label": "Checking internal links"})
+            tracer.begin("link_check")
+            phase = "link_check"
+            targets = checker.pending_targets(
+                link for _, link in results.iter_links() if robots.can_fetch(link)
+            )
+            if max_link_checks is not None:
+                targets = targets[:max_link_checks]
+
+            pending = {checker.check(link): (link, 0, 0) for link in targets}
+            checked = 0
+            while pending:
+                tracer.queues(link_check=checker.inflight)
+                done, _ = await asyncio.wait(
+                    pending, timeout=PING_INTERVAL_S, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    yield ("ping", {"ts": time.time()})
                     continue
+                for task in done:
+                    pending.pop(task)
+                checked += len(done)
+                pct = 75 + int((checked / len(targets)) * 9)
+                yield ("progress", {
+                    "progress": pct,
+                    "label": f"Checking internal links ({checked}/{len(targets)})",
+                    "rate": limiter.stats(target),
+                })
+                if checkpoint is not None and checkpoint.due():
+                    await checkpoint.save(checkpoint_state())
 
-                analysis = analyze_html(current, r.text)
-                crawled.append(analysis)
-                visited.add(current)
-
-                # Issues page
-                if not analysis.meta_description:
-                    missing_meta_pages.append({"url": analysis.url})
-
-                if analysis.h1_count == 0:
-                    missing_h1_pages.append({"url": analysis.url})
-
-                if analysis.word_count < thin_words_threshold:
-                    thin_pages.append({"url": analysis.url, "words": analysis.word_count})
-
-                # Duplicate titles
-                tkey = (analysis.title or "").strip()
-                if tkey:
-                    titles_map.setdefault(tkey, []).append(analysis.url)
-
-                # Enqueue internes
-                for link in analysis.internal_links:
-                    if link not in visited and link not in queue and same_host(link, target):
-                        queue.append(link)
-
-                # Progress dynamique 10% -> 70% selon pages traitées
-                pct = 10 + int((len(visited) / max_pages) * 60)
-                pct = min(70, max(10, pct))
-                yield ("progress", {"progress": pct, "label": f"Crawling pages ({len(visited)}/{max_pages})"})
-
-            except Exception as e:
-                # erreur réseau/parsing
-                visited.add(current)
-                broken_links_items.append({"from": None, "to": current, "status": "error", "error": str(e)})
-
-        # Analyse liens internes (light) sur les pages déjà crawled
-        yield ("progress", {"progress": 75, "label": "Checking internal links"})
-        checked = 0
-        max_checks = min(120, sum(len(p.internal_links) for p in crawled))  # cap
-        for p in crawled:
-            for link in p.internal_links:
-                if checked >= max_checks:
-                    break
+            # Les issues de liens sont ajoutées d'un bloc : plus rien à reprendre ensuite
+            phase = None
+            # Chaque page référente est rattachée au résultat de sa cible
+            for src, link in results.iter_links():
+                res = checker.get(link)
+                if is_broken(res):
+                    results.add_issue("broken_links", {"from": src, "to": link, **res})
+
+            tracer.end("link_check")
 
-                # Ping
-                for ev in maybe_ping() or []:
-                    yield ev
+            yield ("progress", {"progress": 85, "label": "Computing SEO score"})
+            tracer.begin("score")
+            results.finish()
+            for kind, item in results.drain():
+                yield ("issue", {"type": kind, **item})
+            tracer.end("score")
 
-                checked += 1
+            tracer.begin("graph")
+            link_graph = await asyncio.to_thread(graph.report, target, redirect_chains, complete=not frontier)
+            tracer.end("graph")
+
+        finally:
+            # Scan interrompu (client parti, erreur...) : état figé, requêtes en vol
+            # annulées, puis dernier checkpoint écrit hors de la boucle (gzip + fsync)
+            state = None
+            if checkpoint is not None and phase is not None:
                 try:
-                    # HEAD puis fallback GET si HEAD bloqué
-                    rr = client.head(link)
-                    if rr.status_code in (405, 403) or rr.status_code >= 500:
-                        rr = client.get(link)
-                    if rr.status_code >= 400:
-                        broken_links_items.append({"from": p.url, "to": link, "status": rr.status_code})
-                except Exception as e:
-                    broken_links_items.append({"from": p.url, "to": link, "status": "error", "error": str(e)})
-
-        yield ("progress", {"progress": 85, "label": "Computing SEO score"})
-
-    # Duplicate titles groups
-    duplicate_titles = {t: urls for t, urls in titles_map.items() if len(urls) > 1}
-    duplicate_groups = len(duplicate_titles)
-
-    # KPIs
-    pages_crawled = len(crawled)
-    critical_issues = len(missing_meta_pages) + len([b for b in broken_links_items if isinstance(b.get("status"), int) and b["status"] >= 400])
-
-    score, main_issue = compute_health_score(
-        missing_meta=len(missing_meta_pages),
-        broken_links=len(broken_links_items),
-        duplicate_titles_groups=duplicate_groups,
-        thin_pages=len(thin_pages),
-        missing_h1_pages=len(missing_h1_pages),
+                    state = checkpoint_state()
+                except Exception:
+                    pass
+            for task in pending:
+                task.cancel()
+            checker.cancel()
+            try:
+                if state is not None:
+                    # shield : écriture menée à terme même si l'attente est annulée
+                    await asyncio.shield(asyncio.to_thread(checkpoint.save_now, state))
+            except Exception:
+                pass
+            finally:
+                stage.close()
+                results.close()
+                tracer.close()
+
+    # KPIs + score : passes sur les colonnes de pages (identiques en mode mémoire
+    # et streaming, et au re-scoring d'un scan stocké)
+    counts = results.counts
+    scored = score_pages(
+        results.columns,
+        thin_words_threshold=thin_words_threshold,
+        broken_links=counts["broken_links"],
+        critical_broken=results.critical,
+        weights=weights,
     )
 
-    duration_s = round(time.time() - start_ts, 2)
+    # Règles "scan" sur les valeurs finales (score compris)
+    alerting.finish({
+        **scan_metrics(results, thin_words_threshold, alerting.scan_metrics),
+        "health_score": scored["health"]["score"],
+    })
+    for alert in alerting.drain():
+        yield ("alert", alert)
+
+    duration_s = round(elapsed_before + time.time() - start_ts, 2)
+    if checkpoint is not None:
+        checkpoint.clear()
+
+    # Historique : colonnes de pages + compteurs de liens, re-scoring sans re-crawl
+    if store is not None:
+        await asyncio.to_thread(
+            store.put_scan,
+            results.scan_id,
+            target,
+            results.columns.to_bytes(),
+            counts["broken_links"],
+            results.critical,
+        )
 
     payload = {
-        "kpis": {
-            "pages_crawled": pages_crawled,
-            "critical_issues": critical_issues,
-            "missing_meta_descriptions": len(missing_meta_pages),
-            "thin_pages": len(thin_pages),
-        },
-        "health": {
-            "score": score,
-            "main_issue": f"{main_issue} on {max(len(missing_meta_pages), len(broken_links_items), duplicate_groups, len(thin_pages), len(missing_h1_pages))} item(s)"
-            if main_issue != "No major issue detected"
-            else main_issue
-        },
-        "issues": {
-            "missing_meta_descriptions": missing_meta_pages,
-            "broken_links": broken_links_items,
-            "duplicate_titles": duplicate_titles,
-            "thin_pages": thin_pages,
-            "missing_h1": missing_h1_pages,
-        },
+        "kpis": scored["kpis"],
+        "health": scored["health"],
+        # "issues" (mode mémoire) ou "issues_handle" (mode streaming)
+        **results.payload(),
         "meta": {
+            # Id du scan dans l'historique (POST /seo/scan/results/{scan_id}/rescore) ; None sans store
+            "scan_id": results.scan_id if store is not None else None,
             "target_url": target,
             "host": host,
             "max_pages": max_pages,
             "thin_words_threshold": thin_words_threshold,
             "duration_s": duration_s,
+            "reused_pages": reused_pages,
+            "truncated_pages": truncated_pages,
+            "analysis_errors": analysis_errors,
+            # Débit final vers le site + requêtes refaites après un 429 / 503
+            "throttle": {**limiter.stats(target), "requeued": requeued},
+            "duplicates_skipped": counts["canonicalized"] + counts["near_duplicates"],
+            "sitemap_urls": sitemap_seeded,
+            "robots": {
+                "crawl_delay": robots.crawl_delay,
+                "disallowed_skipped": robots_skipped,
+            },
+            "crawl_order": crawl_order,
+            # Scan repris d'un checkpoint : étape et pages déjà traitées à la reprise
+            "resumed": {
+                "phase": resume["phase"],
+                "pages": resume["counters"]["fetched"],
+                "checkpoint_age_s": round(start_ts - resume["saved_at"], 1),
+            } if resume is not None else None,
             "finished_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
         },
+        "link_graph": link_graph,
+        "alerts": alerting.alerts(),
     }
+    if trace or profile:
+        payload["timings"] = tracer.summary()
 
     yield ("progress", {"progress": 100, "label": "Scan completed"})
-    yield ("done", payload)
\ No newline at end of file
+    yield ("done", payload)
+
+
+def run_seo_scan_real(
+    raw_url: str,
+    max_pages: int = 25,
+    timeout_s: float = 12.0,
+    thin_words_threshold: int = 250,
+    **crawl_opts,
+):
+    """
+    Générateur (yield) d'events de progression + retourne un payload final (done).
+
+    Wrapper synchrone de `run_seo_scan_async` : le crawl tourne dans une boucle
+    asyncio dédiée, les events sont restitués un par un à l'appelant.
+    `crawl_opts` : paramètres de `run_seo_scan_async`, champs de ScanOptions
+    compris (trace, crawl_order...).
+    """
+    options, crawl_opts = split_scan_options(crawl_opts)
+    loop = asyncio.new_event_loop()
+    agen = run_seo_scan_async(
+        raw_url,
+        max_pages=max_pages,
+        timeout_s=timeout_s,
+        thin_words_threshold=thin_words_threshold,
+        options=options,
+        **crawl_opts,
+    )
+    try:
+        while True:
+            try:
+                ev = loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+            yield ev
+    finally:
+        loop.run_until_complete(agen.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
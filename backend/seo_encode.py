@@ -0,0 +1,190 @@
+# backend/seo_encode.py
+from __future__ import annotations
+
+import gzip
+import json
+import math
+import zlib
+from typing import Any, Dict, Optional, Set, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import orjson  # dépendance optionnelle (sérialisation 5-10x plus rapide)
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # dépendance optionnelle
+except ImportError:
+    brotli = None
+
+JSON_ENCODER = "orjson" if orjson is not None else "json"
+
+# Progress : au plus un event toutes les PROGRESS_MIN_INTERVAL_S, le dernier
+# état gardé en attente est envoyé à l'échéance (ou avant l'event suivant)
+PROGRESS_MIN_INTERVAL_S = 0.25
+
+# Compression des réponses JSON : en dessous, pas rentable
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Réponses streamées (SSE, NDJSON) : compressées message par message
+STREAMED_CONTENT_TYPES = ("text/event-stream", "application/x-ndjson")
+
+
+# =========================
+# JSON
+# =========================
+def json_dumps_bytes(data: Any) -> bytes:
+    """
+    JSON compact en UTF-8 (orjson si installé, sinon json de la stdlib).
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_dumps(data: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+# =========================
+# Coalescing des events "progress"
+# =========================
+class ProgressCoalescer:
+    """
+    Filtre des events "progress" d'un scan : un event identique au dernier envoyé
+    est ignoré, et au plus un event part toutes les `min_interval_s` secondes.
+    Entre deux, seul le dernier état est gardé (`pending`) : à envoyer via
+    `flush()` à l'échéance (`flush_at()`) ou avant tout autre event.
+    """
+
+    def __init__(self, min_interval_s: float = PROGRESS_MIN_INTERVAL_S):
+        self.min_interval_s = min_interval_s
+        self.pending: Optional[Dict[str, Any]] = None
+        self.sent = 0
+        self.dropped = 0
+        self._last: Optional[Dict[str, Any]] = None
+        self._last_at = -math.inf
+
+    def offer(self, data: Dict[str, Any], now: float) -> Optional[Dict[str, Any]]:
+        """
+        Event à envoyer tout de suite, ou None (ignoré / mis en attente).
+        """
+        if self.pending is not None:
+            self.dropped += 1  # remplacé par un état plus récent
+        if data == self._last:
+            self.pending = None
+            self.dropped += 1
+            return None
+        if now - self._last_at >= self.min_interval_s:
+            self.pending = None
+            self._sent(data, now)
+            return data
+        self.pending = data
+        return None
+
+    def flush_at(self) -> Optional[float]:
+        return self._last_at + self.min_interval_s if self.pending is not None else None
+
+    def flush(self, now: float) -> Optional[Dict[str, Any]]:
+        data, self.pending = self.pending, None
+        if data is not None:
+            self._sent(data, now)
+        return data
+
+    def _sent(self, data: Dict[str, Any], now: float) -> None:
+        self._last = data
+        self._last_at = now
+        self.sent += 1
+
+
+# =========================
+# Compression
+# =========================
+def accepted_encodings(accept_encoding: Optional[str]) -> Set[str]:
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.partition(";")
+        q = params.strip()
+        try:
+            if q.startswith("q=") and float(q[2:]) <= 0:
+                continue  # "gzip;q=0" : refusé explicitement
+        except ValueError:
+            continue
+        accepted.add(name.strip())
+    if "*" in accepted:
+        accepted.add("gzip")
+    return accepted
+
+
+def accepted_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Meilleur encodage accepté par le client : "br" (si brotli est installé),
+    "gzip", ou None (identité).
+    """
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    return "gzip" if "gzip" in accepted else None
+
+
+def compress(data: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    return data
+
+
+def encode_body(data: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    (corps, Content-Encoding) pour une réponse : compressé si le client
+    l'accepte et que le corps dépasse COMPRESS_MIN_BYTES.
+    """
+    encoding = accepted_encoding(accept_encoding) if len(data) >= COMPRESS_MIN_BYTES else None
+    return compress(data, encoding), encoding
+
+
+class StreamingGZipMiddleware:
+    """
+    Compression gzip des réponses streamées (SSE, NDJSON : STREAMED_CONTENT_TYPES),
+    à exclure du GZipMiddleware de Starlette qui les retiendrait dans son tampon :
+    ici chaque message est compressé puis vidé (Z_SYNC_FLUSH), les events
+    arrivent sans délai. Le gros payload "done" d'un scan part compressé ; les
+    navigateurs (EventSource) décompressent seuls.
+    """
+
+    def __init__(self, app, compresslevel: int = GZIP_LEVEL):
+        self.app = app
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or "gzip" not in accepted_encodings(Headers(scope=scope).get("accept-encoding")):
+            await self.app(scope, receive, send)
+            return
+
+        compressor = None
+
+        async def send_compressed(message) -> None:
+            nonlocal compressor
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+                if media_type in STREAMED_CONTENT_TYPES and "content-encoding" not in headers:
+                    compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, 31)  # 31 : en-tête gzip
+                    headers["Content-Encoding"] = "gzip"
+                    headers.add_vary_header("Accept-Encoding")
+                    if "content-length" in headers:
+                        del headers["content-length"]
+            elif message["type"] == "http.response.body" and compressor is not None:
+                more = message.get("more_body", False)
+                body = compressor.compress(message.get("body", b""))
+                body += compressor.flush(zlib.Z_SYNC_FLUSH if more else zlib.Z_FINISH)
+                message = {**message, "body": body}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
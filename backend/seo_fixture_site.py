@@ -0,0 +1,199 @@
+# backend/seo_fixture_site.py
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+# Vocabulaire des pages synthétiques (assez grand pour que les textes diffèrent)
+_rng = random.Random(0)
+_VOCAB = ["".join(_rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(3 + i % 7)) for i in range(4000)]
+del _rng
+
+
+@dataclass
+class SiteShape:
+    """
+    Forme d'un site synthétique. Tout est déterministe pour un `seed` donné.
+    """
+
+    pages: int = 200
+    fanout: int = 10  # liens internes par page
+    page_kb: float = 20.0  # taille approx. du HTML
+    latency_ms: float = 10.0  # délai avant réponse
+    error_rate: float = 0.0  # part des liens vers des pages en 404/500
+    redirect_rate: float = 0.0  # part des liens via une redirection 301
+    non_html_rate: float = 0.0  # part des liens vers des fichiers non HTML
+    max_rps: float = 0.0  # au-delà (seau de jetons, 1 s de réserve) : 429 + Retry-After
+    sitemap: bool = True
+    seed: int = 1
+
+
+class FixtureSite:
+    """
+    Serveur HTTP local (thread) qui sert un site synthétique selon un SiteShape :
+    /, /p/<i>, /r/<i> (301 -> /p/<i>), /e/<i> (404 ou 500), /f/<i>.pdf,
+    robots.txt et sitemap.xml. Compte les requêtes reçues (et les 429 renvoyés
+    quand `max_rps` est dépassé).
+    """
+
+    def __init__(self, shape: SiteShape, host: str = "127.0.0.1", port: int = 0):
+        self.shape = shape
+        self.requests = 0
+        self.throttled = 0
+        self._tokens = shape.max_rps
+        self._refill_at = time.monotonic()
+        self._lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self._serve(head=True)
+
+            def do_GET(self):
+                self._serve(head=False)
+
+            def _serve(self, head: bool):
+                with site._lock:
+                    site.requests += 1
+                    allowed = site._take_token()
+                if site.shape.latency_ms:
+                    time.sleep(site.shape.latency_ms / 1000.0)
+                if allowed:
+                    status, headers, body = site.respond(self.path)
+                else:
+                    status, headers, body = 429, [("Retry-After", "1"), ("Content-Type", "text/html")], b"<h1>Slow down</h1>"
+                self.send_response(status)
+                for k, v in headers:
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 256
+
+        self._server = Server((host, port), Handler)
+        self._pages: dict = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _take_token(self) -> bool:
+        # Appelé sous self._lock
+        rate = self.shape.max_rps
+        if not rate:
+            return True
+        now = time.monotonic()
+        self._tokens = min(rate, self._tokens + (now - self._refill_at) * rate)
+        self._refill_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        self.throttled += 1
+        return False
+
+    def start(self) -> "FixtureSite":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FixtureSite":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # =========================
+    # Contenu
+    # =========================
+    def _link(self, rng: random.Random) -> str:
+        s = self.shape
+        i = rng.randrange(s.pages)
+        roll = rng.random()
+        if roll < s.error_rate:
+            return f"/e/{i}"
+        roll -= s.error_rate
+        if roll < s.redirect_rate:
+            return f"/r/{i}"
+        roll -= s.redirect_rate
+        if roll < s.non_html_rate:
+            return f"/f/{i}.pdf"
+        return f"/p/{i}"
+
+    def page_html(self, i: int) -> str:
+        s = self.shape
+        rng = random.Random(s.seed * 1_000_003 + i)
+        links = "".join(f'<li><a href="{self._link(rng)}">link {k}</a></li>' for k in range(s.fanout))
+        head = (
+            f"<!DOCTYPE html><html><head><title>Page {i} - {rng.choice(_VOCAB)}</title>"
+            f'<meta name="description" content="Synthetic page {i}">'
+            "<style>body{font-family:sans-serif}</style></head><body>"
+            f"<h1>Page {i}</h1><nav><ul>{links}</ul></nav>"
+        )
+        # Paragraphes jusqu'à la taille visée
+        target = int(s.page_kb * 1024)
+        parts = [head]
+        size = len(head)
+        while size < target:
+            para = "<p>" + " ".join(rng.choice(_VOCAB) for _ in range(40)) + "</p>"
+            parts.append(para)
+            size += len(para)
+        parts.append("<script>var page = %d;</script></body></html>" % i)
+        return "".join(parts)
+
+    def respond(self, path: str) -> Tuple[int, list, bytes]:
+        s = self.shape
+        path = path.split("?", 1)[0]
+        html = [("Content-Type", "text/html; charset=utf-8")]
+
+        if path == "/":
+            rng = random.Random(s.seed)
+            links = "".join(f'<a href="/p/{rng.randrange(s.pages)}">x</a>' for _ in range(max(s.fanout, 1)))
+            body = f"<!DOCTYPE html><html><head><title>Home</title></head><body><h1>Home</h1>{links}</body></html>"
+            return 200, html, body.encode()
+        if path == "/robots.txt":
+            body = "User-agent: *\nDisallow:\n" + ("Sitemap: /sitemap.xml\n" if s.sitemap else "")
+            return 200, [("Content-Type", "text/plain")], body.encode()
+        if path == "/sitemap.xml" and s.sitemap:
+            locs = "".join(f"<url><loc>{self.url}p/{i}</loc></url>" for i in range(s.pages))
+            body = f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>'
+            return 200, [("Content-Type", "application/xml")], body.encode()
+
+        kind, _, rest = path.strip("/").partition("/")
+        try:
+            i = int(rest.split(".", 1)[0])
+        except ValueError:
+            return 404, html, b"<h1>Not found</h1>"
+        if not 0 <= i < s.pages:
+            return 404, html, b"<h1>Not found</h1>"
+
+        if kind == "p":
+            body = self._pages.get(i)
+            if body is None:
+                body = self._pages[i] = self.page_html(i).encode()
+            return 200, html, body
+        if kind == "r":
+            return 301, [("Location", f"/p/{i}")], b""
+        if kind == "e":
+            return (500 if i % 2 else 404), html, b"<h1>Error</h1>"
+        if kind == "f":
+            return 200, [("Content-Type", "application/pdf")], b"%PDF-1.4 " + b"0" * 2048
+        return 404, html, b"<h1>Not found</h1>"
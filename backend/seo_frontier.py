@@ -0,0 +1,140 @@
+# backend/seo_frontier.py
+from __future__ import annotations
+
+import heapq
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from backend.seo_canonical import url_key
+
+
+class CrawlFrontier:
+    """
+    File d'attente du crawl, toutes les opérations en O(1) amorti.
+
+    - une deque FIFO par niveau de priorité (0 = le plus important) ;
+      par défaut la priorité = profondeur, donc on reste en BFS
+    - un set "seen" sur la clé canonique (`key_fn`, cf. seo_canonical) :
+      une URL n'est enfilée qu'une fois
+    - max_depth : les liens plus profonds sont ignorés
+    """
+
+    def __init__(self, max_depth: Optional[int] = None, key_fn: Callable[[str], str] = url_key):
+        self.max_depth = max_depth
+        self.key_fn = key_fn
+        self._buckets: Dict[int, Deque[Tuple[str, int]]] = {}
+        self._levels: List[int] = []  # heap des priorités non vides
+        self._seen: Set[str] = set()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __contains__(self, url: str) -> bool:
+        return self.key_fn(url) in self._seen
+
+    def mark_seen(self, url: str) -> None:
+        self._seen.add(self.key_fn(url))
+
+    def push(self, url: str, depth: int = 0, priority: Optional[int] = None) -> bool:
+        """
+        Enfile `url` si jamais vue. Retourne False si ignorée (déjà vue / trop profonde).
+        """
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+
+        key = self.key_fn(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+
+        prio = depth if priority is None else priority
+        bucket = self._buckets.get(prio)
+        if bucket is None:
+            bucket = self._buckets[prio] = deque()
+            heapq.heappush(self._levels, prio)
+        bucket.append((url, depth))
+        self._size += 1
+        return True
+
+    def pop(self) -> Tuple[str, int]:
+        """
+        Retourne (url, depth) de l'entrée la plus prioritaire.
+        """
+        url, depth, _ = self.pop_entry()
+        return url, depth
+
+    def pop_entry(self) -> Tuple[str, int, int]:
+        """
+        Comme pop(), avec la priorité de l'entrée : (url, depth, priority),
+        pour la ré-enfiler telle quelle (requeue).
+        """
+        if not self._levels:
+            raise IndexError("pop from empty frontier")
+
+        prio = self._levels[0]
+        bucket = self._buckets[prio]
+        item = bucket.popleft()
+        if not bucket:
+            heapq.heappop(self._levels)
+            del self._buckets[prio]
+        self._size -= 1
+        return (*item, prio)
+
+    def requeue(self, url: str, depth: int = 0, priority: Optional[int] = None) -> None:
+        """
+        Ré-enfile une URL déjà sortie (requête à refaire plus tard, ex. 429),
+        sans passer par le set "seen".
+        """
+        prio = depth if priority is None else priority
+        bucket = self._buckets.get(prio)
+        if bucket is None:
+            bucket = self._buckets[prio] = deque()
+            heapq.heappush(self._levels, prio)
+        bucket.append((url, depth))
+        self._size += 1
+
+    # Checkpoint : entrées en attente (url, depth, priorité) + clés déjà vues
+    def state(self, requeue: Iterable[Tuple[str, int, int]] = ()) -> Dict[str, Any]:
+        """
+        `requeue` : entrées (pop_entry) déjà sorties mais pas terminées (requêtes
+        en vol), remises en tête de file à la reprise.
+        """
+        head = self._levels[0] if self._levels else 0
+        items = [[url, depth, head] for url, depth, _ in requeue]
+        items.extend([url, depth, prio] for prio in sorted(self._buckets) for url, depth in self._buckets[prio])
+        return {"items": items, "seen": list(self._seen)}
+
+    @classmethod
+    def from_state(
+        cls, state: Dict[str, Any], max_depth: Optional[int] = None, key_fn: Callable[[str], str] = url_key
+    ) -> "CrawlFrontier":
+        frontier = cls(max_depth=max_depth, key_fn=key_fn)
+        frontier._seen = set(state["seen"])
+        for url, depth, prio in state["items"]:
+            bucket = frontier._buckets.get(prio)
+            if bucket is None:
+                bucket = frontier._buckets[prio] = deque()
+                heapq.heappush(frontier._levels, prio)
+            bucket.append((url, depth))
+            frontier._size += 1
+        return frontier
+
+    def reprioritize(self, priority_fn: Callable[[str, int], int]) -> None:
+        """
+        Recalcule la priorité de toutes les entrées en attente (`priority_fn(url, depth)`,
+        ex. PageRank partiel), en O(taille). L'ordre FIFO est conservé à priorité égale.
+        """
+        items = [item for prio in sorted(self._buckets) for item in self._buckets[prio]]
+        self._buckets = {}
+        for url, depth in items:
+            prio = priority_fn(url, depth)
+            bucket = self._buckets.get(prio)
+            if bucket is None:
+                bucket = self._buckets[prio] = deque()
+            bucket.append((url, depth))
+        self._levels = list(self._buckets)
+        heapq.heapify(self._levels)
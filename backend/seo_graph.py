@@ -0,0 +1,276 @@
+# backend/seo_graph.py
+from __future__ import annotations
+
+import math
+import operator
+from array import array
+from collections import Counter, deque
+from itertools import accumulate, compress, repeat
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.seo_canonical import url_key
+from backend.seo_checkpoint import pack_array, pack_bytes, unpack_array, unpack_bytes
+
+# PageRank : amortissement classique, arrêt sur la variation L1 des scores
+PAGERANK_DAMPING = 0.85
+PAGERANK_MAX_ITERATIONS = 50
+PAGERANK_TOL = 1e-6
+
+# Priorités de frontier dérivées du PageRank : 0 (score le plus haut) .. LEVELS-1,
+# une page de score moyen (pr * n = 1) au milieu
+PAGERANK_LEVELS = 16
+PAGERANK_DEFAULT_PRIORITY = PAGERANK_LEVELS // 2
+
+# Taille des listes du payload (orphelines, chaînes, top PageRank)
+GRAPH_REPORT_MAX = 100
+PAGERANK_TOP = 20
+
+
+class LinkGraph:
+    """
+    Graphe des liens internes d'un scan : un id entier par URL (clé canonique),
+    arêtes en tableaux d'entiers (append), adjacence CSR construite à la demande
+    (offsets + cibles, sortantes et entrantes).
+
+    Arêtes = liens <a> des pages analysées, plus redirections et rel=canonical
+    (la page pointe vers sa cible). Les URLs des sitemaps sont marquées pour
+    détecter les pages orphelines.
+    """
+
+    def __init__(self, key_fn: Callable[[str], str] = url_key):
+        self.key_fn = key_fn
+        self.urls: List[str] = []
+        self._ids: Dict[str, int] = {}
+        # URL brute -> id : un même lien revient sur beaucoup de pages, la
+        # canonicalisation (key_fn) n'est faite qu'une fois par chaîne
+        self._aliases: Dict[str, int] = {}
+        self._src = array("I")
+        self._dst = array("I")
+        # Arêtes par source : (id source, début, fin) dans _src/_dst, dans l'ordre d'ajout
+        self._runs: List[Tuple[int, int, int]] = []
+        self.crawled = bytearray()  # 1 = page analysée (liens sortants connus)
+        self.in_sitemap = bytearray()
+        self._csr: Optional[Tuple[array, array, array, array]] = None
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._dst)
+
+    def node(self, url: str) -> int:
+        nid = self._aliases.get(url)
+        if nid is not None:
+            return nid
+        key = self.key_fn(url)
+        nid = self._ids.get(key)
+        if nid is None:
+            nid = self._ids[key] = len(self.urls)
+            self.urls.append(url)
+            self.crawled.append(0)
+            self.in_sitemap.append(0)
+        self._aliases[url] = nid
+        return nid
+
+    def get(self, url: str) -> Optional[int]:
+        nid = self._aliases.get(url)
+        return nid if nid is not None else self._ids.get(self.key_fn(url))
+
+    def add_page(self, url: str, links: List[str]) -> None:
+        src = self.node(url)
+        self.crawled[src] = 1
+        targets = array("I", (dst for dst in map(self.node, links) if dst != src))
+        self._add_run(src, targets)
+
+    def _add_run(self, src: int, targets: array) -> None:
+        start = len(self._dst)
+        self._dst.extend(targets)
+        self._src.extend(array("I", [src]) * len(targets))
+        self._runs.append((src, start, len(self._dst)))
+        self._csr = None
+
+    def add_edge(self, src_url: str, dst_url: str) -> None:
+        # Redirection / canonical : src transmet son "jus" à dst
+        src, dst = self.node(src_url), self.node(dst_url)
+        if src != dst:
+            self._add_run(src, array("I", [dst]))
+
+    def mark_sitemap(self, url: str) -> None:
+        self.in_sitemap[self.node(url)] = 1
+
+    # Checkpoint : URLs + colonnes d'entiers
+    def state(self) -> Dict[str, Any]:
+        runs = array("I")
+        for run in self._runs:
+            runs.extend(run)
+        return {
+            "urls": self.urls,
+            "src": pack_array(self._src),
+            "dst": pack_array(self._dst),
+            "runs": pack_array(runs),
+            "crawled": pack_bytes(bytes(self.crawled)),
+            "in_sitemap": pack_bytes(bytes(self.in_sitemap)),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], key_fn: Callable[[str], str] = url_key) -> "LinkGraph":
+        graph = cls(key_fn=key_fn)
+        graph.urls = list(state["urls"])
+        graph._ids = {key_fn(url): nid for nid, url in enumerate(graph.urls)}
+        graph._src = unpack_array("I", state["src"])
+        graph._dst = unpack_array("I", state["dst"])
+        runs = unpack_array("I", state["runs"])
+        graph._runs = list(zip(runs[0::3], runs[1::3], runs[2::3]))
+        graph.crawled = bytearray(unpack_bytes(state["crawled"]))
+        graph.in_sitemap = bytearray(unpack_bytes(state["in_sitemap"]))
+        return graph
+
+    # =========================
+    # CSR
+    # =========================
+    def _offsets(self, keys: array) -> array:
+        # offsets[i] = nb d'arêtes de clé < i (degrés cumulés)
+        degree = Counter(keys)
+        offsets = array("I", [0])
+        offsets.extend(accumulate(map(degree.get, range(len(self.urls)), repeat(0))))
+        return offsets
+
+    def csr(self) -> Tuple[array, array, array, array]:
+        """
+        (out_offsets, out_targets, in_offsets, in_sources) : les voisins sortants
+        du noeud i sont out_targets[out_offsets[i]:out_offsets[i + 1]].
+        """
+        if self._csr is None:
+            # Sortantes : les arêtes sont déjà groupées par page (runs), il suffit
+            # de recopier les runs dans l'ordre des ids (tri des runs, pas des arêtes)
+            out_targets = array("I")
+            for _, start, end in sorted(self._runs, key=operator.itemgetter(0)):
+                out_targets.extend(self._dst[start:end])
+            # Entrantes : tri stable des arêtes par cible (tri C, pas de boucle Python)
+            order = sorted(range(len(self._dst)), key=self._dst.__getitem__)
+            in_sources = array("I", map(self._src.__getitem__, order))
+            self._csr = (self._offsets(self._src), out_targets, self._offsets(self._dst), in_sources)
+        return self._csr
+
+    def in_degree(self) -> List[int]:
+        _, _, in_offsets, _ = self.csr()
+        return list(map(operator.sub, in_offsets[1:], in_offsets[:-1]))
+
+    # =========================
+    # Analyses
+    # =========================
+    def pagerank(
+        self,
+        damping: float = PAGERANK_DAMPING,
+        max_iterations: int = PAGERANK_MAX_ITERATIONS,
+        tol: float = PAGERANK_TOL,
+    ) -> List[float]:
+        """
+        PageRank interne (somme = 1), itérations "pull" sur le CSR entrant.
+        Les noeuds sans lien sortant (pages non crawlées, fichiers...) redistribuent
+        leur score uniformément.
+        Chaque itération : une passe map (en C) qui range les contributions des
+        sources dans l'ordre du CSR entrant, puis une somme de tranche par noeud
+        (aucune boucle Python par arête).
+        """
+        n = len(self.urls)
+        if not n:
+            return []
+        out_offsets, _, in_offsets, in_sources = self.csr()
+        out_deg = list(map(operator.sub, out_offsets[1:], out_offsets[:-1]))
+        # Facteur d'amortissement inclus dans la part transmise par lien
+        share = [damping / d if d else 0.0 for d in out_deg]
+        dangling = [d == 0 for d in out_deg]
+        rows = list(zip(in_offsets[:-1], in_offsets[1:]))
+        sources = in_sources.tolist()  # getitem sur une liste : plus rapide que sur l'array
+
+        rank = [1.0 / n] * n
+        for _ in range(max_iterations):
+            contrib = list(map(operator.mul, rank, share))
+            gathered = list(map(contrib.__getitem__, sources))
+            base = (1.0 - damping) / n + damping * sum(compress(rank, dangling)) / n
+            new = [base + sum(gathered[a:b]) for a, b in rows]
+            delta = sum(map(abs, map(operator.sub, new, rank)))
+            rank = new
+            if delta < tol:
+                break
+        return rank
+
+    def depths(self, root_url: str) -> List[int]:
+        """
+        Profondeur de clic (BFS sur les liens) depuis `root_url`, -1 si inaccessible.
+        """
+        n = len(self.urls)
+        depth = [-1] * n
+        root = self.get(root_url)
+        if root is None:
+            return depth
+        out_offsets, out_targets, _, _ = self.csr()
+        depth[root] = 0
+        queue = deque([root])
+        while queue:
+            u = queue.popleft()
+            d = depth[u] + 1
+            for v in out_targets[out_offsets[u]:out_offsets[u + 1]]:
+                if depth[v] < 0:
+                    depth[v] = d
+                    queue.append(v)
+        return depth
+
+    def priority(self, url: str, ranks: List[float]) -> int:
+        """
+        Priorité de frontier (0 = d'abord) selon le PageRank, échelle log2 autour
+        de la moyenne. Noeud inconnu du dernier calcul : priorité moyenne.
+        """
+        nid = self.get(url)
+        if nid is None or nid >= len(ranks) or ranks[nid] <= 0:
+            return PAGERANK_DEFAULT_PRIORITY
+        level = PAGERANK_DEFAULT_PRIORITY - round(math.log2(ranks[nid] * len(ranks)))
+        return max(0, min(PAGERANK_LEVELS - 1, level))
+
+    def report(
+        self, root_url: str, redirect_chains: List[Dict[str, Any]], complete: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Section "link_graph" du payload : PageRank (top), profondeur de clic,
+        pages orphelines (connues du sitemap, sans lien entrant), chaînes de redirections.
+        `complete=False` (crawl arrêté par max_pages) : une "orpheline" peut être
+        liée depuis une page non crawlée.
+        """
+        ranks = self.pagerank()
+        depth = self.depths(root_url)
+        in_deg = self.in_degree()
+        root = self.get(root_url)
+        n = len(self.urls)
+
+        crawled_depths = [depth[i] for i in range(n) if self.crawled[i]]
+        histogram = Counter(d for d in crawled_depths if d >= 0)
+        orphans = [
+            self.urls[i] for i in range(n) if self.in_sitemap[i] and in_deg[i] == 0 and i != root
+        ]
+        top = sorted((i for i in range(n) if self.crawled[i]), key=ranks.__getitem__, reverse=True)[:PAGERANK_TOP]
+
+        return {
+            "nodes": n,
+            "edges": self.edge_count,
+            "pages": len(crawled_depths),
+            "pagerank_top": [
+                {
+                    "url": self.urls[i],
+                    # Score relatif : 1.0 = page moyenne du graphe
+                    "pagerank": round(ranks[i] * n, 3),
+                    "inlinks": in_deg[i],
+                    "depth": depth[i],
+                }
+                for i in top
+            ],
+            "depth": {
+                "max": max(histogram) if histogram else 0,
+                "histogram": {str(d): histogram[d] for d in sorted(histogram)},
+                # Pages analysées qu'aucun chemin de liens ne relie à la page de départ
+                "unreachable": sum(1 for d in crawled_depths if d < 0),
+            },
+            "orphans": {"count": len(orphans), "urls": orphans[:GRAPH_REPORT_MAX], "complete": complete},
+            "redirect_chains": {"count": len(redirect_chains), "items": redirect_chains[:GRAPH_REPORT_MAX]},
+        }
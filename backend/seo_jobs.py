@@ -0,0 +1,330 @@
+# backend/seo_jobs.py
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from backend.seo_checkpoint import checkpoint_for
+from backend.seo_crawler import normalize_target_url, run_seo_scan_async, split_scan_options
+from backend.seo_encode import PROGRESS_MIN_INTERVAL_S, ProgressCoalescer, compress, json_dumps, json_dumps_bytes
+from backend.seo_store import default_store
+
+# Statuts d'un job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, ERROR, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def job_key(url: str, params: Dict[str, Any]) -> str:
+    """
+    Clé de coalescing : URL cible du crawl (normalize_target_url, qui applique
+    seo_canonical.clean_url) + paramètres du scan.
+    """
+    return normalize_target_url(url) + "|" + json.dumps(params, sort_keys=True, default=str)
+
+
+def parse_event_id(raw: Optional[str]) -> Tuple[Optional[str], int]:
+    """
+    "<job_id>:<seq>" -> (job_id, seq). (None, 0) si absent/invalide.
+    """
+    if not raw or ":" not in raw:
+        return None, 0
+    job_id, _, seq = raw.rpartition(":")
+    try:
+        return job_id, int(seq)
+    except ValueError:
+        return None, 0
+
+
+class ScanJob:
+    """
+    Un scan exécuté une seule fois, partagé par tous ses abonnés SSE.
+    Les derniers events sont gardés dans un ring buffer (reprise via Last-Event-ID),
+    déjà encodés en JSON : un event est sérialisé une fois, quel que soit le
+    nombre d'abonnés. Les events "progress" sont coalescés (ProgressCoalescer).
+    Un job `pinned` (lancé par le scheduler) n'est pas annulé quand ses abonnés partent.
+    Un abonné trop en retard (events déjà sortis du buffer) reçoit un event "resync".
+    """
+
+    def __init__(
+        self,
+        key: str,
+        url: str,
+        params: Dict[str, Any],
+        buffer_size: int,
+        progress_interval_s: float = PROGRESS_MIN_INTERVAL_S,
+        pinned: bool = False,
+    ):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.url = url
+        self.params = params
+        self.pinned = pinned
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.last_progress: Dict[str, Any] = {}
+        # (seq, event, data, data encodé en JSON)
+        self.events: Deque[Tuple[int, str, Dict[str, Any], str]] = deque(maxlen=buffer_size)
+        self.seq = 0
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        # Payload "done" (téléchargement compressé) + corps encodés par Content-Encoding
+        self.result: Optional[Dict[str, Any]] = None
+        self._result_bodies: Dict[Optional[str], bytes] = {}
+        self._progress = ProgressCoalescer(progress_interval_s)
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Remplacé à chaque changement : les abonnés attendent l'event courant
+        self._changed = asyncio.Event()
+
+    async def publish(self, event: str, data: Dict[str, Any]) -> None:
+        loop = asyncio.get_running_loop()
+        if event == "progress":
+            self.last_progress = data
+            data = self._progress.offer(data, loop.time())
+            if data is None:
+                # Dernier état gardé : envoyé à l'échéance s'il n'est pas remplacé d'ici là
+                flush_at = self._progress.flush_at()
+                if flush_at is not None and self._flush_handle is None:
+                    self._flush_handle = loop.call_at(flush_at, self._flush_progress)
+                return
+        else:
+            self._flush_progress()
+            if event == "done":
+                self.result = data
+        self._append(event, data)
+
+    def _flush_progress(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        data = self._progress.flush(asyncio.get_running_loop().time())
+        if data is not None:
+            self._append("progress", data)
+
+    def _append(self, event: str, data: Dict[str, Any]) -> None:
+        self.seq += 1
+        self.events.append((self.seq, event, data, json_dumps(data)))
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def finish(self, status: str) -> None:
+        self._flush_progress()
+        self.status = status
+        self.finished_at = time.time()
+        self._notify()
+
+    def result_body(self, encoding: Optional[str] = None) -> bytes:
+        """
+        Payload "done" encodé en JSON puis compressé (`encoding` : "br", "gzip" ou
+        None), calculé une fois par encodage.
+        """
+        if self.result is None:
+            raise ValueError("Scan job has no result")
+        body = self._result_bodies.get(encoding)
+        if body is None:
+            body = self._result_bodies[encoding] = compress(json_dumps_bytes(self.result), encoding)
+        return body
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.id}:{seq}"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "url": self.url,
+            "params": self.params,
+            "status": self.status,
+            "progress": self.last_progress.get("progress", 0),
+            "label": self.last_progress.get("label", ""),
+            "subscribers": self.subscribers,
+            "pinned": self.pinned,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    async def subscribe(self, after_seq: int = 0) -> AsyncIterator[Tuple[int, str, Dict[str, Any], str]]:
+        """
+        Events (seq, event, data, JSON) de seq > after_seq (ceux encore dans le
+        buffer), puis les suivants en direct.
+        Si des events manquants sont déjà sortis du buffer, un event "resync" (seq
+        du dernier event perdu) les signale avant la suite.
+        Se termine quand le job est fini et que tout a été envoyé.
+        """
+        last = after_seq
+        while True:
+            if last < self.seq and self.events:
+                first = self.events[0][0]
+                if first > last + 1:
+                    missed, last = first - 1 - last, first - 1
+                    yield self._resync_event(last, missed)
+                # seq contigus dans le buffer : les nouveaux events sont les `seq - last`
+                # derniers (indexés depuis la fin, sans parcourir tout le buffer)
+                new = [self.events[i] for i in range(last - self.seq, 0)]
+                last = self.seq
+                for item in new:
+                    yield item
+            if self.status in FINISHED and last >= self.seq:
+                return
+            if last >= self.seq:
+                await self._changed.wait()
+
+    def _resync_event(self, seq: int, missed: int) -> Tuple[int, str, Dict[str, Any], str]:
+        # Dernier état connu : le client reprend l'affichage, les issues manquées
+        # (mode streaming) se relisent via issues_handle
+        data = {
+            "missed": missed,
+            "status": self.status,
+            "progress": self.last_progress.get("progress", 0),
+            "label": self.last_progress.get("label", ""),
+        }
+        return seq, "resync", data, json_dumps(data)
+
+
+class ScanJobManager:
+    """
+    Gestion des scans côté API :
+    - un job par (URL normalisée, paramètres) en cours : les demandes identiques sont fusionnées
+    - au plus `max_running` crawls simultanés, `max_queued` en attente (au-delà : JobQueueFull)
+    - events bufferisés (ring buffer) pour reprendre un flux après une coupure ;
+      "progress" limités à un toutes les `progress_interval_s` secondes
+    - un job sans abonné pendant `orphan_grace_s` est annulé (sauf job `pinned`) ;
+      les jobs finis restent consultables `retention_s` secondes
+    - avec `checkpoint_dir`, chaque crawl est checkpointé (seo_checkpoint) : un job
+      interrompu (annulé, worker redémarré) puis relancé à l'identique reprend
+      où il en était
+    """
+
+    def __init__(
+        self,
+        max_running: int = 4,
+        max_queued: int = 50,
+        buffer_size: int = 500,
+        retention_s: float = 600.0,
+        orphan_grace_s: float = 60.0,
+        checkpoint_dir: Optional[str] = None,
+        progress_interval_s: float = PROGRESS_MIN_INTERVAL_S,
+    ):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.buffer_size = buffer_size
+        self.retention_s = retention_s
+        self.orphan_grace_s = orphan_grace_s
+        self.checkpoint_dir = checkpoint_dir
+        self.progress_interval_s = progress_interval_s
+        # Client httpx longue durée partagé par les scans (cf. lifespan de l'app),
+        # None = un client par scan
+        self.client = None
+        # Règles d'alerte (seo_rules) évaluées pendant chaque scan, None = pas d'alertes
+        self.rules = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._jobs: Dict[str, ScanJob] = {}
+        self._inflight: Dict[str, ScanJob] = {}
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Créé à la demande, dans la boucle de l'app
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_running)
+        return self._slots
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        self._purge()
+        return list(self._jobs.values())
+
+    def inflight(self) -> int:
+        # Jobs en cours ou en attente d'un créneau
+        return len(self._inflight)
+
+    def _purge(self) -> None:
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.retention_s:
+                del self._jobs[job_id]
+
+    def submit(self, url: str, pinned: bool = False, **params) -> Tuple[ScanJob, bool]:
+        """
+        Retourne (job, coalesced). coalesced=True si un job identique était déjà en cours.
+        `pinned` : job sans propriétaire SSE (scheduler), mené à terme même sans abonné ;
+        un job fusionné avec une demande "pinned" le devient aussi.
+        """
+        self._purge()
+        key = job_key(url, params)
+        job = self._inflight.get(key)
+        if job is not None:
+            job.pinned = job.pinned or pinned
+            return job, True
+
+        queued = sum(1 for j in self._inflight.values() if j.status == QUEUED)
+        if queued >= self.max_queued:
+            raise JobQueueFull(f"Scan queue is full ({self.max_queued} waiting)")
+
+        job = ScanJob(key, url, params, self.buffer_size, self.progress_interval_s, pinned=pinned)
+        self._jobs[job.id] = job
+        self._inflight[key] = job
+        job.task = asyncio.create_task(self._run(job))
+        return job, False
+
+    async def _run(self, job: ScanJob) -> None:
+        status = ERROR
+        try:
+            await job.publish("progress", {"progress": 1, "label": "Queued"})
+            async with self._semaphore():
+                job.status = RUNNING
+                # Clé du job = URL + paramètres : même checkpoint pour le même scan
+                checkpoint = checkpoint_for(job.key, self.checkpoint_dir) if self.checkpoint_dir else None
+                options, params = split_scan_options(job.params, checkpoint=checkpoint, rules=self.rules)
+                scan = run_seo_scan_async(
+                    raw_url=job.url, store=default_store(), client=self.client, options=options, **params
+                )
+                async for event, data in scan:
+                    await job.publish(event, data)
+            status = DONE
+        except asyncio.CancelledError:
+            status = CANCELLED
+        except Exception as e:
+            await job.publish("error", {"message": str(e)})
+        finally:
+            self._inflight.pop(job.key, None)
+            await job.finish(status)
+
+    def cancel(self, job: ScanJob) -> None:
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+
+    async def stream(self, job: ScanJob, after_seq: int = 0) -> AsyncIterator[Tuple[int, str, Dict[str, Any], str]]:
+        """
+        Abonnement à un job. Quand le dernier abonné part, le job (non "pinned") est
+        annulé s'il n'a toujours aucun abonné après `orphan_grace_s` (le temps de se reconnecter).
+        """
+        job.subscribers += 1
+        try:
+            async for item in job.subscribe(after_seq):
+                yield item
+        finally:
+            job.subscribers -= 1
+            if job.subscribers == 0 and job.status not in FINISHED and not job.pinned:
+                asyncio.get_running_loop().call_later(self.orphan_grace_s, self._cancel_if_orphan, job)
+
+    def _cancel_if_orphan(self, job: ScanJob) -> None:
+        # Re-vérifié à l'échéance : le job a pu être fusionné avec un scan planifié entre-temps
+        if job.subscribers == 0 and not job.pinned:
+            self.cancel(job)
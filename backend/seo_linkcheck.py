@@ -0,0 +1,148 @@
+# backend/seo_linkcheck.py
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, Dict, Iterable, List, Optional
+
+import httpx
+
+from backend.seo_canonical import url_key
+from backend.seo_throttle import MAX_THROTTLE_RETRIES, THROTTLE_STATUSES
+from backend.seo_transport import release_response
+
+
+class LinkChecker:
+    """
+    Vérification des liens internes, dédupliquée sur tout le scan.
+
+    - un résultat par cible (clé canonique), partagé par toutes les pages qui la référencent
+    - les URLs déjà récupérées pendant le crawl sont enregistrées via `record()`
+      et ne sont jamais re-demandées
+    - les cibles restantes sont vérifiées en parallèle (HEAD, fallback GET sans
+      télécharger le corps), refaites sur 429 / 503 (back-pressure du serveur)
+
+    Résultat : {"status": int} ou {"status": "error", "error": str}
+    `tracer` (ScanTracer, optionnel) : phases HTTP de chaque vérification.
+    `key_fn` : clé de dédup, celle du Canonicalizer du scan.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        limiter,
+        concurrency: int = 8,
+        tracer=None,
+        key_fn: Callable[[str], str] = url_key,
+    ):
+        self.client = client
+        self.limiter = limiter
+        self.tracer = tracer
+        self.key = key_fn
+        self._sem = asyncio.Semaphore(max(1, int(concurrency)))
+        self._results: Dict[str, Dict] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def record(self, url: str, status, error: Optional[str] = None) -> None:
+        """
+        Enregistre un résultat déjà connu (page fetchée pendant le crawl).
+        """
+        res = {"status": status}
+        if error is not None:
+            res["error"] = error
+        self._results[self.key(url)] = res
+
+    def get(self, url: str) -> Optional[Dict]:
+        return self._results.get(self.key(url))
+
+    # Checkpoint : résultats connus (clé canonique -> résultat)
+    def state(self) -> Dict[str, Dict]:
+        return dict(self._results)
+
+    def restore(self, results: Dict[str, Dict]) -> None:
+        self._results.update(results)
+
+    def pending_targets(self, urls: Iterable[str]) -> List[str]:
+        """
+        Cibles uniques de `urls` qui n'ont pas encore de résultat.
+        """
+        out = []
+        seen = set()
+        for u in urls:
+            k = self.key(u)
+            if k in seen or k in self._results:
+                continue
+            seen.add(k)
+            out.append(u)
+        return out
+
+    async def _send(self, method: str, url: str) -> httpx.Response:
+        # Seul le statut compte : la réponse est fermée sans lire le corps
+        rt = self.tracer.request("link_check") if self.tracer is not None else None
+        status = "error"
+        try:
+            request = self.client.build_request(method, url, extensions=rt.extensions if rt else None)
+            rr = await self.client.send(request, stream=True)
+            await release_response(rr)
+            status = rr.status_code
+            return rr
+        finally:
+            if rt is not None:
+                rt.finish(status)
+
+    async def _request(self, url: str) -> httpx.Response:
+        async with self._sem:
+            # 429 / 503 : refait (le limiter applique Retry-After / backoff du host)
+            retries = MAX_THROTTLE_RETRIES if self.limiter.adaptive else 0
+            for _ in range(retries + 1):
+                async with self.limiter.slot(url) as slot:
+                    # HEAD puis fallback GET si HEAD bloqué
+                    rr = await self._send("HEAD", url)
+                    if rr.status_code in (405, 403) or rr.status_code >= 500:
+                        rr = await self._send("GET", url)
+                    slot.record(rr.status_code, rr.headers.get("retry-after"))
+                if rr.status_code not in THROTTLE_STATUSES:
+                    break
+            return rr
+
+    async def _run(self, url: str) -> Dict:
+        try:
+            rr = await self._request(url)
+            self.record(url, rr.status_code)
+        except Exception as e:
+            self.record(url, "error", str(e))
+        finally:
+            self._inflight.pop(self.key(url), None)
+        return self._results[self.key(url)]
+
+    def check(self, url: str) -> "asyncio.Future[Dict]":
+        """
+        Lance (ou réutilise) la vérification de `url`. Retourne un awaitable du résultat.
+        """
+        k = self.key(url)
+        if k in self._results:
+            fut = asyncio.get_running_loop().create_future()
+            fut.set_result(self._results[k])
+            return fut
+        task = self._inflight.get(k)
+        if task is None:
+            task = self._inflight[k] = asyncio.create_task(self._run(url))
+        return task
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def cancel(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+
+
+def is_broken(result: Optional[Dict]) -> bool:
+    if not result:
+        return False
+    status = result.get("status")
+    return status == "error" or (isinstance(status, int) and status >= 400)
@@ -0,0 +1,262 @@
+# backend/seo_resolver.py
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import os
+import socket
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import httpx
+
+# Dev / bench uniquement : autorise localhost et les IP privées
+ALLOW_PRIVATE_HOSTS = os.getenv("SEO_ALLOW_PRIVATE_HOSTS") == "1"
+
+
+class BlockedHostError(httpx.ConnectError):
+    """
+    Requête refusée : host local/privé ou DNS invalide (protection SSRF).
+    """
+
+
+def ip_is_blocked(ip: str) -> bool:
+    ip_obj = ipaddress.ip_address(ip)
+    return (
+        ip_obj.is_private
+        or ip_obj.is_loopback
+        or ip_obj.is_link_local
+        or ip_obj.is_multicast
+        or ip_obj.is_reserved
+        or ip_obj.is_unspecified
+    )
+
+
+@dataclass(frozen=True)
+class HostResolution:
+    host: str
+    ips: Tuple[str, ...]
+    blocked: bool
+    reason: str
+    expires_at: float
+
+
+class HostResolver:
+    """
+    Résolution DNS async + validation SSRF, avec cache LRU à TTL.
+
+    - résultats positifs gardés `ttl_s`, négatifs (bloqué / DNS en échec) `negative_ttl_s`
+      (getaddrinfo ne donne pas le TTL DNS : ce sont des plafonds configurables)
+    - les résolutions simultanées d'un même host sont fusionnées
+    - bloque localhost / IP privées, loopback, link-local, multicast, réservées
+    """
+
+    def __init__(
+        self,
+        ttl_s: float = 300.0,
+        negative_ttl_s: float = 60.0,
+        max_entries: int = 4096,
+        allow_private: bool = ALLOW_PRIVATE_HOSTS,
+    ):
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.max_entries = max_entries
+        self.allow_private = allow_private
+        self._cache: "OrderedDict[str, HostResolution]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _remember(self, res: HostResolution) -> HostResolution:
+        self._cache[res.host] = res
+        self._cache.move_to_end(res.host)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return res
+
+    def _result(self, host: str, ips: Tuple[str, ...], blocked: bool, reason: str = "") -> HostResolution:
+        ttl = self.negative_ttl_s if blocked else self.ttl_s
+        return HostResolution(host, ips, blocked, reason, time.monotonic() + ttl)
+
+    async def _lookup(self, host: str) -> HostResolution:
+        # Block obvious local hostnames
+        if host in ("localhost",) and not self.allow_private:
+            return self._result(host, (), True, "localhost")
+
+        # If host is already an IP
+        try:
+            ipaddress.ip_address(host)
+            blocked = ip_is_blocked(host) and not self.allow_private
+            return self._result(host, (host,), blocked, "private ip" if blocked else "")
+        except ValueError:
+            pass
+
+        # Domain -> resolve IPs -> block if any is private/loopback/etc
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except (OSError, UnicodeError) as e:
+            # If DNS fails -> refuse
+            return self._result(host, (), True, f"dns error: {e}")
+
+        ips = tuple(dict.fromkeys(info[4][0] for info in infos))
+        if not ips:
+            return self._result(host, (), True, "no address")
+        if not self.allow_private and any(ip_is_blocked(ip) for ip in ips):
+            return self._result(host, ips, True, "private ip")
+        return self._result(host, ips, False)
+
+    async def resolve(self, host: str) -> HostResolution:
+        host = (host or "").strip().lower().rstrip(".")
+
+        res = self._cache.get(host)
+        if res is not None:
+            if res.expires_at > time.monotonic():
+                self._cache.move_to_end(host)
+                return res
+            del self._cache[host]
+
+        fut = self._inflight.get(host)
+        if fut is None:
+            fut = self._inflight[host] = asyncio.ensure_future(self._lookup(host))
+            fut.add_done_callback(lambda f, h=host: self._lookup_done(h, f))
+        return await asyncio.shield(fut)
+
+    def _lookup_done(self, host: str, fut: asyncio.Future) -> None:
+        self._inflight.pop(host, None)
+        if not fut.cancelled() and fut.exception() is None:
+            self._remember(fut.result())
+
+    async def is_blocked(self, host: str) -> bool:
+        return (await self.resolve(host)).blocked
+
+
+_default_resolver: Optional[HostResolver] = None
+
+
+def default_resolver() -> HostResolver:
+    global _default_resolver
+    if _default_resolver is None:
+        _default_resolver = HostResolver()
+    return _default_resolver
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """
+    Corps d'une réponse : `release` est appelé (une fois) à sa fermeture.
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], Awaitable[None]]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                await self._release()
+
+
+class PinnedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport httpx qui valide chaque host (requête initiale + redirections)
+    via le HostResolver, puis se connecte à l'IP validée au lieu de re-résoudre :
+    pas de fenêtre de DNS rebinding entre la validation et la connexion. Si la
+    connexion échoue, les autres IP validées sont essayées dans l'ordre.
+
+    Le header Host et le SNI TLS gardent le vrai nom. Un pool de connexions
+    par host (borné) évite de réutiliser une session TLS d'un autre vhost ; un
+    pool évincé n'est fermé qu'une fois ses réponses en cours fermées.
+    """
+
+    def __init__(self, resolver: Optional[HostResolver] = None, max_hosts: int = 64, **transport_kwargs):
+        self.resolver = resolver or default_resolver()
+        self.max_hosts = max_hosts
+        self.transport_kwargs = transport_kwargs
+        self._transports: "OrderedDict[str, httpx.AsyncHTTPTransport]" = OrderedDict()
+        # Requêtes en cours par transport (jusqu'à la fermeture de la réponse)
+        self._active: Dict[httpx.AsyncHTTPTransport, int] = {}
+        # Évincés du LRU mais encore utilisés : fermés à la dernière réponse
+        self._retired: Set[httpx.AsyncHTTPTransport] = set()
+
+    async def _acquire(self, host: str) -> httpx.AsyncHTTPTransport:
+        t = self._transports.get(host)
+        if t is None:
+            t = self._transports[host] = httpx.AsyncHTTPTransport(**self.transport_kwargs)
+        else:
+            self._transports.move_to_end(host)
+        self._active[t] = self._active.get(t, 0) + 1
+        while len(self._transports) > self.max_hosts:
+            _, old = self._transports.popitem(last=False)
+            if old in self._active:
+                self._retired.add(old)
+            else:
+                await old.aclose()
+        return t
+
+    async def _release(self, t: httpx.AsyncHTTPTransport) -> None:
+        n = self._active.get(t, 0) - 1
+        if n > 0:
+            self._active[t] = n
+            return
+        self._active.pop(t, None)
+        if t in self._retired:
+            self._retired.discard(t)
+            await t.aclose()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        # Même convention que les events "trace" de httpcore (phase DNS du ScanTracer)
+        trace = request.extensions.get("trace")
+        if trace is not None:
+            await trace("dns.resolve.started", {"host": host})
+        res = await self.resolver.resolve(host)
+        if trace is not None:
+            await trace("dns.resolve.complete", {"host": host, "blocked": res.blocked})
+        if res.blocked:
+            raise BlockedHostError(f"Blocked host {host} ({res.reason})", request=request)
+
+        transport = await self._acquire(host)
+        try:
+            for i, ip in enumerate(res.ips):
+                try:
+                    response = await transport.handle_async_request(self._pinned(request, host, ip))
+                    break
+                except httpx.ConnectError:
+                    # Host dual-stack (IPv6 injoignable...) : IP validée suivante
+                    if i == len(res.ips) - 1:
+                        raise
+        except BaseException:
+            await self._release(transport)
+            raise
+        response.stream = _ReleasingStream(response.stream, lambda: self._release(transport))
+        return response
+
+    @staticmethod
+    def _pinned(request: httpx.Request, host: str, ip: str) -> httpx.Request:
+        if ip == host:
+            return request
+        # Copie de la requête vers l'IP : l'original (redirections, response.url) reste intact
+        extensions = dict(request.extensions)
+        if request.url.scheme == "https":
+            extensions["sni_hostname"] = host
+        return httpx.Request(
+            request.method,
+            request.url.copy_with(host=ip),
+            headers=request.headers,
+            stream=request.stream,
+            extensions=extensions,
+        )
+
+    async def aclose(self) -> None:
+        for t in list(self._transports.values()) + list(self._retired):
+            await t.aclose()
+        self._transports.clear()
+        self._retired.clear()
+        self._active.clear()
@@ -0,0 +1,333 @@
+# backend/seo_results.py
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from backend.seo_checkpoint import pack_bytes, unpack_bytes
+from backend.seo_columns import PageColumns, score_pages
+from backend.seo_store import ScanStore
+
+# Types d'issues, dans l'ordre du payload "issues"
+ISSUE_TYPES = (
+    "missing_meta_descriptions",
+    "broken_links",
+    "duplicate_titles",
+    "thin_pages",
+    "missing_h1",
+    "canonicalized",
+    "near_duplicates",
+)
+
+# Résultats "spoolés" sur disque (mode streaming) : un fichier SQLite par scan
+RESULTS_DIR = os.getenv("SEO_RESULTS_DIR") or os.path.join(tempfile.gettempdir(), "seo-results")
+RESULTS_RETENTION_S = 24 * 3600
+RESULTS_PAGE_MAX = 1000
+
+SCAN_ID_RE = re.compile(r"^[0-9a-f]{12}$")
+
+
+def _is_critical(kind: str, item: Dict[str, Any]) -> bool:
+    status = item.get("status")
+    return kind == "broken_links" and isinstance(status, int) and status >= 400
+
+
+class ScanResults:
+    """
+    Collecteur des résultats d'un scan, en mémoire (comportement historique) :
+    toutes les issues et le graphe de liens sont gardés puis renvoyés dans "done".
+    Les pages analysées alimentent aussi des colonnes (seo_columns) dont sont
+    tirés KPIs et score ; `scan_id` les identifie dans l'historique (ScanStore).
+    """
+
+    streaming = False
+
+    def __init__(self, scan_id: Optional[str] = None):
+        self.scan_id = scan_id or uuid.uuid4().hex[:12]
+        self.pages = 0
+        self.counts: Dict[str, int] = {t: 0 for t in ISSUE_TYPES}
+        self.critical = 0
+        self.columns = PageColumns()
+        self._issues: Dict[str, Any] = {t: [] for t in ISSUE_TYPES}
+        self._titles: Dict[str, List[str]] = {}
+        self._links: List[Tuple[str, List[str]]] = []
+
+    def add_issue(self, kind: str, item: Dict[str, Any]) -> None:
+        self.counts[kind] += 1
+        self.critical += _is_critical(kind, item)
+        self._issues[kind].append(item)
+
+    def add_page(
+        self, url: str, title: str, links: List[str], word_count: int = 0, h1_count: int = 0, has_meta: bool = False
+    ) -> None:
+        self.pages += 1
+        title = (title or "").strip()
+        self.columns.add(word_count, h1_count, has_meta, title)
+        if title:
+            self._titles.setdefault(title, []).append(url)
+        self._links.append((url, links))
+
+    def iter_links(self) -> Iterator[Tuple[str, str]]:
+        """
+        Arêtes (page, lien interne) de toutes les pages analysées.
+        """
+        for src, links in self._links:
+            for dst in links:
+                yield src, dst
+
+    def finish(self) -> None:
+        # Groupes de titres dupliqués
+        self._issues["duplicate_titles"] = {t: urls for t, urls in self._titles.items() if len(urls) > 1}
+        self.counts["duplicate_titles"] = len(self._issues["duplicate_titles"])
+
+    def drain(self) -> List[Tuple[str, Dict[str, Any]]]:
+        # Rien à émettre au fil de l'eau : tout part dans "done"
+        return []
+
+    def payload(self) -> Dict[str, Any]:
+        return {"issues": self._issues}
+
+    # Checkpoint (seo_checkpoint) : compteurs + colonnes, et ici tout le contenu
+    def state(self) -> Dict[str, Any]:
+        return {
+            **self._state_counters(),
+            "issues": self._issues,
+            "titles": self._titles,
+            "links": self._links,
+        }
+
+    def _state_counters(self) -> Dict[str, Any]:
+        return {
+            "streaming": self.streaming,
+            "scan_id": self.scan_id,
+            "pages": self.pages,
+            "counts": self.counts,
+            "critical": self.critical,
+            "columns": pack_bytes(self.columns.to_bytes(titles=True)),
+        }
+
+    def _restore_counters(self, state: Dict[str, Any]) -> None:
+        self.pages = state["pages"]
+        self.counts = {t: state["counts"].get(t, 0) for t in ISSUE_TYPES}
+        self.critical = state["critical"]
+        self.columns = PageColumns.from_bytes(unpack_bytes(state["columns"]))
+
+    def close(self) -> None:
+        pass
+
+
+class SpooledResults(ScanResults):
+    """
+    Mode streaming pour les gros crawls : chaque issue est écrite sur disque
+    (et émise via drain()), le graphe de liens et les titres aussi ; en mémoire
+    il ne reste que des compteurs et les colonnes de pages (quelques octets par
+    page). "done" ne porte qu'un handle (`scan_id`)
+    pour relire les issues page par page (read_issues).
+    """
+
+    streaming = True
+
+    def __init__(self, directory: str = RESULTS_DIR, scan_id: Optional[str] = None):
+        super().__init__(scan_id)
+        os.makedirs(directory, exist_ok=True)
+        purge_results(directory)
+        self.path = results_path(self.scan_id, directory)
+        self._new: List[Tuple[str, Dict[str, Any]]] = []
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        # Fichier temporaire : la durabilité n'a pas d'intérêt
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS issues (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, data TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS issues_kind ON issues (kind, id);
+            CREATE TABLE IF NOT EXISTS links (src TEXT NOT NULL, dst TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS titles (title TEXT NOT NULL, url TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """
+        )
+
+    def add_issue(self, kind: str, item: Dict[str, Any]) -> None:
+        self.counts[kind] += 1
+        self.critical += _is_critical(kind, item)
+        self._db.execute("INSERT INTO issues (kind, data) VALUES (?, ?)", (kind, json.dumps(item)))
+        self._new.append((kind, item))
+
+    def add_page(
+        self, url: str, title: str, links: List[str], word_count: int = 0, h1_count: int = 0, has_meta: bool = False
+    ) -> None:
+        self.pages += 1
+        title = (title or "").strip()
+        self.columns.add(word_count, h1_count, has_meta, title)
+        if title:
+            self._db.execute("INSERT INTO titles (title, url) VALUES (?, ?)", (title, url))
+        self._db.executemany("INSERT INTO links (src, dst) VALUES (?, ?)", ((url, dst) for dst in links))
+
+    def iter_links(self) -> Iterator[Tuple[str, str]]:
+        self._db.commit()
+        # Curseur dédié : les insertions d'issues pendant l'itération ne le perturbent pas
+        yield from self._db.cursor().execute("SELECT src, dst FROM links ORDER BY rowid")
+
+    def finish(self) -> None:
+        self._db.execute("CREATE INDEX IF NOT EXISTS titles_title ON titles (title)")
+        groups = self._db.execute(
+            "SELECT title, json_group_array(url) FROM titles GROUP BY title HAVING COUNT(*) > 1"
+        ).fetchall()
+        for title, urls in groups:
+            self.add_issue("duplicate_titles", {"title": title, "urls": json.loads(urls)})
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('counts', ?)", (json.dumps(self.counts),)
+        )
+        self._db.commit()
+
+    def drain(self) -> List[Tuple[str, Dict[str, Any]]]:
+        self._db.commit()
+        new, self._new = self._new, []
+        return new
+
+    def payload(self) -> Dict[str, Any]:
+        return {"issues_handle": {"scan_id": self.scan_id, "counts": dict(self.counts)}}
+
+    def state(self) -> Dict[str, Any]:
+        # Le contenu est déjà sur disque : on note jusqu'où (rowid) il est couvert
+        self._db.commit()
+        marks = {
+            table: self._db.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+            for table in _SPOOLED_TABLES
+        }
+        return {**self._state_counters(), "marks": marks}
+
+    def close(self) -> None:
+        self._db.commit()
+        self._db.close()
+
+
+# Tables "append" d'un scan spoolé, tronquées au checkpoint à la reprise
+_SPOOLED_TABLES = ("issues", "links", "titles")
+
+
+def restore_results(state: Dict[str, Any], directory: str = RESULTS_DIR) -> Optional[ScanResults]:
+    """
+    Collecteur repris d'un checkpoint (`ScanResults.state()`). Mode streaming :
+    le fichier du scan est rouvert et ce qui a été écrit après le checkpoint est
+    supprimé (sera refait). None si ce fichier n'existe plus.
+    """
+    if state.get("streaming"):
+        try:
+            path = results_path(state.get("scan_id", ""), directory)
+        except ValueError:
+            return None
+        if not os.path.exists(path):
+            return None
+        results = SpooledResults(directory, scan_id=state["scan_id"])
+        for table in _SPOOLED_TABLES:
+            results._db.execute(f"DELETE FROM {table} WHERE rowid > ?", (state["marks"].get(table, 0),))
+        results._db.commit()
+    else:
+        results = ScanResults(scan_id=state.get("scan_id"))
+        results._issues = {t: state["issues"].get(t, []) for t in ISSUE_TYPES}
+        results._titles = state["titles"]
+        results._links = [(src, links) for src, links in state["links"]]
+    results._restore_counters(state)
+    return results
+
+
+def results_path(scan_id: str, directory: str = RESULTS_DIR) -> str:
+    if not SCAN_ID_RE.match(scan_id or ""):
+        raise ValueError("Invalid scan id")
+    return os.path.join(directory, f"{scan_id}.db")
+
+
+def purge_results(directory: str = RESULTS_DIR, retention_s: float = RESULTS_RETENTION_S) -> None:
+    limit = time.time() - retention_s
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < limit:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def read_issues(
+    scan_id: str,
+    kind: Optional[str] = None,
+    cursor: int = 0,
+    limit: int = 100,
+    directory: str = RESULTS_DIR,
+) -> Optional[Dict[str, Any]]:
+    """
+    Une page d'issues d'un scan spoolé (id > cursor). None si le scan est inconnu.
+    `next_cursor` vaut None quand il n'y a plus rien à lire.
+    """
+    try:
+        path = results_path(scan_id, directory)
+    except ValueError:
+        return None
+    if not os.path.exists(path):
+        return None
+
+    limit = max(1, min(RESULTS_PAGE_MAX, int(limit)))
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        row = db.execute("SELECT value FROM meta WHERE key = 'counts'").fetchone()
+        if kind:
+            rows = db.execute(
+                "SELECT id, kind, data FROM issues WHERE kind = ? AND id > ? ORDER BY id LIMIT ?",
+                (kind, cursor, limit),
+            ).fetchall()
+        else:
+            rows = db.execute(
+                "SELECT id, kind, data FROM issues WHERE id > ? ORDER BY id LIMIT ?", (cursor, limit)
+            ).fetchall()
+    finally:
+        db.close()
+
+    return {
+        "scan_id": scan_id,
+        # counts absent tant que le scan n'est pas terminé
+        "finished": row is not None,
+        "counts": json.loads(row[0]) if row else None,
+        "items": [{"type": k, **json.loads(data)} for _, k, data in rows],
+        "next_cursor": rows[-1][0] if len(rows) == limit else None,
+    }
+
+
+def rescore_scan(
+    store: ScanStore,
+    scan_id: str,
+    thin_words_threshold: int = 250,
+    weights: Optional[Mapping[str, float]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    KPIs + score d'un scan terminé (historique du ScanStore), recalculés sur ses
+    colonnes de pages avec un autre seuil "thin" / d'autres poids. None si le
+    scan est inconnu, sorti de l'historique ou d'un format antérieur.
+    """
+    stored = store.get_scan(scan_id)
+    if stored is None:
+        return None
+    try:
+        columns = PageColumns.from_bytes(stored.columns)
+    except ValueError:
+        return None
+    result = score_pages(
+        columns,
+        thin_words_threshold=thin_words_threshold,
+        broken_links=stored.broken_links,
+        critical_broken=stored.critical_broken,
+        weights=weights,
+    )
+    return {
+        "scan_id": scan_id,
+        "target_url": stored.target,
+        "thin_words_threshold": thin_words_threshold,
+        **result,
+    }
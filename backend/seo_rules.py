@@ -0,0 +1,515 @@
+# backend/seo_rules.py
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import accumulate
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+# Règles d'alerte : "métrique opérateur seuil" + priorité, comme les pages
+# Rules / Alerts du front. Portée déduite de la métrique : page (évaluée sur
+# chaque page analysée) ou scan (agrégats du scan)
+PAGE_METRICS = (
+    "status",
+    "depth",
+    "word_count",
+    "h1_count",
+    "has_meta",
+    "title_length",
+    "internal_links",
+)
+SCAN_METRICS = (
+    "pages_crawled",
+    "broken_links",
+    "critical_broken",
+    "missing_meta_descriptions",
+    "missing_h1",
+    "thin_pages",
+    "duplicate_titles",
+    "missing_meta_ratio",
+    "missing_h1_ratio",
+    "thin_pages_ratio",
+    "health_score",
+)
+# Compteurs qui ne font que croître pendant un scan : une règle ">" / ">=" sur
+# l'un d'eux peut déclencher dès que le seuil est franchi (les autres : en fin de scan)
+MONOTONIC_METRICS = frozenset({
+    "pages_crawled",
+    "broken_links",
+    "critical_broken",
+    "missing_meta_descriptions",
+    "missing_h1",
+    "thin_pages",
+    "duplicate_titles",
+})
+
+OPERATORS = (">", ">=", "<", "<=", "==", "!=")
+PRIORITIES = ("P0", "P1", "P2")
+SEVERITIES = {"P0": "critical", "P1": "warning", "P2": "info"}
+
+RULE_ID_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+RULES_MAX = 10000
+# URLs d'exemple gardées par alerte "page"
+ALERT_SAMPLE_URLS = 5
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"id": "health-critical", "name": "Health score critical", "metric": "health_score",
+     "operator": "<", "threshold": 50, "priority": "P0"},
+    {"id": "broken-internal-links", "name": "Broken internal links", "metric": "critical_broken",
+     "operator": ">", "threshold": 0, "priority": "P0"},
+    {"id": "missing-meta", "name": "Meta descriptions missing on > 20% of pages", "metric": "missing_meta_ratio",
+     "operator": ">", "threshold": 0.2, "priority": "P1"},
+    {"id": "deep-pages", "name": "Pages more than 4 clicks deep", "metric": "depth",
+     "operator": ">", "threshold": 4, "priority": "P2"},
+]
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    name: str
+    metric: str
+    operator: str
+    threshold: float
+    priority: str = "P1"
+    # Hosts concernés (None = tous les sites)
+    sites: Optional[Tuple[str, ...]] = None
+    enabled: bool = True
+
+    def __post_init__(self):
+        if not RULE_ID_RE.match(self.id or ""):
+            raise ValueError(f"Invalid rule id: {self.id!r}")
+        if self.metric not in PAGE_METRICS and self.metric not in SCAN_METRICS:
+            raise ValueError(f"Unknown metric in rule {self.id}: {self.metric}")
+        if self.operator not in OPERATORS:
+            raise ValueError(f"Unknown operator in rule {self.id}: {self.operator}")
+        if self.priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority in rule {self.id}: {self.priority}")
+
+    @property
+    def scope(self) -> str:
+        return "page" if self.metric in PAGE_METRICS else "scan"
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Rule":
+        sites = data.get("sites")
+        return cls(
+            id=str(data.get("id", "")),
+            name=str(data.get("name") or data.get("id", "")),
+            metric=str(data.get("metric", "")),
+            operator=str(data.get("operator", "")),
+            threshold=float(data.get("threshold", 0)),
+            priority=str(data.get("priority", "P1")),
+            sites=tuple(sorted(s.lower() for s in sites)) if sites else None,
+            enabled=bool(data.get("enabled", True)),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["sites"] = list(self.sites) if self.sites else None
+        d["scope"] = self.scope
+        return d
+
+
+# =========================
+# Compilation : index de seuils par (métrique, opérateur)
+# =========================
+# Opérateurs d'ordre : les règles vérifiées par une valeur sont un préfixe (">", ">=")
+# ou un suffixe ("<", "<=") de la liste triée par seuil
+PREFIX_OPERATORS = (">", ">=")
+SUFFIX_OPERATORS = ("<", "<=")
+# Borne de la tranche : bisect de la valeur dans les seuils triés
+OPERATOR_BISECT = {">": bisect_left, ">=": bisect_right, "<": bisect_right, "<=": bisect_left}
+
+
+class MetricIndex:
+    """
+    Règles d'une métrique, compilées en seuils triés par opérateur : les règles
+    vérifiées par une valeur sont une tranche (bisect), sans tester chaque règle.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        by_op: Dict[str, List[Rule]] = defaultdict(list)
+        for rule in rules:
+            by_op[rule.operator].append(rule)
+        self.ranges: Dict[str, Tuple[List[float], List[Rule]]] = {}
+        for op in PREFIX_OPERATORS + SUFFIX_OPERATORS:
+            ordered = sorted(by_op.get(op, ()), key=lambda r: r.threshold)
+            if ordered:
+                self.ranges[op] = ([r.threshold for r in ordered], ordered)
+        self.eq: Dict[float, List[Rule]] = defaultdict(list)
+        for rule in by_op.get("==", ()):
+            self.eq[rule.threshold].append(rule)
+        self.ne: List[Rule] = by_op.get("!=", [])
+
+    def span(self, op: str, value: float) -> Tuple[int, int]:
+        """
+        Tranche [début, fin) des règles `op` vérifiées par `value`.
+        """
+        ts = self.ranges[op][0]
+        i = OPERATOR_BISECT[op](ts, value)
+        return (0, i) if op in PREFIX_OPERATORS else (i, len(ts))
+
+    def matches(self, value: float) -> List[Rule]:
+        out: List[Rule] = []
+        for op, (_, rules) in self.ranges.items():
+            start, end = self.span(op, value)
+            out.extend(rules[start:end])
+        out.extend(self.eq.get(value, ()))
+        out.extend(r for r in self.ne if r.threshold != value)
+        return out
+
+
+class CompiledRules:
+    """
+    Règles actives pour un host, indexées par métrique.
+    `early` : métriques "scan" monotones dont les règles ">" / ">=" sont évaluées
+    pendant le crawl ; `final` : toutes les règles "scan", évaluées en fin de scan.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        rules = [r for r in rules if r.enabled]
+        by_metric: Dict[str, List[Rule]] = defaultdict(list)
+        for rule in rules:
+            by_metric[rule.metric].append(rule)
+        self.page = {m: MetricIndex(rs) for m, rs in by_metric.items() if m in PAGE_METRICS}
+        self.final = {m: MetricIndex(rs) for m, rs in by_metric.items() if m in SCAN_METRICS}
+        self.early = {
+            m: MetricIndex(r for r in rs if r.operator in PREFIX_OPERATORS)
+            for m, rs in by_metric.items()
+            if m in MONOTONIC_METRICS and any(r.operator in PREFIX_OPERATORS for r in rs)
+        }
+        self.ids = frozenset(r.id for r in rules)
+        self.size = len(rules)
+
+
+class RuleSet:
+    """
+    Ensemble de règles déclaratives (dicts validés), persisté en JSON si `path`.
+    Compilé une fois par host (règles globales + règles du host), recompilé
+    après `replace()`.
+    """
+
+    def __init__(self, rules: Iterable[Rule] = (), path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._rules: List[Rule] = []
+        self._global: List[Rule] = []
+        self._by_site: Dict[str, List[Rule]] = {}
+        self._compiled: Dict[str, CompiledRules] = {}
+        self._set(list(rules))
+
+    @classmethod
+    def from_dicts(cls, items: Iterable[Mapping[str, Any]], path: Optional[str] = None) -> "RuleSet":
+        return cls([Rule.from_dict(d) for d in items], path=path)
+
+    @classmethod
+    def load(cls, path: str, default: Iterable[Mapping[str, Any]] = DEFAULT_RULES) -> "RuleSet":
+        """
+        Règles du fichier `path` ; les règles par défaut s'il n'existe pas encore.
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                items = json.load(f)
+        except FileNotFoundError:
+            items = default
+        return cls.from_dicts(items, path=path)
+
+    def _set(self, rules: List[Rule]) -> None:
+        if len(rules) > RULES_MAX:
+            raise ValueError(f"Too many rules (max {RULES_MAX})")
+        ids = [r.id for r in rules]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate rule ids")
+        by_site: Dict[str, List[Rule]] = defaultdict(list)
+        for rule in rules:
+            for site in rule.sites or ():
+                by_site[site].append(rule)
+        with self._lock:
+            self._rules = rules
+            self._global = [r for r in rules if r.sites is None]
+            self._by_site = dict(by_site)
+            self._compiled = {}
+
+    def rules(self) -> List[Rule]:
+        return list(self._rules)
+
+    def replace(self, items: Iterable[Mapping[str, Any]]) -> None:
+        """
+        Remplace toutes les règles (ValueError si l'une est invalide : rien n'est changé).
+        """
+        self._set([Rule.from_dict(d) for d in items])
+        if self.path:
+            self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump([r.to_dict() for r in self._rules], f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def compiled(self, host: str) -> CompiledRules:
+        host = (host or "").lower()
+        with self._lock:
+            compiled = self._compiled.get(host)
+            if compiled is None:
+                compiled = self._compiled[host] = CompiledRules(self._global + self._by_site.get(host, []))
+            return compiled
+
+    def evaluator(self, host: str) -> "RuleEvaluator":
+        return RuleEvaluator(self.compiled(host))
+
+
+# =========================
+# Évaluation incrémentale (un évaluateur par scan)
+# =========================
+def scan_metrics(results, thin_words_threshold: int, names: Iterable[str]) -> Dict[str, float]:
+    """
+    Valeurs des métriques "scan" demandées, lues sur les compteurs d'un
+    ScanResults (seo_results) : seules les métriques qui ont des règles sont calculées.
+    """
+    columns = results.columns
+    pages = results.pages
+    getters: Dict[str, Callable[[], float]] = {
+        "pages_crawled": lambda: pages,
+        "broken_links": lambda: results.counts["broken_links"],
+        "critical_broken": lambda: results.critical,
+        "missing_meta_descriptions": lambda: columns.missing_meta,
+        "missing_h1": lambda: columns.missing_h1,
+        "thin_pages": lambda: columns.thin_pages(thin_words_threshold),
+        "duplicate_titles": lambda: columns.duplicate_titles,
+        "missing_meta_ratio": lambda: columns.missing_meta / pages if pages else 0.0,
+        "missing_h1_ratio": lambda: columns.missing_h1 / pages if pages else 0.0,
+        "thin_pages_ratio": lambda: columns.thin_pages(thin_words_threshold) / pages if pages else 0.0,
+    }
+    return {name: getters[name]() for name in names if name in getters}
+
+
+def histogram_counter(histogram: Mapping[float, int]) -> Callable[[str, float], int]:
+    """
+    Compteur sur un histogramme (valeur -> occurrences) : `count(op, seuil)` =
+    nombre de valeurs qui vérifient `op seuil` (valeurs triées + cumuls, bisect).
+    """
+    keys = sorted(histogram)
+    cumul = list(accumulate(histogram[k] for k in keys))
+    total = cumul[-1] if cumul else 0
+
+    def below(threshold: float, inclusive: bool) -> int:
+        i = (bisect_right if inclusive else bisect_left)(keys, threshold)
+        return cumul[i - 1] if i else 0
+
+    def count(op: str, threshold: float) -> int:
+        if op == ">":
+            return total - below(threshold, True)
+        if op == ">=":
+            return total - below(threshold, False)
+        if op == "<":
+            return below(threshold, False)
+        if op == "<=":
+            return below(threshold, True)
+        if op == "==":
+            return histogram.get(threshold, 0)
+        return total - histogram.get(threshold, 0)
+
+    return count
+
+
+class RuleEvaluator:
+    """
+    Évalue les règles d'un scan au fil de l'eau :
+    - `observe_page()` : métriques d'une page analysée ; seules les règles qui
+      n'ont pas encore leurs ALERT_SAMPLE_URLS exemples sont touchées (curseurs
+      sur les tranches triées), les totaux viennent d'un histogramme des valeurs
+    - `observe_scan()` : compteurs du scan, seules les règles "early" pas encore
+      déclenchées sont touchées
+    - `finish()` : toutes les règles "scan" sur les valeurs finales, totaux des
+      règles "page"
+    Une alerte par règle et par scan : la première occurrence part dans `drain()`
+    (event "alert") ; nombre de pages et pire valeur sont finalisés par `finish()`.
+    """
+
+    def __init__(self, compiled: CompiledRules):
+        self.compiled = compiled
+        self.evaluations = 0
+        self._alerts: Dict[str, Dict[str, Any]] = {}
+        self._new: List[Dict[str, Any]] = []
+        # Métrique de page -> {valeur: nombre de pages}
+        self._histograms: Dict[str, Dict[float, int]] = {m: {} for m in compiled.page}
+        self._init_cursors()
+
+    @property
+    def early_metrics(self) -> List[str]:
+        return list(self.compiled.early)
+
+    @property
+    def scan_metrics(self) -> List[str]:
+        return list(self.compiled.final)
+
+    # Curseurs : règles encore "ouvertes" (exemples à collecter / pas déclenchées).
+    # Une règle ">" de seuil bas est vérifiée par toutes les valeurs qui vérifient
+    # une règle ">" de seuil plus haut : elle est complète avant elle, les règles
+    # complètes forment donc un préfixe (un suffixe pour "<"), qu'on saute.
+    def _init_cursors(self) -> None:
+        # Métrique -> [(préfixe ?, bisect, seuils, règles, [début, fin) ouverts)]
+        self._open: Dict[str, List[Tuple[bool, Callable, List[float], List[Rule], List[int]]]] = {}
+        self._eq_open: Dict[str, Set[float]] = {}
+        self._ne_open: Dict[str, List[Rule]] = {}
+        for metric, index in list(self.compiled.page.items()) + list(self.compiled.early.items()):
+            self._open[metric] = []
+            for op, (ts, rules) in index.ranges.items():
+                bounds = [0, len(rules)]
+                self._advance(op in PREFIX_OPERATORS, rules, bounds)
+                self._open[metric].append((op in PREFIX_OPERATORS, OPERATOR_BISECT[op], ts, rules, bounds))
+            self._eq_open[metric] = {t for t, rules in index.eq.items() if not all(map(self._complete, rules))}
+            self._ne_open[metric] = [r for r in index.ne if not self._complete(r)]
+
+    def _complete(self, rule: Rule) -> bool:
+        alert = self._alerts.get(rule.id)
+        if alert is None:
+            return False
+        return rule.scope == "scan" or len(alert["urls"]) >= ALERT_SAMPLE_URLS
+
+    def _advance(self, prefix: bool, rules: List[Rule], bounds: List[int]) -> None:
+        if prefix:
+            while bounds[0] < bounds[1] and self._complete(rules[bounds[0]]):
+                bounds[0] += 1
+        else:
+            while bounds[1] > bounds[0] and self._complete(rules[bounds[1] - 1]):
+                bounds[1] -= 1
+
+    def _fire(self, rule: Rule, value: float, url: Optional[str] = None) -> None:
+        alert = self._alerts.get(rule.id)
+        if alert is None:
+            alert = self._alerts[rule.id] = {
+                "rule_id": rule.id,
+                "name": rule.name,
+                "scope": rule.scope,
+                "metric": rule.metric,
+                "operator": rule.operator,
+                "threshold": rule.threshold,
+                "priority": rule.priority,
+                "severity": SEVERITIES[rule.priority],
+                "value": value,
+                "count": 1,
+            }
+            if url is not None:
+                alert["urls"] = []
+            self._new.append(alert)
+        if url is not None and len(alert["urls"]) < ALERT_SAMPLE_URLS:
+            alert["urls"].append(url)
+
+    def _observe(self, metric: str, index: MetricIndex, value: float, url: Optional[str]) -> None:
+        self.evaluations += 1
+        for prefix, bisect, ts, rules, bounds in self._open[metric]:
+            lo, hi = bounds
+            if lo >= hi:
+                continue  # toutes complètes
+            if prefix:
+                hi = min(hi, bisect(ts, value))
+            else:
+                lo = max(lo, bisect(ts, value))
+            if lo < hi:
+                for rule in rules[lo:hi]:
+                    self._fire(rule, value, url)
+                self._advance(prefix, rules, bounds)
+        eq_open = self._eq_open[metric]
+        if value in eq_open:
+            rules = index.eq[value]
+            for rule in rules:
+                self._fire(rule, value, url)
+            if all(map(self._complete, rules)):
+                eq_open.discard(value)
+        ne_open = self._ne_open[metric]
+        if ne_open:
+            for rule in ne_open:
+                if rule.threshold != value:
+                    self._fire(rule, value, url)
+            self._ne_open[metric] = [r for r in ne_open if not self._complete(r)]
+
+    def observe_page(self, url: str, values: Mapping[str, float]) -> None:
+        for metric, index in self.compiled.page.items():
+            value = values.get(metric)
+            if value is None:
+                continue
+            histogram = self._histograms[metric]
+            histogram[value] = histogram.get(value, 0) + 1
+            self._observe(metric, index, value, url)
+
+    def observe_scan(self, values: Mapping[str, float]) -> None:
+        for metric, value in values.items():
+            index = self.compiled.early.get(metric)
+            if index is not None:
+                self._observe(metric, index, value, None)
+
+    def finish(self, values: Mapping[str, float]) -> None:
+        # Règles "page" : nombre de pages concernées et pire valeur, sur l'histogramme
+        counters = {m: histogram_counter(h) for m, h in self._histograms.items() if h}
+        for alert in self._alerts.values():
+            if alert["scope"] != "page" or alert["metric"] not in counters:
+                continue
+            histogram = self._histograms[alert["metric"]]
+            op = alert["operator"]
+            alert["count"] = counters[alert["metric"]](op, alert["threshold"])
+            if op in PREFIX_OPERATORS:
+                alert["value"] = max(histogram)
+            elif op in SUFFIX_OPERATORS:
+                alert["value"] = min(histogram)
+
+        for metric, index in self.compiled.final.items():
+            value = values.get(metric)
+            if value is None:
+                continue
+            self.evaluations += 1
+            for rule in index.matches(value):
+                alert = self._alerts.get(rule.id)
+                if alert is None:
+                    self._fire(rule, value)
+                else:
+                    # Déclenchée pendant le crawl : valeur finale
+                    alert["value"] = value
+
+    def drain(self) -> List[Dict[str, Any]]:
+        new, self._new = self._new, []
+        return new
+
+    def alerts(self) -> List[Dict[str, Any]]:
+        """
+        Alertes du scan, P0 d'abord.
+        """
+        return sorted(self._alerts.values(), key=lambda a: (a["priority"], a["rule_id"]))
+
+    # Checkpoint : alertes déjà déclenchées (et déjà émises) + histogrammes
+    def state(self) -> Dict[str, Any]:
+        return {
+            "alerts": list(self._alerts.values()),
+            "histograms": {m: list(h.items()) for m, h in self._histograms.items()},
+        }
+
+    def restore(self, state: Mapping[str, Any]) -> None:
+        # Règles modifiées depuis le checkpoint : seules les alertes encore valides sont gardées
+        self._alerts = {a["rule_id"]: a for a in state.get("alerts", []) if a["rule_id"] in self.compiled.ids}
+        for metric, items in state.get("histograms", {}).items():
+            if metric in self._histograms:
+                self._histograms[metric] = {v: n for v, n in items}
+        self._init_cursors()
+
+
+_default_rules: Optional[RuleSet] = None
+
+
+def default_rules() -> RuleSet:
+    """
+    Règles partagées : fichier SEO_RULES_PATH (JSON) si défini, sinon
+    DEFAULT_RULES en mémoire.
+    """
+    global _default_rules
+    if _default_rules is None:
+        path = os.getenv("SEO_RULES_PATH")
+        _default_rules = RuleSet.load(path) if path else RuleSet.from_dicts(DEFAULT_RULES)
+    return _default_rules
@@ -0,0 +1,568 @@
+# backend/seo_scheduler.py
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from backend.seo_jobs import DONE, JobQueueFull, ScanJob, ScanJobManager
+
+# Scans planifiés en même temps (au plus), en plus de la place laissée aux
+# scans interactifs : rien n'est lancé si le ScanJobManager est déjà plein
+SCHEDULER_MAX_RUNNING = 2
+# Délai minimal entre deux départs de scans planifiés vers le même host
+SCHEDULE_HOST_SPACING_S = 300.0
+# Intervalles acceptés (1 h .. 30 jours), nocturne par défaut
+SCHEDULE_DEFAULT_INTERVAL_S = 24 * 3600.0
+SCHEDULE_MIN_INTERVAL_S = 3600.0
+SCHEDULE_MAX_INTERVAL_S = 30 * 24 * 3600.0
+# Jitter de chaque départ : +/- 5 % de l'intervalle, 15 min au plus
+SCHEDULE_JITTER_FRACTION = 0.05
+SCHEDULE_MAX_JITTER_S = 900.0
+# Boucle de dispatch : réveil au prochain départ prévu, au plus tard après TICK
+SCHEDULER_TICK_S = 30.0
+# Runs gardés par planification (historique des dashboards)
+SCHEDULE_RUNS_KEPT = 400
+# Planifications acceptées au total et par host (chacune relance un crawl indéfiniment)
+SCHEDULE_MAX_TOTAL = 1000
+SCHEDULE_MAX_PER_HOST = 10
+
+# Scan encore en cours à l'échéance suivante : "skip" (run sauté, prochaine
+# échéance) ou "defer" (relancé dès que le précédent se termine)
+OVERLAP_POLICIES = ("skip", "defer")
+
+# Statuts d'un run (en plus de ceux d'un ScanJob : done / error / cancelled)
+RUN_RUNNING = "running"
+RUN_SKIPPED = "skipped"
+RUN_INTERRUPTED = "interrupted"
+
+
+class ScheduleLimitReached(Exception):
+    pass
+
+
+@dataclass
+class Schedule:
+    id: str
+    url: str
+    host: str
+    interval_s: float
+    params: Dict[str, Any]
+    overlap: str
+    enabled: bool
+    next_run_at: float
+    last_run_at: Optional[float]
+    last_status: Optional[str]
+    created_at: float
+
+    def summary(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def schedule_phase(url: str, interval_s: float) -> float:
+    """
+    Décalage stable (hash de l'URL) dans l'intervalle : des centaines de
+    planifications créées d'un coup partent réparties sur toute la période.
+    """
+    h = int.from_bytes(hashlib.sha1(url.encode("utf-8")).digest()[:8], "big")
+    return (h / 2**64) * interval_s
+
+
+def jitter_s(interval_s: float, rng: random.Random) -> float:
+    j = min(SCHEDULE_MAX_JITTER_S, interval_s * SCHEDULE_JITTER_FRACTION)
+    return rng.uniform(-j, j)
+
+
+def next_run_after(planned_at: float, interval_s: float, now: float, rng: random.Random) -> float:
+    """
+    Échéance suivante : même "phase" que la précédente (pas de dérive si un run
+    part en retard), échéances manquées sautées, plus un jitter.
+    """
+    base = planned_at + interval_s
+    if base <= now:
+        base += ((now - base) // interval_s + 1) * interval_s
+    return max(now, base + jitter_s(interval_s, rng))
+
+
+def run_summary(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Résumé d'un scan gardé dans l'historique : KPIs, score, alertes déclenchées
+    (sans les URLs d'exemple), id du scan. Pas le payload complet.
+    """
+    summary = {
+        "kpis": payload.get("kpis", {}),
+        "health": payload.get("health", {}),
+        "duration_s": payload.get("meta", {}).get("duration_s"),
+        "alerts": [
+            {k: v for k, v in alert.items() if k != "urls"} for alert in payload.get("alerts", [])
+        ],
+    }
+    # Handle des issues (mode streaming) et/ou du re-scoring (historique du ScanStore)
+    scan_id = payload.get("meta", {}).get("scan_id") or payload.get("issues_handle", {}).get("scan_id")
+    if scan_id:
+        summary["scan_id"] = scan_id
+    return summary
+
+
+class ScheduleStore:
+    """
+    Planifications et historique des runs (SQLite). `:memory:` : rien ne
+    survit à un redémarrage. Au plus `max_schedules` planifications, dont
+    `max_per_host` par host (ScheduleLimitReached au-delà).
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        max_schedules: int = SCHEDULE_MAX_TOTAL,
+        max_per_host: int = SCHEDULE_MAX_PER_HOST,
+    ):
+        self.path = path
+        self.max_schedules = max_schedules
+        self.max_per_host = max_per_host
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS schedules (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                host TEXT NOT NULL,
+                interval_s REAL NOT NULL,
+                params TEXT NOT NULL,
+                overlap TEXT NOT NULL,
+                enabled INTEGER NOT NULL,
+                next_run_at REAL NOT NULL,
+                last_run_at REAL,
+                last_status TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS schedules_due ON schedules (enabled, next_run_at);
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                schedule_id TEXT NOT NULL,
+                planned_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                status TEXT NOT NULL,
+                job_id TEXT,
+                summary TEXT
+            );
+            CREATE INDEX IF NOT EXISTS runs_by_schedule ON runs (schedule_id, id);
+            """
+        )
+
+    _COLUMNS = (
+        "id, url, host, interval_s, params, overlap, enabled, next_run_at, last_run_at, last_status, created_at"
+    )
+
+    @staticmethod
+    def _schedule(row) -> Schedule:
+        return Schedule(
+            id=row[0],
+            url=row[1],
+            host=row[2],
+            interval_s=row[3],
+            params=json.loads(row[4]),
+            overlap=row[5],
+            enabled=bool(row[6]),
+            next_run_at=row[7],
+            last_run_at=row[8],
+            last_status=row[9],
+            created_at=row[10],
+        )
+
+    def add(self, s: Schedule) -> None:
+        with self._lock:
+            # Comptage et insertion sous le même verrou : pas de dépassement par requêtes simultanées
+            total, on_host = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(host = ?), 0) FROM schedules", (s.host,)
+            ).fetchone()
+            if total >= self.max_schedules:
+                raise ScheduleLimitReached(f"Too many schedules ({self.max_schedules} max)")
+            if on_host >= self.max_per_host:
+                raise ScheduleLimitReached(f"Too many schedules for {s.host} ({self.max_per_host} max)")
+            self._db.execute(
+                f"INSERT INTO schedules ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    s.id, s.url, s.host, s.interval_s, json.dumps(s.params, sort_keys=True), s.overlap,
+                    int(s.enabled), s.next_run_at, s.last_run_at, s.last_status, s.created_at,
+                ),
+            )
+
+    def get(self, schedule_id: str) -> Optional[Schedule]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {self._COLUMNS} FROM schedules WHERE id = ?", (schedule_id,)).fetchone()
+        return self._schedule(row) if row else None
+
+    def find(self, url: str, params: Dict[str, Any]) -> Optional[Schedule]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {self._COLUMNS} FROM schedules WHERE url = ? AND params = ?",
+                (url, json.dumps(params, sort_keys=True)),
+            ).fetchone()
+        return self._schedule(row) if row else None
+
+    def all(self) -> List[Schedule]:
+        with self._lock:
+            rows = self._db.execute(f"SELECT {self._COLUMNS} FROM schedules ORDER BY next_run_at").fetchall()
+        return [self._schedule(r) for r in rows]
+
+    def due(self, now: float, limit: int = 100) -> List[Schedule]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {self._COLUMNS} FROM schedules WHERE enabled = 1 AND next_run_at <= ? "
+                "ORDER BY next_run_at LIMIT ?",
+                (now, limit),
+            ).fetchall()
+        return [self._schedule(r) for r in rows]
+
+    def next_due_at(self) -> Optional[float]:
+        with self._lock:
+            row = self._db.execute("SELECT MIN(next_run_at) FROM schedules WHERE enabled = 1").fetchone()
+        return row[0]
+
+    def update(self, schedule_id: str, **fields) -> None:
+        if "enabled" in fields:
+            fields["enabled"] = int(fields["enabled"])
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE schedules SET {assignments} WHERE id = ?", (*fields.values(), schedule_id))
+
+    def delete(self, schedule_id: str) -> bool:
+        with self._lock:
+            cur = self._db.execute("DELETE FROM schedules WHERE id = ?", (schedule_id,))
+            self._db.execute("DELETE FROM runs WHERE schedule_id = ?", (schedule_id,))
+        return cur.rowcount > 0
+
+    # Runs
+    def add_run(self, schedule_id: str, planned_at: float, status: str, started_at: Optional[float] = None) -> int:
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO runs (schedule_id, planned_at, started_at, status) VALUES (?, ?, ?, ?)",
+                (schedule_id, planned_at, started_at, status),
+            )
+            # Historique borné par planification
+            self._db.execute(
+                "DELETE FROM runs WHERE schedule_id = ? AND id <= ?",
+                (schedule_id, cur.lastrowid - SCHEDULE_RUNS_KEPT),
+            )
+        return cur.lastrowid
+
+    def finish_run(
+        self, run_id: int, status: str, job_id: Optional[str], summary: Optional[Dict[str, Any]]
+    ) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE runs SET finished_at = ?, status = ?, job_id = ?, summary = ? WHERE id = ?",
+                (time.time(), status, job_id, json.dumps(summary) if summary is not None else None, run_id),
+            )
+
+    def runs(self, schedule_id: str, limit: int = 50, before: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Runs d'une planification, du plus récent au plus ancien (`before` : id de
+        run exclu, pagination).
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, planned_at, started_at, finished_at, status, job_id, summary FROM runs "
+                "WHERE schedule_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (schedule_id, before if before is not None else 2**63 - 1, limit),
+            ).fetchall()
+        return [
+            {
+                "run_id": r[0],
+                "planned_at": r[1],
+                "started_at": r[2],
+                "finished_at": r[3],
+                "status": r[4],
+                "job_id": r[5],
+                "summary": json.loads(r[6]) if r[6] else None,
+            }
+            for r in rows
+        ]
+
+    def interrupt_running(self) -> List[str]:
+        """
+        Runs restés "running" (app arrêtée pendant le scan) -> "interrupted".
+        Retourne les planifications concernées.
+        """
+        with self._lock:
+            ids = [r[0] for r in self._db.execute("SELECT DISTINCT schedule_id FROM runs WHERE status = ?", (RUN_RUNNING,))]
+            self._db.execute(
+                "UPDATE runs SET status = ?, finished_at = ? WHERE status = ?", (RUN_INTERRUPTED, time.time(), RUN_RUNNING)
+            )
+        return ids
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class ScanScheduler:
+    """
+    Scans récurrents, lancés dans la boucle de l'app (lifespan).
+
+    - une planification = URL + paramètres de scan + intervalle ; première
+      échéance à une "phase" stable dans l'intervalle (hash de l'URL), puis
+      intervalle +/- jitter : pas de rafale de départs à heure fixe
+    - dispatch via le ScanJobManager (même file, mêmes checkpoints, fusion avec
+      un scan interactif identique) : au plus `max_running` scans planifiés, et
+      aucun départ tant que le manager n'a pas de créneau libre (les scans
+      interactifs passent d'abord)
+    - par host : un scan planifié à la fois, `host_spacing_s` entre deux départs
+    - précédent run encore en cours : run sauté ("skip") ou reporté ("defer")
+    - runs interrompus par un arrêt de l'app : relancés au démarrage (reprise
+      du checkpoint du job)
+    Les échéances dues mais bloquées (budget, host) restent dues : elles partent
+    dans l'ordre d'échéance dès qu'un créneau se libère.
+    """
+
+    def __init__(
+        self,
+        jobs: ScanJobManager,
+        store: Optional[ScheduleStore] = None,
+        max_running: int = SCHEDULER_MAX_RUNNING,
+        host_spacing_s: float = SCHEDULE_HOST_SPACING_S,
+        rng: Optional[random.Random] = None,
+    ):
+        self.jobs = jobs
+        self.store = store if store is not None else ScheduleStore()
+        self.max_running = max(1, int(max_running))
+        self.host_spacing_s = host_spacing_s
+        self.rng = rng or random.Random()
+        # schedule_id -> job du run en cours
+        self._running: Dict[str, ScanJob] = {}
+        self._running_hosts: Set[str] = set()
+        self._host_started: Dict[str, float] = {}
+        self._watchers: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.dispatched = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    # =========================
+    # Planifications
+    # =========================
+    def add(
+        self,
+        url: str,
+        interval_s: float = SCHEDULE_DEFAULT_INTERVAL_S,
+        overlap: str = "skip",
+        **params,
+    ) -> Schedule:
+        """
+        Nouvelle planification (ou celle qui existe déjà pour la même URL et les
+        mêmes paramètres). ValueError si l'intervalle ou la politique est invalide,
+        ScheduleLimitReached si le nombre de planifications est atteint.
+        """
+        if not SCHEDULE_MIN_INTERVAL_S <= interval_s <= SCHEDULE_MAX_INTERVAL_S:
+            raise ValueError(
+                f"interval_s must be between {SCHEDULE_MIN_INTERVAL_S:.0f} and {SCHEDULE_MAX_INTERVAL_S:.0f}"
+            )
+        if overlap not in OVERLAP_POLICIES:
+            raise ValueError(f"Unknown overlap policy: {overlap}")
+        existing = self.store.find(url, params)
+        if existing is not None:
+            return existing
+
+        now = time.time()
+        # Prochaine occurrence de la phase propre à l'URL
+        phase = schedule_phase(url, interval_s)
+        next_run_at = now - (now % interval_s) + phase
+        if next_run_at <= now:
+            next_run_at += interval_s
+        schedule = Schedule(
+            id=hashlib.sha1(f"{url}|{json.dumps(params, sort_keys=True)}".encode("utf-8")).hexdigest()[:12],
+            url=url,
+            host=(urlparse(url).netloc or url).lower(),
+            interval_s=float(interval_s),
+            params=params,
+            overlap=overlap,
+            enabled=True,
+            next_run_at=next_run_at,
+            last_run_at=None,
+            last_status=None,
+            created_at=now,
+        )
+        self.store.add(schedule)
+        self._notify()
+        return schedule
+
+    def get(self, schedule_id: str) -> Optional[Schedule]:
+        return self.store.get(schedule_id)
+
+    def schedules(self) -> List[Schedule]:
+        return self.store.all()
+
+    def set_enabled(self, schedule_id: str, enabled: bool) -> None:
+        self.store.update(schedule_id, enabled=enabled)
+        self._notify()
+
+    def run_now(self, schedule_id: str) -> None:
+        # Passe en tête au prochain dispatch (budget et espacement par host respectés)
+        self.store.update(schedule_id, next_run_at=time.time())
+        self._notify()
+
+    def remove(self, schedule_id: str) -> bool:
+        return self.store.delete(schedule_id)
+
+    def is_running(self, schedule_id: str) -> bool:
+        return schedule_id in self._running
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "schedules": len(self.store.all()),
+            "running": len(self._running),
+            "max_running": self.max_running,
+            "dispatched": self.dispatched,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "next_run_at": self.store.next_due_at(),
+            "last_error": self.last_error,
+        }
+
+    # =========================
+    # Boucle de dispatch
+    # =========================
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wake = asyncio.Event()
+        # Runs coupés par l'arrêt précédent : relancés tout de suite (le job
+        # reprend à son checkpoint)
+        for schedule_id in self.store.interrupt_running():
+            self.store.update(schedule_id, next_run_at=time.time())
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        tasks = [t for t in [self._task, *self._watchers] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def _notify(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _loop(self) -> None:
+        while True:
+            self._wake.clear()
+            # Une erreur (store, ligne invalide, submit...) ne doit pas arrêter la
+            # boucle : sinon plus aucune planification ne part, sans rien signaler
+            try:
+                self.dispatch_due()
+                # Réveil : prochaine échéance, fin d'un run / nouvelle planification
+                # (_notify), ou tick (échéances dues mais bloquées par le budget / host)
+                delay = (self.store.next_due_at() or float("inf")) - time.time()
+            except Exception as e:
+                self._error(e)
+                delay = SCHEDULER_TICK_S
+            timeout = SCHEDULER_TICK_S if delay <= 0 else min(SCHEDULER_TICK_S, delay)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _error(self, e: Exception) -> None:
+        self.errors += 1
+        self.last_error = f"{type(e).__name__}: {e}"
+
+    def _capacity(self) -> int:
+        free_jobs = self.jobs.max_running - self.jobs.inflight()
+        return min(self.max_running - len(self._running), free_jobs)
+
+    def dispatch_due(self) -> int:
+        """
+        Lance les planifications échues, dans l'ordre d'échéance, tant que le
+        budget le permet. Retourne le nombre de scans lancés.
+        """
+        now = time.time()
+        started = 0
+        for schedule in self.store.due(now):
+            if schedule.id in self._running:
+                if schedule.overlap == "skip":
+                    # Le run précédent n'est pas fini : celui-ci est sauté
+                    self.store.add_run(schedule.id, schedule.next_run_at, RUN_SKIPPED)
+                    self.store.update(
+                        schedule.id,
+                        next_run_at=next_run_after(schedule.next_run_at, schedule.interval_s, now, self.rng),
+                        last_status=RUN_SKIPPED,
+                    )
+                    self.skipped += 1
+                continue  # "defer" : reste dû, relancé à la fin du run en cours
+            if self._capacity() <= 0:
+                break
+            if schedule.host in self._running_hosts:
+                continue
+            if now - self._host_started.get(schedule.host, float("-inf")) < self.host_spacing_s:
+                continue
+            try:
+                started += self._dispatch(schedule, now)
+            except Exception as e:
+                # Planification en échec : les suivantes partent quand même
+                self._error(e)
+        return started
+
+    def _dispatch(self, schedule: Schedule, now: float) -> bool:
+        try:
+            job, _ = self.jobs.submit(schedule.url, pinned=True, **schedule.params)
+        except JobQueueFull:
+            return False
+        run_id = self.store.add_run(schedule.id, schedule.next_run_at, RUN_RUNNING, started_at=now)
+        self.store.update(
+            schedule.id,
+            next_run_at=next_run_after(schedule.next_run_at, schedule.interval_s, now, self.rng),
+            last_run_at=now,
+            last_status=RUN_RUNNING,
+        )
+        self._running[schedule.id] = job
+        self._running_hosts.add(schedule.host)
+        self._host_started[schedule.host] = now
+        self.dispatched += 1
+
+        watcher = asyncio.create_task(self._watch(schedule, job, run_id))
+        self._watchers.add(watcher)
+        watcher.add_done_callback(self._watchers.discard)
+        return True
+
+    async def _watch(self, schedule: Schedule, job: ScanJob, run_id: int) -> None:
+        # asyncio.wait n'annule pas le job si le scheduler s'arrête (scan partagé
+        # avec des abonnés SSE) ; arrêt de l'app : le run reste "running" ->
+        # "interrupted" au redémarrage
+        await asyncio.wait({job.task})
+        self._running.pop(schedule.id, None)
+        self._running_hosts.discard(schedule.host)
+        summary = run_summary(job.result) if job.status == DONE and job.result is not None else None
+        self.store.finish_run(run_id, job.status, job.id, summary)
+        if self.store.get(schedule.id) is not None:
+            self.store.update(schedule.id, last_status=job.status)
+        self._notify()
+
+
+_default_store: Optional[ScheduleStore] = None
+
+
+def default_schedule_store() -> ScheduleStore:
+    """
+    Store des planifications configuré par SEO_SCHEDULE_PATH (en mémoire sinon).
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = ScheduleStore(os.getenv("SEO_SCHEDULE_PATH") or ":memory:")
+    return _default_store
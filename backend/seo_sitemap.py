@@ -0,0 +1,250 @@
+# backend/seo_sitemap.py
+from __future__ import annotations
+
+import re
+import zlib
+from contextlib import aclosing, nullcontext
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import httpx
+from lxml import etree
+
+from backend.seo_throttle import HostLimiter
+
+# Taille max d'un robots.txt lu (Google s'arrête à 500 KiB)
+ROBOTS_MAX_BYTES = 500 * 1024
+# Profondeur max des sitemap indexes imbriqués
+SITEMAP_MAX_NESTING = 3
+# Taille max d'un sitemap, décompressé (limite du protocole sitemaps.org : 50 MiB)
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+# Un .gz est décompressé par morceaux de cette taille au plus
+GUNZIP_CHUNK_BYTES = 64 * 1024
+
+
+def _slot(limiter: Optional[HostLimiter], url: str):
+    # Créneau du host (délai de politesse, AIMD, Retry-After) comme les pages ; sans limiter : direct
+    return limiter.slot(url) if limiter is not None else nullcontext()
+
+
+# =========================
+# robots.txt
+# =========================
+def _rule_regex(path: str) -> "re.Pattern[str]":
+    # Syntaxe Google : "*" = n'importe quoi, "$" final = fin d'URL
+    anchored = path.endswith("$")
+    if anchored:
+        path = path[:-1]
+    pattern = ".*".join(re.escape(part) for part in path.split("*"))
+    return re.compile(pattern + ("$" if anchored else ""))
+
+
+@dataclass
+class RobotsRules:
+    """
+    Règles robots.txt applicables à notre user-agent.
+    Allow/Disallow avec wildcards ; la règle la plus longue gagne, Allow à égalité.
+    """
+
+    rules: List[Tuple[bool, str, "re.Pattern[str]"]] = field(default_factory=list)  # (allow, path, regex)
+    crawl_delay: Optional[float] = None
+    sitemaps: List[str] = field(default_factory=list)
+
+    def can_fetch(self, url: str) -> bool:
+        u = urlparse(url)
+        path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        best_len, allowed = -1, True
+        for allow, rule_path, regex in self.rules:
+            if regex.match(path) and (len(rule_path) > best_len or (len(rule_path) == best_len and allow)):
+                best_len, allowed = len(rule_path), allow
+        return allowed
+
+
+def _product_token(agent: str) -> str:
+    # "MyBot/1.0 (+url)" -> "mybot"
+    return agent.split("/")[0].strip().lower()
+
+
+def parse_robots(text: str, user_agent: str) -> RobotsRules:
+    """
+    Garde le groupe de `user_agent` (sinon le groupe "*"). Comme le prévoit la
+    RFC 9309, un groupe s'applique si son user-agent est notre product token
+    (comparaison exacte, insensible à la casse), pas s'il en est une sous-chaîne.
+    """
+    token = _product_token(user_agent)
+    groups: List[Tuple[List[str], List[Tuple[str, str]]]] = []
+    sitemaps: List[str] = []
+    agents: List[str] = []
+    lines: List[Tuple[str, str]] = []
+    in_rules = False
+
+    for raw in text.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        key, _, value = line.partition(":")
+        key, value = key.strip().lower(), value.strip()
+
+        if key == "sitemap":
+            if value:
+                sitemaps.append(value)
+        elif key == "user-agent":
+            # Un user-agent après des règles ouvre un nouveau groupe
+            if in_rules:
+                groups.append((agents, lines))
+                agents, lines, in_rules = [], [], False
+            agents.append(value.lower())
+        elif key in ("allow", "disallow", "crawl-delay"):
+            in_rules = True
+            lines.append((key, value))
+    if agents:
+        groups.append((agents, lines))
+
+    # Groupe de notre bot > "*" ; les groupes du même agent sont fusionnés
+    chosen: List[Tuple[str, str]] = []
+    best = -1
+    for agents, group_lines in groups:
+        for agent in agents:
+            score = 1 if agent != "*" and _product_token(agent) == token else (0 if agent == "*" else -1)
+            if score > best:
+                best, chosen = score, group_lines
+            elif score == best and score >= 0 and group_lines is not chosen:
+                chosen = chosen + group_lines
+
+    robots = RobotsRules(sitemaps=sitemaps)
+    for key, value in chosen:
+        if key == "crawl-delay":
+            try:
+                robots.crawl_delay = float(value)
+            except ValueError:
+                pass
+        elif value:
+            robots.rules.append((key == "allow", value, _rule_regex(value)))
+        # "Disallow:" vide = tout autorisé -> rien à ajouter
+    return robots
+
+
+async def fetch_robots(
+    client: httpx.AsyncClient, origin: str, user_agent: str, limiter: Optional[HostLimiter] = None
+) -> RobotsRules:
+    """
+    robots.txt absent, en erreur ou illisible -> aucune restriction.
+    """
+    url = urljoin(origin, "/robots.txt")
+    try:
+        async with _slot(limiter, url) as slot:
+            async with client.stream("GET", url) as r:
+                if slot is not None:
+                    slot.record(r.status_code, r.headers.get("retry-after"))
+                if r.status_code != 200:
+                    return RobotsRules()
+                body = b""
+                async for chunk in r.aiter_bytes():
+                    body += chunk
+                    if len(body) >= ROBOTS_MAX_BYTES:
+                        break
+    except httpx.HTTPError:
+        return RobotsRules()
+    robots = parse_robots(body[:ROBOTS_MAX_BYTES].decode("utf-8", errors="replace"), user_agent)
+    robots.sitemaps = [urljoin(origin, u) for u in robots.sitemaps]
+    return robots
+
+
+# =========================
+# sitemap.xml (streaming)
+# =========================
+def _local(tag) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _gunzip(gunzip, data: bytes) -> Iterator[bytes]:
+    # Sortie bornée par appel : un petit .gz ne peut pas gonfler d'un coup en mémoire
+    while data:
+        out = gunzip.decompress(data, GUNZIP_CHUNK_BYTES)
+        if out:
+            yield out
+        data = gunzip.unconsumed_tail
+
+
+async def _stream_locs(
+    client: httpx.AsyncClient, url: str, limiter: Optional[HostLimiter] = None
+) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Parse un sitemap en streaming : yield (kind, loc), kind = "url" ou "sitemap".
+    Gère le .gz (décompression incrémentale) ; la mémoire reste bornée,
+    les éléments sont libérés au fil du parsing. Lecture arrêtée au-delà de
+    SITEMAP_MAX_BYTES (décompressés, .gz ou non).
+    """
+    parser = etree.XMLPullParser(events=("end",), resolve_entities=False, no_network=True, huge_tree=False)
+    gunzip = None
+    first = True
+    size = 0
+
+    async with _slot(limiter, url) as slot, client.stream("GET", url) as r:
+        if slot is not None:
+            slot.record(r.status_code, r.headers.get("retry-after"))
+        if r.status_code != 200:
+            return
+        async for chunk in r.aiter_bytes():
+            if first:
+                first = False
+                # Fichier .gz servi tel quel (sans Content-Encoding) : magic bytes gzip
+                if chunk[:2] == b"\x1f\x8b":
+                    gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            for piece in (_gunzip(gunzip, chunk) if gunzip is not None else (chunk,)):
+                over = size + len(piece) > SITEMAP_MAX_BYTES
+                if over:
+                    piece = piece[: SITEMAP_MAX_BYTES - size]
+                size += len(piece)
+                parser.feed(piece)
+
+                for _, el in parser.read_events():
+                    if _local(el.tag) != "loc":
+                        continue
+                    parent = el.getparent()
+                    kind = _local(parent.tag) if parent is not None else ""
+                    loc = (el.text or "").strip()
+                    if loc and kind in ("url", "sitemap"):
+                        yield kind, loc
+                    # Libère le <url>/<sitemap> déjà traité
+                    if parent is not None:
+                        parent.clear(keep_tail=True)
+                        while parent.getprevious() is not None:
+                            del parent.getparent()[0]
+                if over:
+                    return
+
+
+async def iter_sitemap_urls(
+    client: httpx.AsyncClient,
+    sitemap_urls: List[str],
+    max_urls: int,
+    limiter: Optional[HostLimiter] = None,
+) -> AsyncIterator[str]:
+    """
+    URLs de pages listées par les sitemaps (indexes suivis récursivement),
+    au plus `max_urls`. Les sitemaps illisibles sont ignorés.
+    `limiter` : chaque sitemap est lu dans un créneau de son host.
+    """
+    todo = [(u, 0) for u in sitemap_urls]
+    seen = set()
+    count = 0
+    while todo and count < max_urls:
+        url, nesting = todo.pop(0)
+        if url in seen:
+            continue
+        seen.add(url)
+        try:
+            async with aclosing(_stream_locs(client, url, limiter)) as locs:
+                async for kind, loc in locs:
+                    if kind == "sitemap":
+                        if nesting + 1 <= SITEMAP_MAX_NESTING:
+                            todo.append((loc, nesting + 1))
+                        continue
+                    yield loc
+                    count += 1
+                    if count >= max_urls:
+                        return
+        except (httpx.HTTPError, etree.XMLSyntaxError, zlib.error):
+            continue
@@ -0,0 +1,192 @@
+# backend/seo_store.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# Historique des scans terminés (colonnes de pages, pour le re-scoring) : par cible
+SCAN_HISTORY_MAX_PER_TARGET = 50
+
+
+def content_hasher():
+    # Version incrémentale de content_hash (corps lu par chunks)
+    return hashlib.blake2b(digest_size=16)
+
+
+def content_hash(body: bytes) -> str:
+    h = content_hasher()
+    h.update(body)
+    return h.hexdigest()
+
+
+@dataclass
+class StoredPage:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    analysis: Dict[str, Any]
+    updated_at: float
+
+
+@dataclass
+class StoredScan:
+    scan_id: str
+    target: str
+    finished_at: float
+    columns: bytes  # PageColumns.to_bytes()
+    broken_links: int
+    critical_broken: int
+
+
+class ScanStore:
+    """
+    Store disque (SQLite) des analyses par URL, pour les re-scans incrémentaux.
+
+    Pour chaque URL : validateurs HTTP (ETag / Last-Modified), hash du contenu
+    et analyse sérialisée (dict). Le crawler envoie des requêtes conditionnelles
+    et réutilise l'analyse sur 304 ou si le contenu n'a pas changé.
+
+    Garde aussi, par scan terminé, les colonnes de pages et les compteurs de
+    liens cassés : re-scoring sans re-crawl (seo_results.rescore_scan).
+    """
+
+    def __init__(self, path: str, max_scans_per_target: int = SCAN_HISTORY_MAX_PER_TARGET):
+        self.max_scans_per_target = max_scans_per_target
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS scans (
+                scan_id TEXT PRIMARY KEY,
+                target TEXT NOT NULL,
+                finished_at REAL NOT NULL,
+                columns BLOB NOT NULL,
+                broken_links INTEGER NOT NULL,
+                critical_broken INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS scans_target ON scans (target, finished_at);
+            """
+        )
+
+    def get(self, url: str) -> Optional[StoredPage]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, etag, last_modified, content_hash, analysis, updated_at FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if not row:
+            return None
+        return StoredPage(
+            url=row[0],
+            etag=row[1],
+            last_modified=row[2],
+            content_hash=row[3],
+            analysis=json.loads(row[4]),
+            updated_at=row[5],
+        )
+
+    def put(
+        self,
+        url: str,
+        content_hash: str,
+        analysis: Dict[str, Any],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT INTO pages (url, etag, last_modified, content_hash, analysis, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash,
+                    analysis = excluded.analysis,
+                    updated_at = excluded.updated_at
+                """,
+                (url, etag, last_modified, content_hash, json.dumps(analysis, ensure_ascii=False), time.time()),
+            )
+
+    def touch(self, url: str) -> None:
+        with self._lock:
+            self._db.execute("UPDATE pages SET updated_at = ? WHERE url = ?", (time.time(), url))
+
+    def put_scan(self, scan_id: str, target: str, columns: bytes, broken_links: int, critical_broken: int) -> None:
+        """
+        Scan terminé ; au-delà de `max_scans_per_target` pour cette cible, les plus anciens sont supprimés.
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO scans (scan_id, target, finished_at, columns, broken_links, critical_broken)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (scan_id, target, time.time(), columns, broken_links, critical_broken),
+            )
+            self._db.execute(
+                """
+                DELETE FROM scans WHERE target = ? AND scan_id NOT IN (
+                    SELECT scan_id FROM scans WHERE target = ? ORDER BY finished_at DESC, rowid DESC LIMIT ?
+                )
+                """,
+                (target, target, self.max_scans_per_target),
+            )
+
+    def get_scan(self, scan_id: str) -> Optional[StoredScan]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT scan_id, target, finished_at, columns, broken_links, critical_broken FROM scans WHERE scan_id = ?",
+                (scan_id,),
+            ).fetchone()
+        return StoredScan(*row) if row else None
+
+    @staticmethod
+    def conditional_headers(page: Optional[StoredPage]) -> Dict[str, str]:
+        headers = {}
+        if page is not None:
+            if page.etag:
+                headers["If-None-Match"] = page.etag
+            if page.last_modified:
+                headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_default_store: Optional[ScanStore] = None
+_default_store_lock = threading.Lock()
+
+
+def default_store() -> Optional[ScanStore]:
+    """
+    Store partagé configuré par SEO_STORE_PATH (None si non défini).
+    """
+    global _default_store
+    path = os.getenv("SEO_STORE_PATH")
+    if not path:
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ScanStore(path)
+        return _default_store
@@ -1,21 +1,84 @@
 # backend/seo_stream.py
 import asyncio
-import json
-from typing import AsyncGenerator, Dict, Any
+from typing import AsyncGenerator, AsyncIterator, Dict, Any, Tuple
 
 from fastapi import APIRouter, Query
 from sse_starlette.sse import EventSourceResponse  # pip install sse-starlette
 
-# IMPORTANT: ici tu appelles ta fonction existante
-# qui fait le scan et retourne le résultat final (dict)
-from backend.seo_crawler import run_seo_scan  # adapte si ton import diffère
+from backend.seo_crawler import run_seo_scan_async
+from backend.seo_encode import PROGRESS_MIN_INTERVAL_S, ProgressCoalescer, json_dumps
+from backend.seo_store import default_store
 
 router = APIRouter(prefix="/seo", tags=["seo"])
 
-def sse_event(data: Dict[str, Any], event: str = "message") -> str:
-    # SSE format
-    payload = json.dumps(data, ensure_ascii=False)
-    return f"event: {event}\ndata: {payload}\n\n"
+# Events en attente entre le crawler et la réponse SSE (backpressure si le client lit lentement)
+EVENT_QUEUE_SIZE = 100
+
+_END = object()
+
+
+def sse_event(data: Dict[str, Any], event: str = "message") -> Dict[str, str]:
+    # Event au format attendu par EventSourceResponse (il gère le framing SSE)
+    return {"event": event, "data": json_dumps(data)}
+
+
+async def crawl_events(
+    progress_interval_s: float = PROGRESS_MIN_INTERVAL_S, **scan_kwargs
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Pont crawler -> SSE.
+
+    Le crawl tourne dans sa propre task et pousse ses events dans une asyncio.Queue,
+    consommée au fil de l'eau par la réponse. Si le client se déconnecte, le
+    générateur est fermé et le crawl est annulé (aucun thread mobilisé).
+    Une exception du crawl devient un event ("error", {"message": ...}).
+    Les events "progress" sont coalescés : au plus un par `progress_interval_s`,
+    le dernier état en attente part à l'échéance ou avant l'event suivant.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+    async def produce():
+        try:
+            async for ev in run_seo_scan_async(**scan_kwargs):
+                await queue.put(ev)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(("error", {"message": str(e)}))
+        await queue.put(_END)
+
+    task = asyncio.create_task(produce())
+    loop = asyncio.get_running_loop()
+    progress = ProgressCoalescer(progress_interval_s)
+    try:
+        while True:
+            flush_at = progress.flush_at()
+            if flush_at is None:
+                ev = await queue.get()
+            else:
+                try:
+                    ev = await asyncio.wait_for(queue.get(), max(0.0, flush_at - loop.time()))
+                except asyncio.TimeoutError:
+                    yield ("progress", progress.flush(loop.time()))
+                    continue
+            if ev is not _END and ev[0] == "progress":
+                data = progress.offer(ev[1], loop.time())
+                if data is not None:
+                    yield ("progress", data)
+                continue
+            pending = progress.flush(loop.time())
+            if pending is not None:
+                yield ("progress", pending)
+            if ev is _END:
+                break
+            yield ev
+    finally:
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+
 
 @router.get("/scan/stream")
 async def seo_scan_stream(
@@ -26,36 +89,8 @@ async def seo_scan_stream(
     Stream progress events (SSE) while running SEO scan.
     """
 
-    async def event_generator() -> AsyncGenerator[str, None]:
-        # 1) start
-        yield sse_event({"stage": "start", "progress": 1, "message": "Initialisation…"}, event="progress")
-        await asyncio.sleep(0.05)
-
-        # 2) run scan in a thread (so we can keep streaming)
-        loop = asyncio.get_running_loop()
-
-        # We'll simulate real phases and keep the UI alive.
-        # (If you later refactor run_seo_scan to accept a callback, we’ll emit true granular progress)
-        yield sse_event({"stage": "fetch", "progress": 10, "message": "Connexion au site…"}, event="progress")
-
-        # Run scan in executor
-        scan_task = loop.run_in_executor(None, lambda: run_seo_scan(url=url, max_pages=max_pages))
-
-        # While running, emit "heartbeat" + soft progress based on time
-        progress = 10
-        while not scan_task.done():
-            await asyncio.sleep(0.4)
-            progress = min(progress + 1, 85)  # never go beyond 85 until done
-            yield sse_event(
-                {"stage": "crawl", "progress": progress, "message": "Crawl & analyse en cours…"},
-                event="progress",
-            )
-
-        # 3) done -> result
-        result = await scan_task
-        yield sse_event({"stage": "finalize", "progress": 95, "message": "Finalisation & scoring…"}, event="progress")
-        await asyncio.sleep(0.15)
-
-        yield sse_event({"stage": "done", "progress": 100, "result": result}, event="done")
+    async def event_generator() -> AsyncGenerator[Dict[str, str], None]:
+        async for event, data in crawl_events(raw_url=url, max_pages=max_pages, store=default_store()):
+            yield sse_event(data, event=event)
 
-    return EventSourceResponse(event_generator())
\ No newline at end of file
+    return EventSourceResponse(event_generator())
@@ -0,0 +1,232 @@
+# backend/seo_throttle.py
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import urlparse
+
+# Réponses de "back-pressure" : la requête est refaite plus tard, pas comptée comme cassée
+THROTTLE_STATUSES = (429, 503)
+MAX_THROTTLE_RETRIES = 3
+# Retry-After plafonné (un serveur qui demande 1 h n'immobilise pas le scan)
+MAX_RETRY_AFTER_S = 120.0
+
+# AIMD : +1 requête simultanée par "fenêtre" de succès, /2 sur signal de saturation
+DECREASE_FACTOR = 0.5
+# Une fois à 1 requête simultanée : intervalle entre requêtes doublé (borné), puis
+# débit ré-augmenté de RATE_STEP_RPS à chaque succès
+MIN_BACKOFF_INTERVAL_S = 0.25
+MAX_INTERVAL_S = 30.0
+RATE_STEP_RPS = 0.2
+
+# Signaux : latence > LATENCY_FACTOR x latence de base, taux d'erreurs lissé.
+# Seules les erreurs typiques d'une saturation comptent (réseau / timeout, 502, 504) :
+# un 500 ou un 404 sur une page cassée ne dit rien de la charge du serveur
+SATURATION_STATUSES = ("error", 502, 504)
+LATENCY_FACTOR = 3.0
+LATENCY_FLOOR_S = 0.05
+LATENCY_ALPHA = 0.2
+ERROR_RATE_ALPHA = 0.1
+ERROR_RATE_MAX = 0.3
+
+# Débit effectif : requêtes terminées sur cette fenêtre glissante
+RATE_WINDOW_S = 10.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-After en secondes (délai ou date HTTP), None si absent / invalide.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostState:
+    """
+    Contrôle de débit d'un host : fenêtre de requêtes simultanées (`limit`),
+    intervalle minimal entre deux départs, blocage Retry-After, mesures lissées.
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max_limit
+        self.limit = float(max_limit)
+        self.interval_s = 0.0
+        self.inflight = 0
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+        self.latency_s: Optional[float] = None
+        self.base_latency_s: Optional[float] = None
+        self.error_rate = 0.0
+        self.throttled = 0
+        self.decreases = 0
+        self.last_decrease = 0.0
+        self.done: Deque[float] = deque()
+        self.cond = asyncio.Condition()
+
+
+class HostSlot:
+    """
+    Créneau obtenu par `HostLimiter.slot()` : `record()` y reporte le statut
+    de la réponse (la latence est mesurée depuis le départ de la requête).
+    """
+
+    def __init__(self, limiter: "HostLimiter", state: HostState, started: float):
+        self._limiter = limiter
+        self._state = state
+        self._started = started
+        self.recorded = False
+
+    def record(self, status: Any, retry_after: Optional[str] = None) -> None:
+        if self.recorded:
+            return
+        self.recorded = True
+        latency = asyncio.get_running_loop().time() - self._started
+        self._limiter.observe(self._state, status, latency, parse_retry_after(retry_after))
+
+
+class HostLimiter:
+    """
+    Limite le nombre de requêtes simultanées par host
+    + impose un délai de politesse entre deux requêtes vers le même host.
+
+    `adaptive` (par défaut) : le débit s'adapte à ce que le serveur supporte
+    (AIMD). Chaque succès rapide augmente la fenêtre de requêtes simultanées
+    (jusqu'à `per_host`) ; un 429 / 503, un taux élevé d'erreurs de saturation
+    (réseau, 502, 504) ou une latence qui explose la divisent par deux (au plus une
+    fois par latence mesurée), puis espacent les requêtes une fois à 1.
+    Un Retry-After bloque le host jusqu'à l'échéance.
+    `delay_s` reste un plancher (politesse, Crawl-delay).
+    """
+
+    def __init__(self, per_host: int = 4, delay_s: float = 0.0, adaptive: bool = True):
+        self.per_host = max(1, int(per_host))
+        self.delay_s = max(0.0, float(delay_s))
+        self.adaptive = adaptive
+        self._hosts: Dict[str, HostState] = {}
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(self.per_host)
+        return state
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        state = self._state(urlparse(url).netloc)
+        loop = asyncio.get_running_loop()
+
+        async with state.cond:
+            await state.cond.wait_for(lambda: state.inflight < max(1, int(state.limit)))
+            state.inflight += 1
+        try:
+            # Réserve le prochain créneau libre pour ce host (re-vérifié si un
+            # Retry-After est arrivé pendant l'attente)
+            while True:
+                now = loop.time()
+                start = max(now, state.next_slot, state.blocked_until)
+                if start <= now:
+                    break
+                state.next_slot = start
+                await asyncio.sleep(start - now)
+            state.next_slot = loop.time() + max(self.delay_s, state.interval_s)
+
+            slot = HostSlot(self, state, loop.time())
+            try:
+                yield slot
+            except Exception:
+                slot.record("error")
+                raise
+        finally:
+            async with state.cond:
+                state.inflight -= 1
+                state.cond.notify_all()
+
+    # =========================
+    # AIMD
+    # =========================
+    def observe(self, state: HostState, status: Any, latency_s: float, retry_after_s: Optional[float]) -> None:
+        now = asyncio.get_running_loop().time()
+        state.done.append(now)
+
+        throttled = status in THROTTLE_STATUSES
+        saturated = status in SATURATION_STATUSES
+        state.error_rate += ERROR_RATE_ALPHA * ((1.0 if saturated else 0.0) - state.error_rate)
+        if throttled:
+            state.throttled += 1
+            if retry_after_s is not None and self.adaptive:
+                state.blocked_until = max(state.blocked_until, now + min(retry_after_s, MAX_RETRY_AFTER_S))
+
+        # Latence : lissée, et "base" = plus basse latence lissée observée
+        if isinstance(status, int) and not throttled:
+            state.latency_s = latency_s if state.latency_s is None else (
+                state.latency_s + LATENCY_ALPHA * (latency_s - state.latency_s)
+            )
+            if state.base_latency_s is None or state.latency_s < state.base_latency_s:
+                state.base_latency_s = state.latency_s
+        slow = (
+            state.latency_s is not None
+            and state.base_latency_s is not None
+            and state.latency_s > LATENCY_FACTOR * max(state.base_latency_s, LATENCY_FLOOR_S)
+        )
+
+        if not self.adaptive:
+            return
+        if throttled or state.error_rate > ERROR_RATE_MAX or slow:
+            self._decrease(state, now)
+        elif not saturated:
+            self._increase(state)
+
+    def _decrease(self, state: HostState, now: float) -> None:
+        # Une seule réduction par "aller-retour" : les réponses des requêtes
+        # déjà en vol portent le même signal
+        if now - state.last_decrease < max(state.latency_s or 0.0, LATENCY_FLOOR_S):
+            return
+        state.last_decrease = now
+        state.decreases += 1
+        if state.limit > 1:
+            state.limit = max(1.0, state.limit * DECREASE_FACTOR)
+        else:
+            state.interval_s = min(MAX_INTERVAL_S, max(MIN_BACKOFF_INTERVAL_S, state.interval_s * 2))
+
+    def _increase(self, state: HostState) -> None:
+        if state.interval_s > 0:
+            # Espacé : débit +RATE_STEP_RPS par succès
+            interval = 1.0 / (1.0 / state.interval_s + RATE_STEP_RPS)
+            state.interval_s = 0.0 if interval < MIN_BACKOFF_INTERVAL_S / 2 else interval
+        elif state.limit < state.max_limit:
+            # +1 par fenêtre complète de succès (additive increase)
+            state.limit = min(float(state.max_limit), state.limit + 1.0 / state.limit)
+            # Les requêtes en attente sont réveillées à la libération de ce créneau
+
+    # =========================
+    # Stats (events de progression)
+    # =========================
+    def stats(self, url: str) -> Dict[str, Any]:
+        """
+        Débit effectif vers le host de `url` : requêtes terminées par seconde
+        (fenêtre glissante), fenêtre et intervalle courants, attente Retry-After.
+        """
+        state = self._state(urlparse(url).netloc)
+        now = asyncio.get_running_loop().time()
+        while state.done and state.done[0] < now - RATE_WINDOW_S:
+            state.done.popleft()
+        window = min(RATE_WINDOW_S, now - state.done[0]) if state.done else 0.0
+        return {
+            "rps": round(len(state.done) / window, 2) if window > 0 else 0.0,
+            "concurrency": max(1, int(state.limit)),
+            "interval_ms": round(max(self.delay_s, state.interval_s) * 1000),
+            "latency_ms": round(state.latency_s * 1000, 1) if state.latency_s is not None else None,
+            "throttled": state.throttled,
+            "backoff_s": round(max(0.0, state.blocked_until - now), 2),
+        }
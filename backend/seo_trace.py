@@ -0,0 +1,305 @@
+# backend/seo_trace.py
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+# Phases d'une requête HTTP (events "trace" de httpcore + résolution DNS du PinnedTransport)
+PHASES = ("dns", "connect", "tls", "send", "wait", "download")
+_STEP_PHASE = {
+    "resolve": "dns",
+    "connect_tcp": "connect",
+    "start_tls": "tls",
+    "send_request_headers": "send",
+    "send_request_body": "send",
+    "receive_response_headers": "wait",
+    "receive_response_body": "download",
+}
+
+# Bornes (secondes) des histogrammes de durées
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Lignes gardées du profil cProfile (tri par temps cumulé)
+PROFILE_TOP = 30
+
+
+class Histogram:
+    """
+    Histogramme à bornes fixes (format Prometheus) ; quantiles approchés par la borne haute.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def summary_ms(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_s": round(self.sum, 4),
+            "mean_ms": round(self.sum / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 2),
+            "p95_ms": round(self.quantile(0.95) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+class Metrics:
+    """
+    Registre process-wide des métriques de scan, rendu au format texte Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}  # nom -> (type, aide)
+        self._values: Dict[str, Dict[Tuple[Tuple[str, str], ...], Any]] = {}
+
+    def _series(self, name: str, kind: str, help_text: str, labels: Dict[str, str], factory):
+        self._help.setdefault(name, (kind, help_text))
+        key = tuple(sorted(labels.items()))
+        series = self._values.setdefault(name, {})
+        if key not in series:
+            series[key] = factory()
+        return series, key
+
+    def inc(self, name: str, value: float = 1.0, help_text: str = "", **labels: str) -> None:
+        with self._lock:
+            series, key = self._series(name, "counter", help_text, labels, float)
+            series[key] += value
+
+    def add(self, name: str, delta: float, help_text: str = "", **labels: str) -> None:
+        with self._lock:
+            series, key = self._series(name, "gauge", help_text, labels, float)
+            series[key] += delta
+
+    def set(self, name: str, value: float, help_text: str = "", **labels: str) -> None:
+        with self._lock:
+            series, key = self._series(name, "gauge", help_text, labels, float)
+            series[key] = value
+
+    def observe(self, name: str, value: float, help_text: str = "", **labels: str) -> None:
+        with self._lock:
+            series, key = self._series(name, "histogram", help_text, labels, Histogram)
+            series[key].observe(value)
+
+    def value(self, name: str, **labels: str) -> float:
+        """
+        Valeur courante d'une série (nombre d'observations pour un histogramme), 0 si absente.
+        """
+        with self._lock:
+            value = self._values.get(name, {}).get(tuple(sorted(labels.items())))
+        if value is None:
+            return 0.0
+        return float(value.count) if isinstance(value, Histogram) else value
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._values):
+                kind, help_text = self._help[name]
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(self._values[name].items()):
+                    labels = dict(key)
+                    if kind != "histogram":
+                        lines.append(f"{name}{_labels(labels)} {value:g}")
+                        continue
+                    cumulative = 0
+                    for bound, n in zip(value.buckets, value.counts):
+                        cumulative += n
+                        lines.append(f"{name}_bucket{_labels({**labels, 'le': f'{bound:g}'})} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {value.count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {value.sum:g}")
+                    lines.append(f"{name}_count{_labels(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+class RequestTrace:
+    """
+    Callback de l'extension httpx "trace" pour une requête (redirections comprises) :
+    cumule la durée de chaque phase.
+    """
+
+    def __init__(self, tracer: "ScanTracer", kind: str):
+        self.tracer = tracer
+        self.kind = kind
+        self.phases: Dict[str, float] = {}
+        self._started: Dict[str, float] = {}
+        self._t0 = time.perf_counter()
+
+    @property
+    def extensions(self) -> Dict[str, Any]:
+        return {"trace": self}
+
+    async def __call__(self, name: str, info: Dict[str, Any]) -> None:
+        # "<prefix>.<step>.<started|complete|failed>", ex. "http11.receive_response_headers.complete"
+        head, _, state = name.rpartition(".")
+        phase = _STEP_PHASE.get(head.rpartition(".")[2])
+        if phase is None:
+            return
+        now = time.perf_counter()
+        if state == "started":
+            self._started[phase] = now
+        else:
+            t0 = self._started.pop(phase, None)
+            if t0 is not None:
+                self.phases[phase] = self.phases.get(phase, 0.0) + (now - t0)
+
+    def finish(self, status: Any) -> None:
+        self.tracer.request_done(self, status, time.perf_counter() - self._t0)
+
+
+class ScanTracer:
+    """
+    Instrumentation d'un scan : phases HTTP par requête, parsing (durée, octets,
+    attente du pool), profondeur des files, durée des étapes du scan.
+    Alimente aussi le registre global METRICS (/metrics).
+    """
+
+    def __init__(self):
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+        self.phases: Dict[str, Histogram] = {p: Histogram() for p in PHASES}
+        self.request_total = Histogram()
+        self.parse = Histogram()
+        self.parse_wait = Histogram()
+        self.parse_bytes = 0
+        self.stages: Dict[str, float] = {}
+        self.queue_max: Dict[str, int] = {}
+        self._queue_last: Dict[str, int] = {}
+        self._stage_started: Dict[str, float] = {}
+        self._profile: Optional[cProfile.Profile] = None
+        self.profile_lines: Optional[List[str]] = None
+        METRICS.inc("seo_scans_started_total", help_text="Scans started")
+
+    # Requêtes HTTP
+    def request(self, kind: str) -> RequestTrace:
+        return RequestTrace(self, kind)
+
+    def request_done(self, rt: RequestTrace, status: Any, elapsed: float) -> None:
+        self.requests[rt.kind] = self.requests.get(rt.kind, 0) + 1
+        status_class = f"{status // 100}xx" if isinstance(status, int) else "error"
+        if status_class == "error":
+            self.errors += 1
+        self.request_total.observe(elapsed)
+        METRICS.inc(
+            "seo_http_requests_total", help_text="HTTP requests made by the crawler",
+            kind=rt.kind, status=status_class,
+        )
+        for phase, seconds in rt.phases.items():
+            self.phases[phase].observe(seconds)
+            METRICS.observe("seo_http_phase_seconds", seconds, help_text="HTTP request time per phase", phase=phase)
+
+    # Parsing
+    def parsed(self, nbytes: int, parse_s: float, wait_s: float) -> None:
+        self.parse.observe(parse_s)
+        self.parse_wait.observe(wait_s)
+        self.parse_bytes += nbytes
+        METRICS.observe("seo_parse_seconds", parse_s, help_text="HTML analysis time per page")
+        METRICS.inc("seo_parsed_bytes_total", nbytes, help_text="HTML bytes analyzed")
+
+    # Files d'attente
+    def queues(self, **depths: int) -> None:
+        for name, depth in depths.items():
+            if depth > self.queue_max.get(name, 0):
+                self.queue_max[name] = depth
+            # Jauge globale = somme sur les scans en cours
+            delta = depth - self._queue_last.get(name, 0)
+            if delta:
+                self._queue_last[name] = depth
+                METRICS.add("seo_queue_depth", delta, help_text="Items waiting per crawl queue", queue=name)
+
+    # Étapes du scan
+    def begin(self, stage: str) -> None:
+        self._stage_started[stage] = time.perf_counter()
+
+    def end(self, stage: str) -> None:
+        t0 = self._stage_started.pop(stage, None)
+        if t0 is not None:
+            seconds = time.perf_counter() - t0
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+            METRICS.inc("seo_scan_stage_seconds_total", seconds, help_text="Time spent per scan stage", stage=stage)
+
+    # cProfile (opt-in)
+    def start_profile(self) -> bool:
+        global _profiling
+        with _profile_lock:
+            if _profiling:
+                return False
+            _profiling = True
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        return True
+
+    def stop_profile(self) -> None:
+        global _profiling
+        if self._profile is None:
+            return
+        self._profile.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).strip_dirs().sort_stats("cumulative").print_stats(PROFILE_TOP)
+        self.profile_lines = [line for line in out.getvalue().splitlines() if line.strip()]
+        self._profile = None
+        with _profile_lock:
+            _profiling = False
+
+    def close(self) -> None:
+        self.stop_profile()
+        for stage in list(self._stage_started):
+            self.end(stage)
+        self.queues(**{name: 0 for name in self._queue_last})
+        METRICS.inc("seo_scans_finished_total", help_text="Scans finished (completed or interrupted)")
+
+    def summary(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "stages_s": {k: round(v, 4) for k, v in self.stages.items()},
+            "requests": {**self.requests, "errors": self.errors, "total": self.request_total.summary_ms()},
+            "phases": {p: h.summary_ms() for p, h in self.phases.items() if h.count},
+            "parse": {
+                **self.parse.summary_ms(),
+                "bytes": self.parse_bytes,
+                "queue_wait_p95_ms": round(self.parse_wait.quantile(0.95) * 1000, 2),
+            },
+            "queues_max": dict(self.queue_max),
+        }
+        if self.profile_lines is not None:
+            out["profile"] = self.profile_lines
+        return out
+
+
+# Un seul profil à la fois : cProfile observe tout le thread (donc les autres scans)
+_profiling = False
+_profile_lock = threading.Lock()
@@ -0,0 +1,97 @@
+# backend/seo_transport.py
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Dict, Optional, Union
+
+import httpx
+
+# Au-delà, le corps d'une réponse ignorée n'est pas lu : la connexion est fermée
+# plutôt que vidée (un corps court vidé garde la connexion keep-alive)
+DRAIN_MAX_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class TransportProfile:
+    """
+    Réglages du client httpx du crawler. PinnedTransport ouvre un pool par host :
+    `max_connections` / `max_keepalive` s'entendent par host, `max_hosts` borne
+    le nombre de pools gardés ouverts.
+    """
+
+    http2: bool = False  # nécessite h2 (pip install httpx[http2]), sinon HTTP/1.1
+    max_connections: int = 8
+    max_keepalive: Optional[int] = None  # None = max_connections
+    keepalive_expiry_s: float = 5.0
+    max_hosts: int = 64
+    # False pour un client partagé entre scans (pas de cookies d'un scan à l'autre)
+    cookies: bool = True
+
+    def limits(self) -> httpx.Limits:
+        keepalive = self.max_connections if self.max_keepalive is None else self.max_keepalive
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=keepalive,
+            keepalive_expiry=self.keepalive_expiry_s,
+        )
+
+
+TRANSPORT_PROFILES: Dict[str, TransportProfile] = {
+    # Client par scan (comportement historique)
+    "default": TransportProfile(),
+    # Crawl d'un seul site : multiplexage HTTP/2, connexions gardées entre les phases
+    "single_host": TransportProfile(http2=True, keepalive_expiry_s=30.0),
+    # Client longue durée de l'app / des batchs : beaucoup de hosts, pas de cookies
+    "shared": TransportProfile(keepalive_expiry_s=30.0, max_hosts=256, cookies=False),
+}
+
+
+def transport_profile(profile: Union[str, TransportProfile, None] = None, **overrides) -> TransportProfile:
+    """
+    Profil par nom (TRANSPORT_PROFILES) ou instance, avec surcharges éventuelles.
+    """
+    if profile is None:
+        profile = "default"
+    if isinstance(profile, str):
+        try:
+            profile = TRANSPORT_PROFILES[profile]
+        except KeyError:
+            raise ValueError(f"Unknown transport profile: {profile}") from None
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    return replace(profile, **overrides) if overrides else profile
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  dépendance optionnelle
+    except ImportError:
+        return False
+    return True
+
+
+def no_cookies() -> CookieJar:
+    # Jar qui refuse tout cookie (client partagé)
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+async def release_response(r: httpx.Response, drain_max: int = DRAIN_MAX_BYTES) -> None:
+    """
+    Ferme une réponse streamée dont le corps n'est pas utilisé. Un corps vide
+    (HEAD, 204, 304) ou court (content-length connu <= `drain_max`) est lu
+    jusqu'au bout pour que la connexion HTTP/1.1 retourne au pool : fermée avant
+    la fin du message, httpcore la jette. Sinon elle est fermée sans rien
+    télécharger de plus.
+    """
+    try:
+        length = int(r.headers.get("content-length", ""))
+    except ValueError:
+        length = None
+    empty = r.request.method == "HEAD" or r.status_code in (204, 304)
+    if not r.is_closed and (empty or (length is not None and length <= drain_max)):
+        try:
+            async for _ in r.aiter_raw():
+                pass
+        except httpx.HTTPError:
+            pass
+    await r.aclose()
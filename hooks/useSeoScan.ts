@@ -128,6 +128,16 @@ export function useSeoScan(initialUrl: string) {
       }
     });
 
+    // RESYNC: events perdus (reconnexion trop tardive) -> on repart du dernier état connu
+    es.addEventListener('resync', (evt) => {
+      try {
+        const payload = JSON.parse((evt as MessageEvent).data) as ProgressPayload;
+        onProgressLike(payload);
+      } catch {
+        markAlive();
+      }
+    });
+
     es.addEventListener('done', (evt) => {
       markAlive();
       try {
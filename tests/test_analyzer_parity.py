@@ -0,0 +1,45 @@
+# tests/test_analyzer_parity.py
+# Parité de l'analyseur lxml (analyze_html, PageParser) avec l'implémentation
+# de référence BeautifulSoup (analyze_html_soup), sur les pages de fixtures/pages.
+from dataclasses import fields
+from pathlib import Path
+
+import pytest
+
+from backend.seo_crawler import PageAnalysis, PageParser, analyze_html, analyze_html_soup
+
+PAGES_DIR = Path(__file__).parent / "fixtures" / "pages"
+PAGES = sorted(PAGES_DIR.glob("*.html"))
+PAGE_URL = "https://example.com/blog/post"
+FIELDS = [f.name for f in fields(PageAnalysis)]
+
+# xhtml.html : BeautifulSoup signale un document XML parsé en HTML (voulu ici)
+pytestmark = pytest.mark.filterwarnings("ignore::bs4.XMLParsedAsHTMLWarning")
+
+
+def read_page(path: Path) -> str:
+    return path.read_text(encoding="utf-8")
+
+
+def test_corpus_is_not_empty():
+    assert len(PAGES) >= 10
+
+
+@pytest.mark.parametrize("path", PAGES, ids=lambda p: p.stem)
+@pytest.mark.parametrize("field", FIELDS)
+def test_analyze_html_matches_soup(path, field):
+    html = read_page(path)
+    fast = analyze_html(PAGE_URL, html)
+    reference = analyze_html_soup(PAGE_URL, html)
+    assert getattr(fast, field) == getattr(reference, field)
+
+
+@pytest.mark.parametrize("path", PAGES, ids=lambda p: p.stem)
+@pytest.mark.parametrize("chunk_size", [1, 7, 256])
+def test_chunked_feed_matches_single_feed(path, chunk_size):
+    # Chemin streaming du crawler : HTML passé par morceaux pendant le téléchargement
+    html = read_page(path)
+    parser = PageParser(PAGE_URL)
+    for i in range(0, len(html), chunk_size):
+        parser.feed(html[i:i + chunk_size])
+    assert parser.close() == analyze_html(PAGE_URL, html)
@@ -0,0 +1,169 @@
+# tests/test_canonical.py
+# Normalisation d'URLs et quasi-doublons (backend/seo_canonical.py) : clean / key
+# du Canonicalizer, simhash des pages, bandes du SimhashIndex.
+import random
+
+import pytest
+
+from backend.seo_canonical import (
+    SIMHASH_BITS,
+    Canonicalizer,
+    SimhashIndex,
+    canonical_netloc,
+    clean_url,
+    shingle_fingerprint,
+    url_key,
+)
+
+
+# =========================
+# Canonicalizer
+# =========================
+@pytest.mark.parametrize(
+    "url, cleaned",
+    [
+        ("HTTPS://Example.COM", "https://example.com/"),
+        ("https://example.com/Page#section", "https://example.com/Page"),
+        ("https://example.com:443/a", "https://example.com/a"),
+        ("http://example.com:80/a", "http://example.com/a"),
+        ("https://example.com:8443/a", "https://example.com:8443/a"),
+        ("https://example.com./a", "https://example.com/a"),
+        ("https://example.com/a?utm_source=x&id=3&gclid=abc", "https://example.com/a?id=3"),
+        ("https://example.com/a?UTM_Medium=x&b=2&a=1", "https://example.com/a?b=2&a=1"),
+        ("https://example.com/a?utm%5Fsource=x&q=a%20b", "https://example.com/a?q=a%20b"),
+        ("https://example.com/a?&&x=1&", "https://example.com/a?x=1"),
+        ("  https://example.com/a  ", "https://example.com/a"),
+    ],
+)
+def test_clean(url, cleaned):
+    assert clean_url(url) == cleaned
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("http://example.com/a", "https://example.com/a"),
+        ("https://example.com/a/", "https://example.com/a"),
+        ("https://example.com/a/index.html", "https://example.com/a"),
+        ("https://example.com/Default.ASPX", "https://example.com/"),
+        ("https://example.com/?b=2&a=1", "https://example.com/?a=1&b=2"),
+        ("https://example.com/a?fbclid=1", "https://example.com/a"),
+        ("https://EXAMPLE.com:443/a#x", "https://example.com/a"),
+    ],
+)
+def test_key_equivalences(a, b):
+    assert url_key(a) == url_key(b)
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        # Chemin et valeurs sensibles à la casse
+        ("https://example.com/Page", "https://example.com/page"),
+        ("https://example.com/a?id=1", "https://example.com/a?id=2"),
+        ("https://example.com/a", "https://www.example.com/a"),
+        ("https://example.com/a/index.html.bak", "https://example.com/a"),
+        ("https://example.com:8443/a", "https://example.com/a"),
+    ],
+)
+def test_key_differences(a, b):
+    assert url_key(a) != url_key(b)
+
+
+def test_key_format():
+    assert url_key("https://Example.com/a/?b=2&a=1") == "//example.com/a?a=1&b=2"
+    assert url_key("https://example.com") == "//example.com/"
+
+
+def test_custom_canonicalizer():
+    canon = Canonicalizer(strip_params={"sessionid"}, strip_prefixes=("ref_",), ignore_scheme=False)
+    assert canon.clean("https://example.com/a?sessionid=1&ref_x=2&utm_source=3") == "https://example.com/a?utm_source=3"
+    assert canon.key("http://example.com/a") != canon.key("https://example.com/a")
+
+
+@pytest.mark.parametrize(
+    "netloc, scheme, expected",
+    [
+        ("[::1]:443", "https", "[::1]"),
+        ("[2001:DB8::1]:8080", "https", "[2001:db8::1]:8080"),
+        ("User:Pass@Example.com:80", "http", "user:pass@example.com"),
+        ("example.com.:443", "https", "example.com"),
+        ("", "https", ""),
+    ],
+)
+def test_canonical_netloc(netloc, scheme, expected):
+    assert canonical_netloc(netloc, scheme) == expected
+
+
+# =========================
+# Simhash
+# =========================
+def words(n, seed):
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(400)]
+    return [rng.choice(vocab) for _ in range(n)]
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def test_fingerprint_is_stable_and_case_insensitive():
+    page = words(300, 1)
+    assert shingle_fingerprint(page) == shingle_fingerprint([w.upper() for w in page])
+    assert 0 <= shingle_fingerprint(page) < 1 << SIMHASH_BITS
+    assert shingle_fingerprint([]) == 0
+
+
+def test_near_duplicate_pages_are_close():
+    page = words(2000, 2)
+    edited = list(page)
+    edited[1000] = "changed"
+    assert hamming(shingle_fingerprint(page), shingle_fingerprint(edited)) <= 3
+    # Pages différentes : loin l'une de l'autre
+    assert hamming(shingle_fingerprint(page), shingle_fingerprint(words(2000, 3))) > 10
+
+
+def test_word_order_matters():
+    page = words(200, 4)
+    assert hamming(shingle_fingerprint(page), shingle_fingerprint(sorted(page))) > 3
+
+
+# =========================
+# SimhashIndex
+# =========================
+def flip(fp, bits):
+    for b in bits:
+        fp ^= 1 << b
+    return fp
+
+
+@pytest.mark.parametrize("k", [3, 4, 6])
+def test_index_finds_every_fingerprint_within_k(k):
+    rng = random.Random(k)
+    index = SimhashIndex(k)
+    base = rng.getrandbits(SIMHASH_BITS)
+    index.add(base, "https://example.com/original")
+    for _ in range(300):
+        # Bandes : au moins une reste identique quelle que soit la place des k bits
+        near = flip(base, rng.sample(range(SIMHASH_BITS), rng.randint(0, k)))
+        assert index.find(near) == "https://example.com/original"
+
+
+def test_index_rejects_fingerprints_beyond_k():
+    rng = random.Random(9)
+    index = SimhashIndex(3)
+    base = rng.getrandbits(SIMHASH_BITS)
+    index.add(base, "https://example.com/original")
+    for _ in range(300):
+        far = flip(base, rng.sample(range(SIMHASH_BITS), rng.randint(4, 12)))
+        assert index.find(far) is None
+
+
+def test_index_returns_first_match_and_lists_entries():
+    index = SimhashIndex()
+    index.add(0, "https://example.com/a")
+    index.add(flip(0, [63]), "https://example.com/b")
+    assert index.find(flip(0, [1])) == "https://example.com/a"
+    assert sorted(url for _, url in index.entries()) == ["https://example.com/a", "https://example.com/b"]
+    assert SimhashIndex().find(0) is None
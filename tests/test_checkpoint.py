@@ -0,0 +1,228 @@
+# tests/test_checkpoint.py
+# Checkpoints des crawls (backend/seo_checkpoint.py) : sauvegarde / relecture,
+# versions et âge maximal de reprise, purge ; reprise d'un scan interrompu
+# (run_seo_scan_async sur un site servi par un httpx.MockTransport).
+import asyncio
+import gzip
+import json
+import os
+import time
+from array import array
+
+import httpx
+import pytest
+
+import backend.seo_checkpoint as seo_checkpoint
+from backend.seo_checkpoint import (
+    CHECKPOINT_VERSION,
+    CrawlCheckpoint,
+    checkpoint_for,
+    pack_array,
+    purge_checkpoints,
+    unpack_array,
+)
+from backend.seo_crawler import ScanOptions, run_seo_scan_async
+
+SITE = "https://shop.example"
+SITE_PAGES = 30
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+# =========================
+# Sauvegarde / relecture
+# =========================
+def test_pack_array_round_trip():
+    values = array("I", [0, 1, 2**32 - 1, 42])
+    assert unpack_array("I", pack_array(values)) == values
+
+
+def test_save_and_load(tmp_path):
+    ckpt = CrawlCheckpoint(str(tmp_path / "scan.ckpt.gz"))
+    assert ckpt.load() is None
+    run(ckpt.save({"phase": "crawl", "frontier": {"items": [["https://example.com/", 0, 0]]}}))
+    state = ckpt.load()
+    assert state["phase"] == "crawl"
+    assert state["version"] == CHECKPOINT_VERSION
+    assert time.time() - state["saved_at"] < 5
+    assert ckpt.saves == 1
+
+    # save_now (scan interrompu) remplace le précédent
+    ckpt.save_now({"phase": "link_check"})
+    assert ckpt.load()["phase"] == "link_check"
+    assert os.listdir(tmp_path) == ["scan.ckpt.gz"]  # pas de fichier temporaire laissé
+
+    ckpt.clear()
+    assert ckpt.load() is None
+    ckpt.clear()  # déjà supprimé : sans erreur
+
+
+def write_raw(path, state):
+    with open(path, "wb") as f:
+        f.write(gzip.compress(json.dumps(state).encode()))
+
+
+def test_rejects_other_versions_and_corrupt_files(tmp_path):
+    path = str(tmp_path / "scan.ckpt.gz")
+    ckpt = CrawlCheckpoint(path)
+    write_raw(path, {"version": CHECKPOINT_VERSION - 1, "saved_at": time.time()})
+    assert ckpt.load() is None
+    write_raw(path, ["not", "a", "dict"])
+    assert ckpt.load() is None
+    with open(path, "wb") as f:
+        f.write(gzip.compress(b'{"version": 3, "saved_at"')[:-4])
+    assert ckpt.load() is None
+
+
+def test_stale_checkpoint_is_not_resumed(tmp_path):
+    path = str(tmp_path / "scan.ckpt.gz")
+    ckpt = CrawlCheckpoint(path, max_resume_age_s=3600)
+    write_raw(path, {"version": CHECKPOINT_VERSION, "saved_at": time.time() - 3500, "phase": "crawl"})
+    assert ckpt.load()["phase"] == "crawl"
+    write_raw(path, {"version": CHECKPOINT_VERSION, "saved_at": time.time() - 3700, "phase": "crawl"})
+    assert ckpt.load() is None
+    # Sans date de sauvegarde : considéré comme trop ancien
+    write_raw(path, {"version": CHECKPOINT_VERSION, "phase": "crawl"})
+    assert ckpt.load() is None
+
+
+def test_due_follows_interval(tmp_path):
+    ckpt = CrawlCheckpoint(str(tmp_path / "scan.ckpt.gz"), interval_s=60)
+    assert not ckpt.due()
+    ckpt._last -= 61
+    assert ckpt.due()
+    ckpt.save_now({})
+    assert not ckpt.due()
+
+
+def test_checkpoint_for_key_and_purge(tmp_path):
+    directory = str(tmp_path)
+    a = checkpoint_for("https://a.example/|{}", directory)
+    assert checkpoint_for("https://a.example/|{}", directory).path == a.path
+    assert checkpoint_for("https://b.example/|{}", directory).path != a.path
+
+    a.save_now({})
+    old = time.time() - seo_checkpoint.CHECKPOINT_RETENTION_S - 10
+    os.utime(a.path, (old, old))
+    purge_checkpoints(directory)
+    assert not os.path.exists(a.path)
+
+
+# =========================
+# Reprise d'un scan
+# =========================
+class FakeShop:
+    """
+    /p/<i> liée à /p/<i+1..i+3> et à une page absente (/missing) ; compte les GET.
+    """
+
+    def __init__(self):
+        self.gets = []
+
+    async def __call__(self, request):
+        await asyncio.sleep(0.002)
+        path = request.url.path
+        if request.method == "GET":
+            self.gets.append(path)
+        if path == "/":
+            i = -1
+        elif path.startswith("/p/") and int(path[3:]) < SITE_PAGES:
+            i = int(path[3:])
+        else:
+            return httpx.Response(404, text="Not found")
+        links = "".join(f'<a href="/p/{j}">page {j}</a>' for j in range(i + 1, min(i + 4, SITE_PAGES)))
+        words = " ".join(f"word{k}" for k in range(40 * (i + 2)))
+        html = (
+            f"<html><head><title>Page {i}</title></head><body><h1>Page {i}</h1>"
+            f'<p>{words}</p>{links}<a href="/missing">missing</a></body></html>'
+        )
+        return httpx.Response(200, text=html, headers={"Content-Type": "text/html; charset=utf-8"})
+
+
+async def scan(site, checkpoint, stop_after_pages=None):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(site))
+    scan = run_seo_scan_async(
+        SITE,
+        max_pages=SITE_PAGES + 1,
+        concurrency=2,
+        analysis_workers=0,
+        use_sitemaps=False,
+        respect_robots=False,
+        near_duplicate_distance=None,
+        client=client,
+        options=ScanOptions(checkpoint=checkpoint),
+    )
+    try:
+        async for event, data in scan:
+            if event == "done":
+                return data
+            if stop_after_pages is not None and len(site.gets) >= stop_after_pages:
+                return None
+    finally:
+        await scan.aclose()
+        await client.aclose()
+
+
+def comparable(payload):
+    issues = {k: sorted(json.dumps(i, sort_keys=True) for i in v) for k, v in payload["issues"].items() if isinstance(v, list)}
+    return payload["kpis"], payload["health"], issues
+
+
+@pytest.fixture
+def reference():
+    return run(scan(FakeShop(), None))
+
+
+def test_interrupted_scan_resumes_where_it_stopped(tmp_path, reference):
+    path = str(tmp_path / "scan.ckpt.gz")
+    first = FakeShop()
+    assert run(scan(first, CrawlCheckpoint(path), stop_after_pages=12)) is None
+    # Scan interrompu : checkpoint sauvé en sortie
+    state = CrawlCheckpoint(path).load()
+    assert state is not None and state["phase"] == "crawl"
+
+    second = FakeShop()
+    done = run(scan(second, CrawlCheckpoint(path)))
+    assert done["meta"]["resumed"]["phase"] == "crawl"
+    assert comparable(done) == comparable(reference)
+    # Les pages déjà traitées ne sont pas refaites (au plus les 2 requêtes en vol)
+    assert "/" not in second.gets
+    assert len(set(first.gets) & set(second.gets)) <= 2
+    assert len(set(first.gets) | set(second.gets)) == SITE_PAGES + 1
+    # Scan terminé : checkpoint supprimé
+    assert not os.path.exists(path)
+
+
+def test_stale_checkpoint_restarts_from_scratch(tmp_path, reference):
+    path = str(tmp_path / "scan.ckpt.gz")
+    run(scan(FakeShop(), CrawlCheckpoint(path), stop_after_pages=12))
+    assert os.path.exists(path)
+
+    again = FakeShop()
+    done = run(scan(again, CrawlCheckpoint(path, max_resume_age_s=0)))
+    assert done["meta"]["resumed"] is None
+    assert comparable(done) == comparable(reference)
+    assert "/" in again.gets
+
+
+def test_cancelled_scan_still_writes_checkpoint(tmp_path):
+    path = str(tmp_path / "scan.ckpt.gz")
+    site = FakeShop()
+
+    async def scenario():
+        task = asyncio.create_task(scan(site, CrawlCheckpoint(path)))
+        while len(site.gets) < 8:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        # Deuxième annulation pendant l'écriture (thread) : le fichier est quand même complet
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run(scenario())
+    state = CrawlCheckpoint(path).load()
+    assert state is not None and state["phase"] == "crawl"
+    assert os.listdir(tmp_path) == ["scan.ckpt.gz"]
@@ -0,0 +1,130 @@
+# tests/test_columns.py
+# Colonnes de pages (backend/seo_columns.py) : agrégats incrémentaux vs recalculés
+# depuis les colonnes, sérialisation, re-scoring d'un scan stocké (ScanStore).
+import pytest
+
+from backend.seo_columns import DEFAULT_SCORE_WEIGHTS, PageColumns, score_pages
+from backend.seo_results import rescore_scan
+from backend.seo_store import ScanStore
+
+# (nb de mots, nb de H1, meta, titre)
+PAGES = [
+    (900, 1, True, "Home"),
+    (120, 1, False, "Blog"),
+    (300, 0, True, "Blog"),
+    (40, 2, False, ""),
+    (260, 1, True, "Contact"),
+    (80, 0, True, "Blog"),
+    (700, 1, True, "Pricing"),
+    (10, 0, False, "Pricing"),
+]
+
+
+def make_columns(pages=PAGES):
+    cols = PageColumns()
+    for words, h1, meta, title in pages:
+        cols.add(words, h1, meta, title)
+    return cols
+
+
+def test_incremental_counts():
+    assert make_columns().counts(250) == {
+        "pages": 8,
+        "missing_meta_descriptions": 3,
+        "thin_pages": 4,
+        "missing_h1": 3,
+        "duplicate_titles": 2,  # "Blog" x3, "Pricing" x2 ; le titre vide ne compte pas
+    }
+
+
+@pytest.mark.parametrize("titles", [False, True])
+def test_round_trip_recomputes_aggregates(titles):
+    cols = make_columns()
+    loaded = PageColumns.from_bytes(cols.to_bytes(titles=titles))
+    assert list(loaded.word_count) == [p[0] for p in PAGES]
+    assert list(loaded.h1_count) == [p[1] for p in PAGES]
+    assert list(loaded.has_meta) == [int(p[2]) for p in PAGES]
+    assert list(loaded.title_id) == list(cols.title_id)
+    for threshold in (0, 100, 250, 1000):
+        assert loaded.counts(threshold) == cols.counts(threshold)
+
+
+def test_checkpoint_columns_keep_accepting_pages():
+    cols = make_columns(PAGES[:4])
+    resumed = PageColumns.from_bytes(cols.to_bytes(titles=True))
+    for page in PAGES[4:]:
+        resumed.add(*page)
+    assert resumed.counts() == make_columns().counts()
+
+
+def test_stored_columns_are_read_only():
+    stored = PageColumns.from_bytes(make_columns().to_bytes())
+    with pytest.raises(ValueError):
+        stored.add(100, 1, True, "New")
+
+
+def test_unknown_version_is_rejected():
+    data = make_columns().to_bytes().replace(b'"version":3', b'"version":1', 1)
+    with pytest.raises(ValueError):
+        PageColumns.from_bytes(data)
+    with pytest.raises(ValueError):
+        PageColumns.from_bytes(make_columns().to_bytes()[:-1])
+
+
+def test_score_pages():
+    scored = score_pages(make_columns(), thin_words_threshold=250, broken_links=2, critical_broken=1)
+    # 100 - (2*10 + 3*5 + 2*3 + 4*2 + 3*2)
+    assert scored["health"]["score"] == 45
+    assert scored["health"]["main_issue"] == "Broken internal links on 4 item(s)"
+    assert scored["kpis"] == {
+        "pages_crawled": 8,
+        "critical_issues": 4,
+        "missing_meta_descriptions": 3,
+        "thin_pages": 4,
+    }
+
+
+# =========================
+# Re-scoring d'un scan stocké
+# =========================
+@pytest.fixture
+def store():
+    s = ScanStore(":memory:")
+    yield s
+    s.close()
+
+
+def test_rescore_with_new_weights_and_threshold(store):
+    store.put_scan("0123456789ab", "https://example.com/", make_columns().to_bytes(), 2, 1)
+
+    same = rescore_scan(store, "0123456789ab")
+    assert same["health"]["score"] == 45
+    assert same["target_url"] == "https://example.com/"
+
+    # Liens cassés ignorés, meta manquantes doublées : 100 - (3*10 + 2*3 + 4*2 + 3*2)
+    reweighted = rescore_scan(store, "0123456789ab", weights={"broken_links": 0, "missing_meta": 10})
+    assert reweighted["health"]["score"] == 50
+    assert reweighted["health"]["main_issue"] == "Missing meta descriptions on 4 item(s)"
+
+    # Seuil "thin" plus bas : 2 pages thin au lieu de 4
+    relaxed = rescore_scan(store, "0123456789ab", thin_words_threshold=50)
+    assert relaxed["kpis"]["thin_pages"] == 2
+    assert relaxed["health"]["score"] == 45 + 2 * DEFAULT_SCORE_WEIGHTS["thin_pages"]
+
+
+def test_rescore_unknown_or_outdated_scan(store):
+    assert rescore_scan(store, "0123456789ab") is None
+    store.put_scan("0123456789ab", "https://example.com/", b'{"version":1,"pages":0}\n', 0, 0)
+    assert rescore_scan(store, "0123456789ab") is None
+
+
+def test_scan_history_is_capped_per_target():
+    store = ScanStore(":memory:", max_scans_per_target=2)
+    data = make_columns().to_bytes()
+    for i in range(3):
+        store.put_scan(f"a{i:011d}", "https://a.example/", data, 0, 0)
+    store.put_scan("b00000000000", "https://b.example/", data, 0, 0)
+    assert store.get_scan("a00000000000") is None
+    assert store.get_scan("a00000000002") is not None
+    assert store.get_scan("b00000000000") is not None
+    store.close()
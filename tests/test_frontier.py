@@ -0,0 +1,141 @@
+# tests/test_frontier.py
+# File d'attente du crawl (backend/seo_frontier.py) : ordre par priorité puis
+# FIFO, dédup sur la clé canonique, requeue, sauvegarde / reprise, re-priorisation.
+import pytest
+
+from backend.seo_frontier import CrawlFrontier
+
+
+def drain(frontier):
+    out = []
+    while frontier:
+        out.append(frontier.pop())
+    return out
+
+
+def test_bfs_order_by_default():
+    frontier = CrawlFrontier()
+    frontier.push("https://example.com/", depth=0)
+    frontier.push("https://example.com/a", depth=1)
+    frontier.push("https://example.com/a/x", depth=2)
+    frontier.push("https://example.com/b", depth=1)
+    assert [url for url, _ in drain(frontier)] == [
+        "https://example.com/",
+        "https://example.com/a",
+        "https://example.com/b",
+        "https://example.com/a/x",
+    ]
+
+
+def test_explicit_priority_overrides_depth():
+    frontier = CrawlFrontier()
+    frontier.push("https://example.com/deep", depth=5, priority=0)
+    frontier.push("https://example.com/", depth=0, priority=3)
+    frontier.push("https://example.com/mid", depth=2, priority=0)
+    # Même priorité : FIFO ; la profondeur d'origine est rendue telle quelle
+    assert drain(frontier) == [
+        ("https://example.com/deep", 5),
+        ("https://example.com/mid", 2),
+        ("https://example.com/", 0),
+    ]
+
+
+def test_push_dedups_on_canonical_key():
+    frontier = CrawlFrontier()
+    assert frontier.push("https://example.com/page")
+    assert not frontier.push("HTTPS://EXAMPLE.COM/page")
+    assert not frontier.push("https://example.com/page#section")
+    assert len(frontier) == 1
+    assert "https://Example.com/page" in frontier
+    # Toujours "vue" une fois sortie
+    frontier.pop()
+    assert not frontier.push("https://example.com/page")
+
+
+def test_custom_key_fn_and_mark_seen():
+    frontier = CrawlFrontier(key_fn=lambda url: url.rstrip("/"))
+    frontier.mark_seen("https://example.com/done/")
+    assert not frontier.push("https://example.com/done")
+    assert frontier.push("https://example.com/new")
+
+
+def test_max_depth():
+    frontier = CrawlFrontier(max_depth=1)
+    assert frontier.push("https://example.com/a", depth=1)
+    assert not frontier.push("https://example.com/b", depth=2)
+    # Ignorée pour la profondeur : pas marquée vue
+    assert "https://example.com/b" not in frontier
+
+
+def test_pop_empty_raises():
+    frontier = CrawlFrontier()
+    assert not frontier
+    with pytest.raises(IndexError):
+        frontier.pop()
+
+
+def test_requeue_bypasses_seen_set():
+    frontier = CrawlFrontier()
+    frontier.push("https://example.com/a", depth=1)
+    frontier.push("https://example.com/b", depth=1)
+    url, depth = frontier.pop()
+    frontier.requeue(url, depth)
+    assert len(frontier) == 2
+    # Remise en fin de son niveau de priorité
+    assert [u for u, _ in drain(frontier)] == ["https://example.com/b", "https://example.com/a"]
+
+
+def test_requeue_with_explicit_priority():
+    frontier = CrawlFrontier()
+    frontier.push("https://example.com/a", depth=1)
+    frontier.push("https://example.com/b", depth=3, priority=0)
+    url, depth = frontier.pop()
+    assert url == "https://example.com/b"
+    frontier.requeue(url, depth, priority=0)
+    assert frontier.pop() == ("https://example.com/b", 3)
+
+
+def test_requeue_keeps_popped_priority():
+    frontier = CrawlFrontier()
+    frontier.push("https://example.com/deep", depth=5, priority=0)
+    frontier.push("https://example.com/a", depth=1)
+    frontier.push("https://example.com/b", depth=2)
+    url, depth, priority = frontier.pop_entry()
+    assert (url, depth, priority) == ("https://example.com/deep", 5, 0)
+    # Requête à refaire (429) : repasse avant les pages moins prioritaires
+    frontier.requeue(url, depth, priority)
+    assert frontier.pop_entry() == ("https://example.com/deep", 5, 0)
+    assert frontier.pop_entry() == ("https://example.com/a", 1, 1)
+
+
+def test_state_round_trip():
+    frontier = CrawlFrontier(max_depth=4)
+    for url, depth, prio in [("/a", 1, None), ("/b", 2, None), ("/c", 3, 0), ("/d", 1, None)]:
+        frontier.push(f"https://example.com{url}", depth=depth, priority=prio)
+    first = frontier.pop_entry()  # "/c" (priorité 0), en vol au checkpoint
+
+    state = frontier.state(requeue=[first])
+    restored = CrawlFrontier.from_state(state, max_depth=4)
+    assert len(restored) == 4
+    # L'entrée en vol repart en tête ; le reste garde ordre et priorités
+    assert drain(restored) == [
+        ("https://example.com/c", 3),
+        ("https://example.com/a", 1),
+        ("https://example.com/d", 1),
+        ("https://example.com/b", 2),
+    ]
+    # Le set "seen" est repris : rien n'est re-découvert
+    assert not restored.push("https://example.com/a", depth=1)
+    assert restored.push("https://example.com/e", depth=1)
+
+
+def test_reprioritize_keeps_fifo_within_priority():
+    frontier = CrawlFrontier()
+    for name in "abcd":
+        frontier.push(f"https://example.com/{name}", depth=1)
+    scores = {"https://example.com/c": 0, "https://example.com/a": 2}
+    frontier.reprioritize(lambda url, depth: scores.get(url, 1))
+    assert [u.rsplit("/", 1)[1] for u, _ in drain(frontier)] == ["c", "b", "d", "a"]
+    # Vide après drain : les niveaux sont cohérents
+    frontier.push("https://example.com/e", depth=0)
+    assert frontier.pop() == ("https://example.com/e", 0)
@@ -0,0 +1,212 @@
+# tests/test_jobs.py
+# Jobs de scan partagés (backend/seo_jobs.py) : coalescing, file d'attente,
+# reprise Last-Event-ID / resync, annulation des jobs orphelins, purge.
+# Le crawl est remplacé par un faux scan piloté par le test.
+import asyncio
+
+import pytest
+
+import backend.seo_jobs as seo_jobs
+from backend.seo_jobs import CANCELLED, DONE, RUNNING, JobQueueFull, ScanJob, ScanJobManager, job_key
+
+
+class FakeScans:
+    """
+    Remplace run_seo_scan_async : chaque scan attend `release` puis envoie "done".
+    """
+
+    def __init__(self):
+        self.started = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, raw_url, **kwargs):
+        self.started.append(raw_url)
+        yield "progress", {"progress": 10, "label": "Crawling"}
+        await self.release.wait()
+        yield "done", {"kpis": {}, "meta": {"target_url": raw_url}}
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    fake = FakeScans()
+    monkeypatch.setattr(seo_jobs, "run_seo_scan_async", fake)
+    return fake
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def collect(agen, n):
+    # Abonné qui part après n events (fermeture explicite du flux)
+    items = []
+    try:
+        async for item in agen:
+            items.append(item)
+            if len(items) == n:
+                break
+    finally:
+        await agen.aclose()
+    return items
+
+
+# =========================
+# Coalescing / file d'attente
+# =========================
+def test_job_key_normalizes_target_url():
+    params = {"max_pages": 25}
+    assert job_key("Example.COM", params) == job_key("https://example.com/", params)
+    assert job_key("https://example.com/", params) != job_key("https://example.com/", {"max_pages": 50})
+
+
+def test_identical_requests_are_coalesced(scans):
+    async def scenario():
+        manager = ScanJobManager()
+        first, coalesced = manager.submit("https://example.com/", max_pages=25)
+        assert not coalesced
+        same, coalesced = manager.submit("HTTPS://EXAMPLE.com/", max_pages=25)
+        assert coalesced and same is first
+        other, coalesced = manager.submit("https://example.com/", max_pages=50)
+        assert not coalesced and other is not first
+
+        scans.release.set()
+        await asyncio.gather(first.task, other.task)
+        assert len(scans.started) == 2
+        assert first.status == DONE
+        # Job terminé : une nouvelle demande relance un scan
+        again, coalesced = manager.submit("https://example.com/", max_pages=25)
+        assert not coalesced and again is not first
+        await again.task
+
+    run(scenario())
+
+
+def test_queue_is_bounded(scans):
+    async def scenario():
+        manager = ScanJobManager(max_running=1, max_queued=1)
+        running, _ = manager.submit("https://a.example/")
+        await settle()
+        assert running.status == RUNNING
+        queued, _ = manager.submit("https://b.example/")
+        with pytest.raises(JobQueueFull):
+            manager.submit("https://c.example/")
+        # Une demande identique à un job en attente est fusionnée, pas refusée
+        assert manager.submit("https://b.example/") == (queued, True)
+
+        scans.release.set()
+        await asyncio.gather(running.task, queued.task)
+        assert manager.inflight() == 0
+
+    run(scenario())
+
+
+# =========================
+# Reprise / resync
+# =========================
+def test_resume_after_last_event_id():
+    async def scenario():
+        job = ScanJob("k", "https://example.com/", {}, buffer_size=10)
+        for i in range(5):
+            await job.publish("issue", {"i": i})
+        await job.finish(DONE)
+        items = [item async for item in job.subscribe(after_seq=3)]
+        assert [(seq, event, data) for seq, event, data, _ in items] == [(4, "issue", {"i": 3}), (5, "issue", {"i": 4})]
+        assert items[0][3] == '{"i":3}'
+
+    run(scenario())
+
+
+def test_resync_when_events_left_the_buffer():
+    async def scenario():
+        job = ScanJob("k", "https://example.com/", {}, buffer_size=3)
+        await job.publish("progress", {"progress": 40, "label": "Crawling"})
+        for i in range(5):
+            await job.publish("issue", {"i": i})
+        await job.finish(DONE)
+
+        # Buffer : seq 4..6 ; le client avait reçu jusqu'à 1 -> 2 et 3 perdus
+        items = [item async for item in job.subscribe(after_seq=1)]
+        seq, event, data, _ = items[0]
+        assert (seq, event) == (3, "resync")
+        assert data == {"missed": 2, "status": DONE, "progress": 40, "label": "Crawling"}
+        assert [item[0] for item in items[1:]] == [4, 5, 6]
+
+        # Déjà à jour : pas de resync
+        assert [item[0] async for item in job.subscribe(after_seq=5)] == [6]
+
+    run(scenario())
+
+
+def test_live_subscriber_receives_new_events():
+    async def scenario():
+        job = ScanJob("k", "https://example.com/", {}, buffer_size=2)
+        received = []
+
+        async def reader():
+            async for seq, event, _, _ in job.subscribe():
+                received.append((seq, event))
+
+        task = asyncio.create_task(reader())
+        await settle()
+        for i in range(3):
+            await job.publish("issue", {"i": i})
+            await settle()
+        await job.finish(DONE)
+        await task
+        assert received == [(1, "issue"), (2, "issue"), (3, "issue")]
+
+    run(scenario())
+
+
+# =========================
+# Orphelins / purge
+# =========================
+def test_orphan_job_is_cancelled_after_grace(scans):
+    async def scenario():
+        manager = ScanJobManager(orphan_grace_s=0.02)
+        job, _ = manager.submit("https://example.com/")
+        pinned, _ = manager.submit("https://pinned.example/", pinned=True)
+        for j in (job, pinned):
+            await collect(manager.stream(j), 1)
+        await asyncio.sleep(0.05)
+        assert job.status == CANCELLED
+        assert pinned.status == RUNNING
+        manager.cancel(pinned)
+        await asyncio.gather(pinned.task, return_exceptions=True)
+
+    run(scenario())
+
+
+def test_reconnect_within_grace_keeps_job(scans):
+    async def scenario():
+        manager = ScanJobManager(orphan_grace_s=0.02)
+        job, _ = manager.submit("https://example.com/")
+        await collect(manager.stream(job), 1)
+        reconnect = asyncio.create_task(collect(manager.stream(job, after_seq=1), 5))
+        await asyncio.sleep(0.05)
+        assert job.status == RUNNING
+        scans.release.set()
+        events = [event for _, event, _, _ in await reconnect]
+        assert events[-1] == "done"
+        assert job.status == DONE
+
+    run(scenario())
+
+
+def test_finished_jobs_are_purged_on_lookup(scans):
+    async def scenario():
+        manager = ScanJobManager(retention_s=0.01)
+        scans.release.set()
+        job, _ = manager.submit("https://example.com/")
+        await job.task
+        assert manager.get(job.id) is job
+        await asyncio.sleep(0.02)
+        assert manager.get(job.id) is None
+        assert manager.jobs() == []
+
+    run(scenario())
@@ -0,0 +1,172 @@
+# tests/test_linkcheck.py
+# Vérification des liens (backend/seo_linkcheck.py) : une requête par cible
+# canonique, résultats partagés, fallback HEAD -> GET, reprise sur 429 / 503.
+# Les réponses HTTP viennent d'un httpx.MockTransport qui compte les requêtes.
+import asyncio
+from collections import Counter
+
+import httpx
+
+from backend.seo_linkcheck import LinkChecker, is_broken
+from backend.seo_throttle import HostLimiter
+
+
+class FakeSite:
+    """
+    Réponses par chemin : liste de statuts consommés dans l'ordre (le dernier
+    est répété), éventuellement différents pour HEAD et GET.
+    """
+
+    def __init__(self, routes, delay_s=0.0):
+        self.routes = routes
+        self.delay_s = delay_s
+        self.calls = Counter()
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, request):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay_s)
+            path = request.url.path
+            n = self.calls[(request.method, path)]
+            self.calls[(request.method, path)] += 1
+            route = self.routes.get(path, {"HEAD": [200]})
+            if route == "error":
+                raise httpx.ConnectError("connection refused", request=request)
+            statuses = route.get(request.method, route.get("HEAD"))
+            status = statuses[min(n, len(statuses) - 1)]
+            headers = {"Retry-After": "0"} if status in (429, 503) else {}
+            return httpx.Response(status, headers=headers, content=b"body")
+        finally:
+            self.active -= 1
+
+
+def make_checker(site, concurrency=8):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(site))
+    return LinkChecker(client, HostLimiter(per_host=8), concurrency=concurrency), client
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_same_target_is_requested_once():
+    async def scenario():
+        site = FakeSite({}, delay_s=0.01)
+        checker, client = make_checker(site)
+        async with client:
+            variants = ["https://example.com/page", "HTTPS://EXAMPLE.COM/page", "https://example.com/page#top"]
+            results = await asyncio.gather(*(checker.check(u) for u in variants))
+            assert results == [{"status": 200}] * 3
+            assert checker.inflight == 0
+            # Résultat en cache : pas de nouvelle requête
+            assert await checker.check("https://example.com/page") == {"status": 200}
+        assert site.calls == Counter({("HEAD", "/page"): 1})
+        assert len(checker) == 1
+
+    run(scenario())
+
+
+def test_recorded_pages_are_never_requested():
+    async def scenario():
+        site = FakeSite({})
+        checker, client = make_checker(site)
+        checker.record("https://example.com/crawled", 404)
+        urls = [
+            "https://example.com/crawled",
+            "https://example.com/new",
+            "https://EXAMPLE.com/new",
+            "https://example.com/other",
+        ]
+        assert checker.pending_targets(urls) == ["https://example.com/new", "https://example.com/other"]
+        async with client:
+            assert await checker.check("https://example.com/crawled#x") == {"status": 404}
+        assert site.calls == Counter()
+
+    run(scenario())
+
+
+def test_head_falls_back_to_get():
+    async def scenario():
+        site = FakeSite({
+            "/no-head": {"HEAD": [405], "GET": [200]},
+            "/forbidden-head": {"HEAD": [403], "GET": [200]},
+            "/head-500": {"HEAD": [500], "GET": [404]},
+            "/missing": {"HEAD": [404], "GET": [200]},
+        })
+        checker, client = make_checker(site)
+        async with client:
+            results = {
+                path: await checker.check(f"https://example.com{path}")
+                for path in ("/no-head", "/forbidden-head", "/head-500", "/missing")
+            }
+        assert results == {
+            "/no-head": {"status": 200},
+            "/forbidden-head": {"status": 200},
+            "/head-500": {"status": 404},
+            "/missing": {"status": 404},
+        }
+        # 404 sur HEAD : réponse fiable, pas de GET
+        assert site.calls[("GET", "/missing")] == 0
+        assert site.calls[("GET", "/no-head")] == 1
+
+    run(scenario())
+
+
+def test_throttled_check_is_retried():
+    async def scenario():
+        site = FakeSite({"/busy": {"HEAD": [429, 503, 200]}})
+        checker, client = make_checker(site)
+        async with client:
+            assert await checker.check("https://example.com/busy") == {"status": 200}
+        assert site.calls[("HEAD", "/busy")] == 3
+
+    run(scenario())
+
+
+def test_network_error_is_recorded_as_broken():
+    async def scenario():
+        site = FakeSite({"/down": "error"})
+        checker, client = make_checker(site)
+        async with client:
+            result = await checker.check("https://example.com/down")
+        assert result["status"] == "error" and "connection refused" in result["error"]
+        assert is_broken(result)
+        assert not is_broken({"status": 301}) and is_broken({"status": 410}) and not is_broken(None)
+
+    run(scenario())
+
+
+def test_concurrency_is_bounded():
+    async def scenario():
+        site = FakeSite({}, delay_s=0.01)
+        checker, client = make_checker(site, concurrency=2)
+        async with client:
+            urls = [f"https://site{i}.example/" for i in range(8)]
+            await asyncio.gather(*(checker.check(u) for u in urls))
+        assert site.max_active == 2
+        assert len(checker) == 8
+
+    run(scenario())
+
+
+def test_state_restore_and_cancel():
+    async def scenario():
+        site = FakeSite({}, delay_s=1.0)
+        checker, client = make_checker(site)
+        checker.record("https://example.com/a", 200)
+        other = LinkChecker(client, HostLimiter())
+        other.restore(checker.state())
+        assert other.get("https://EXAMPLE.com/a") == {"status": 200}
+
+        async with client:
+            task = checker.check("https://example.com/slow")
+            await asyncio.sleep(0)
+            checker.cancel()
+            assert checker.inflight == 0
+            await asyncio.gather(task, return_exceptions=True)
+            assert task.cancelled()
+
+    run(scenario())
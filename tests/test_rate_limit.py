@@ -0,0 +1,169 @@
+# tests/test_rate_limit.py
+# Sliding window counter (backend/rate_limit.py) : mêmes scénarios sur les trois
+# backends ; Redis remplacé par un client factice en mémoire (INCR / DECR / GET / EXPIRE).
+import pytest
+
+from backend.rate_limit import MemoryBackend, RateLimiter, RedisBackend, SQLiteBackend
+
+LIMIT = 3
+WINDOW_S = 10.0
+T0 = 1000.0  # début d'une fenêtre (1000 // 10 = 100)
+
+
+class FakeRedis:
+    """
+    Stand-in de redis.Redis : sous-ensemble utilisé par RedisBackend, TTL sur une horloge injectée.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.values = {}
+        self.deadlines = {}
+
+    def _alive(self, key):
+        deadline = self.deadlines.get(key)
+        if deadline is not None and self.clock() >= deadline:
+            self.values.pop(key, None)
+            self.deadlines.pop(key, None)
+        return key in self.values
+
+    def get(self, key):
+        return str(self.values[key]).encode() if self._alive(key) else None
+
+    def incr(self, key):
+        self.values[key] = (self.values[key] if self._alive(key) else 0) + 1
+        return self.values[key]
+
+    def decr(self, key):
+        self.values[key] = (self.values[key] if self._alive(key) else 0) - 1
+        return self.values[key]
+
+    def expire(self, key, seconds):
+        if self._alive(key):
+            self.deadlines[key] = self.clock() + seconds
+
+    def ttl(self, key):
+        if not self._alive(key):
+            return -2
+        deadline = self.deadlines.get(key)
+        return -1 if deadline is None else deadline - self.clock()
+
+
+class Clock:
+    def __init__(self, now=T0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def limiter(request, tmp_path):
+    clock = Clock()
+    if request.param == "memory":
+        backend = MemoryBackend()
+    elif request.param == "sqlite":
+        backend = SQLiteBackend(str(tmp_path / "rl.db"))
+    else:
+        backend = RedisBackend(FakeRedis(clock))
+    rl = RateLimiter(LIMIT, WINDOW_S, backend=backend)
+    rl.clock = clock
+    return rl
+
+
+def hit(rl, key, now):
+    rl.clock.now = now
+    return rl.hit(key, now=now)
+
+
+def test_limit_within_window(limiter):
+    results = [hit(limiter, "ip", T0 + i) for i in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [2, 1, 0]
+    # Refus : rien à attendre de la fenêtre précédente, fin de la fenêtre courante
+    assert results[3].retry_after_s == 7
+
+
+def test_keys_are_independent(limiter):
+    for i in range(3):
+        hit(limiter, "a", T0 + i)
+    assert not hit(limiter, "a", T0 + 3).allowed
+    assert hit(limiter, "b", T0 + 3).allowed
+
+
+def test_previous_window_weight_decays(limiter):
+    for i in range(3):
+        hit(limiter, "ip", T0 + i)
+    # Début de la fenêtre suivante : les 3 hits précédents comptent encore en entier,
+    # mais leur poids baisse aussitôt (attente minimale d'1 s)
+    denied = hit(limiter, "ip", T0 + WINDOW_S)
+    assert not denied.allowed
+    assert denied.retry_after_s == 1
+    # Mi-fenêtre : poids 1.5 -> estimations 1.5 et 2.5 acceptées, 3.5 refusée
+    assert hit(limiter, "ip", T0 + 15).allowed
+    assert hit(limiter, "ip", T0 + 15).allowed
+    denied = hit(limiter, "ip", T0 + 15)
+    assert not denied.allowed
+    # 3 * (1 - x) + 2 < 3 dès x > 2/3 : 6.7 s après le début de la fenêtre -> 2 s d'attente
+    assert denied.retry_after_s == 2
+    assert hit(limiter, "ip", T0 + 17).allowed
+
+
+def test_counters_expire_after_two_windows(limiter):
+    for i in range(3):
+        hit(limiter, "ip", T0 + i)
+    results = [hit(limiter, "ip", T0 + 2 * WINDOW_S + i) for i in range(3)]
+    assert all(r.allowed for r in results)
+
+
+def test_denied_hits_are_not_counted(limiter):
+    for i in range(3):
+        hit(limiter, "ip", T0 + i)
+    for _ in range(5):
+        assert not hit(limiter, "ip", T0 + 5).allowed
+    # Fenêtre suivante, mi-parcours : seuls les 3 hits acceptés pèsent
+    assert hit(limiter, "ip", T0 + 15).allowed
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_keys=2)
+    rl = RateLimiter(1, WINDOW_S, backend=backend)
+    assert rl.hit("a", now=T0).allowed
+    assert rl.hit("b", now=T0).allowed
+    assert not rl.hit("a", now=T0 + 1).allowed  # "a" redevient la plus récente
+    assert rl.hit("c", now=T0 + 1).allowed  # évince "b"
+    assert len(backend) == 2
+    assert rl.hit("b", now=T0 + 2).allowed  # "b" oubliée : compteur neuf
+    assert not rl.hit("c", now=T0 + 2).allowed
+
+
+def test_memory_backend_evicts_idle_keys():
+    backend = MemoryBackend()
+    rl = RateLimiter(LIMIT, WINDOW_S, backend=backend)
+    rl.hit("a", now=T0)
+    rl.hit("b", now=T0 + 1)
+    rl.hit("c", now=T0 + 2 * WINDOW_S + 0.5)  # "a" inactive depuis plus de 2 fenêtres
+    assert len(backend) == 2
+
+
+def test_sqlite_backend_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "shared.db")
+    worker_a = RateLimiter(LIMIT, WINDOW_S, backend=SQLiteBackend(path))
+    worker_b = RateLimiter(LIMIT, WINDOW_S, backend=SQLiteBackend(path))
+    assert worker_a.hit("ip", now=T0).allowed
+    assert worker_b.hit("ip", now=T0 + 1).allowed
+    assert worker_a.hit("ip", now=T0 + 2).allowed
+    denied = worker_b.hit("ip", now=T0 + 3)
+    assert not denied.allowed and denied.remaining == 0
+
+
+def test_redis_backend_sets_key_ttl():
+    clock = Clock()
+    fake = FakeRedis(clock)
+    rl = RateLimiter(LIMIT, WINDOW_S, backend=RedisBackend(fake, prefix="rl"))
+    rl.hit("ip", now=T0)
+    assert fake.ttl("rl:ip:100") == 2 * WINDOW_S
+    # Refus : l'incrément optimiste est annulé
+    for i in range(3):
+        rl.hit("ip", now=T0 + 1 + i)
+    assert fake.get("rl:ip:100") == b"3"
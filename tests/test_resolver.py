@@ -0,0 +1,96 @@
+# tests/test_resolver.py
+# Connexion aux IP validées (backend/seo_resolver.py) : PinnedTransport se
+# connecte à l'IP résolue, puis aux suivantes si la connexion échoue.
+# Serveur HTTP minimal sur 127.0.0.1 ; les autres IP refusent la connexion.
+import asyncio
+
+import httpx
+import pytest
+
+from backend.seo_resolver import BlockedHostError, HostResolver, PinnedTransport
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class FixedResolver(HostResolver):
+    """
+    Résolution figée : host -> IP données, sans DNS.
+    """
+
+    def __init__(self, ips):
+        super().__init__(allow_private=True)
+        self.ips = tuple(ips)
+
+    async def _lookup(self, host):
+        return self._result(host, self.ips, False)
+
+
+async def start_server():
+    """
+    Répond 200 avec le header Host reçu ; retourne (server, port, hits).
+    """
+    hits = []
+
+    async def handle(reader, writer):
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+        host = next(line.split(":", 1)[1].strip() for line in head.split("\r\n") if line.lower().startswith("host:"))
+        hits.append(host)
+        body = host.encode()
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(body), body))
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], hits
+
+
+async def unused_port():
+    server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+    return port
+
+
+def test_connects_to_next_ip_when_first_refuses():
+    async def scenario():
+        server, port, hits = await start_server()
+        # 127.0.0.2 : rien n'écoute sur ce port (comme une IPv6 injoignable)
+        transport = PinnedTransport(FixedResolver(["127.0.0.2", "127.0.0.1"]))
+        async with server, httpx.AsyncClient(transport=transport) as client:
+            r = await client.get(f"http://shop.example:{port}/")
+            assert r.status_code == 200
+            # Host d'origine conservé, URL de la réponse inchangée
+            assert r.text == f"shop.example:{port}"
+            assert r.url.host == "shop.example"
+        assert len(hits) == 1
+        assert transport._active == {}
+
+    run(scenario())
+
+
+def test_every_ip_refused_raises_connect_error():
+    async def scenario():
+        port = await unused_port()
+        transport = PinnedTransport(FixedResolver(["127.0.0.2", "127.0.0.1"]))
+        async with httpx.AsyncClient(transport=transport) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get(f"http://shop.example:{port}/")
+        # Transport libéré malgré l'échec
+        assert transport._active == {}
+
+    run(scenario())
+
+
+def test_blocked_host_is_never_connected():
+    async def scenario():
+        server, port, hits = await start_server()
+        transport = PinnedTransport(HostResolver(allow_private=False))
+        async with server, httpx.AsyncClient(transport=transport) as client:
+            with pytest.raises(BlockedHostError):
+                await client.get(f"http://127.0.0.1:{port}/")
+        assert hits == []
+
+    run(scenario())
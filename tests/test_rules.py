@@ -0,0 +1,238 @@
+# tests/test_rules.py
+# Règles d'alerte compilées (backend/seo_rules.py) : tranches bisect du
+# MetricIndex, curseurs du RuleEvaluator, comparés à une évaluation naïve
+# (chaque règle testée sur chaque valeur) ; sauvegarde / reprise ; RuleSet.
+import json
+import operator
+import random
+
+import pytest
+
+from backend.seo_rules import (
+    ALERT_SAMPLE_URLS,
+    OPERATORS,
+    MetricIndex,
+    Rule,
+    RuleSet,
+    histogram_counter,
+)
+
+OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne}
+
+
+def random_rules(rng, metric, n, prefix="r"):
+    return [
+        Rule(
+            id=f"{prefix}{i}",
+            name=f"rule {i}",
+            metric=metric,
+            operator=rng.choice(OPERATORS),
+            threshold=float(rng.randint(0, 10)),
+            priority=rng.choice(("P0", "P1", "P2")),
+        )
+        for i in range(n)
+    ]
+
+
+def naive_page_alerts(rules, pages):
+    """
+    Référence : chaque règle testée sur chaque page.
+    """
+    out = {}
+    for rule in rules:
+        hits = [(url, v[rule.metric]) for url, v in pages if OPS[rule.operator](v[rule.metric], rule.threshold)]
+        if not hits:
+            continue
+        values = [v for _, v in hits]
+        if rule.operator in (">", ">="):
+            value = max(values)
+        elif rule.operator in ("<", "<="):
+            value = min(values)
+        else:
+            value = values[0]
+        out[rule.id] = {"count": len(hits), "urls": [u for u, _ in hits[:ALERT_SAMPLE_URLS]], "value": value}
+    return out
+
+
+def summary(alerts):
+    return {a["rule_id"]: {"count": a["count"], "urls": a["urls"], "value": a["value"]} for a in alerts}
+
+
+def random_pages(rng, n, metric="depth"):
+    return [(f"https://example.com/p{i}", {metric: float(rng.randint(0, 10))}) for i in range(n)]
+
+
+# =========================
+# MetricIndex / histogrammes
+# =========================
+@pytest.mark.parametrize("seed", range(5))
+def test_metric_index_matches_naive(seed):
+    rng = random.Random(seed)
+    rules = random_rules(rng, "depth", 60)
+    index = MetricIndex(rules)
+    for value in [x / 2 for x in range(-2, 24)]:
+        expected = {r.id for r in rules if OPS[r.operator](value, r.threshold)}
+        assert {r.id for r in index.matches(value)} == expected
+
+
+@pytest.mark.parametrize("op", OPERATORS)
+def test_histogram_counter_matches_naive(op):
+    rng = random.Random(3)
+    values = [float(rng.randint(0, 10)) for _ in range(200)]
+    histogram = {}
+    for v in values:
+        histogram[v] = histogram.get(v, 0) + 1
+    count = histogram_counter(histogram)
+    for threshold in [x / 2 for x in range(-2, 24)]:
+        assert count(op, threshold) == sum(OPS[op](v, threshold) for v in values)
+
+
+# =========================
+# RuleEvaluator : règles "page"
+# =========================
+@pytest.mark.parametrize("seed", range(5))
+def test_page_rules_match_naive_evaluation(seed):
+    rng = random.Random(seed)
+    rules = random_rules(rng, "depth", 40)
+    pages = random_pages(rng, 300)
+    evaluator = RuleSet(rules).evaluator("example.com")
+    emitted = []
+    for url, values in pages:
+        evaluator.observe_page(url, values)
+        emitted.extend(a["rule_id"] for a in evaluator.drain())
+    evaluator.finish({})
+
+    assert summary(evaluator.alerts()) == naive_page_alerts(rules, pages)
+    # Une alerte émise une fois par règle, dès sa première occurrence
+    assert sorted(emitted) == sorted(naive_page_alerts(rules, pages))
+
+
+def test_cursors_skip_complete_rules():
+    rules = [Rule(id=f"deep{t}", name="", metric="depth", operator=">", threshold=float(t)) for t in range(5)]
+    evaluator = RuleSet(rules).evaluator("example.com")
+    for i in range(ALERT_SAMPLE_URLS):
+        evaluator.observe_page(f"https://example.com/{i}", {"depth": 10.0})
+    # Toutes les règles ont leurs exemples : tranche ouverte vide
+    ((_, _, _, _, bounds),) = evaluator._open["depth"]
+    assert bounds[0] >= bounds[1]
+    evaluator.observe_page("https://example.com/late", {"depth": 10.0})
+    evaluator.finish({})
+    alerts = {a["rule_id"]: a for a in evaluator.alerts()}
+    assert all(len(a["urls"]) == ALERT_SAMPLE_URLS for a in alerts.values())
+    assert all(a["count"] == ALERT_SAMPLE_URLS + 1 for a in alerts.values())
+
+
+# =========================
+# RuleEvaluator : règles "scan"
+# =========================
+def test_early_scan_rules_fire_during_crawl():
+    rules = [
+        Rule(id="broken", name="", metric="broken_links", operator=">", threshold=2),
+        Rule(id="few-pages", name="", metric="pages_crawled", operator="<", threshold=10),
+        Rule(id="score", name="", metric="health_score", operator="<", threshold=50, priority="P0"),
+    ]
+    evaluator = RuleSet(rules).evaluator("example.com")
+    assert evaluator.early_metrics == ["broken_links"]
+    evaluator.observe_scan({"broken_links": 1, "pages_crawled": 3})
+    assert evaluator.drain() == []
+    evaluator.observe_scan({"broken_links": 3, "pages_crawled": 5})
+    assert [a["rule_id"] for a in evaluator.drain()] == ["broken"]
+    # "<" sur un compteur croissant : seulement en fin de scan
+    evaluator.finish({"broken_links": 7, "pages_crawled": 5, "health_score": 40})
+    assert sorted(a["rule_id"] for a in evaluator.drain()) == ["few-pages", "score"]
+    alerts = {a["rule_id"]: a for a in evaluator.alerts()}
+    assert alerts["broken"]["value"] == 7  # valeur finale
+    assert [a["rule_id"] for a in evaluator.alerts()][0] == "score"  # P0 d'abord
+
+
+# =========================
+# Sauvegarde / reprise
+# =========================
+@pytest.mark.parametrize("seed", range(3))
+def test_state_restore_matches_uninterrupted_run(seed):
+    rng = random.Random(seed)
+    rules = random_rules(rng, "depth", 30) + [
+        Rule(id="broken", name="", metric="broken_links", operator=">=", threshold=4)
+    ]
+    pages = random_pages(rng, 200)
+    ruleset = RuleSet(rules)
+
+    reference = ruleset.evaluator("example.com")
+    for i, (url, values) in enumerate(pages):
+        reference.observe_page(url, values)
+        reference.observe_scan({"broken_links": i // 20})
+    reference.finish({"broken_links": 9})
+
+    first = ruleset.evaluator("example.com")
+    emitted = []
+    for i, (url, values) in enumerate(pages[:100]):
+        first.observe_page(url, values)
+        first.observe_scan({"broken_links": i // 20})
+    emitted += first.drain()
+    state = json.loads(json.dumps(first.state()))
+
+    resumed = ruleset.evaluator("example.com")
+    resumed.restore(state)
+    for i, (url, values) in enumerate(pages[100:], start=100):
+        resumed.observe_page(url, values)
+        resumed.observe_scan({"broken_links": i // 20})
+    resumed.finish({"broken_links": 9})
+    emitted += resumed.drain()
+
+    assert resumed.alerts() == reference.alerts()
+    # Alertes déjà émises avant le checkpoint : pas ré-émises
+    assert sorted(a["rule_id"] for a in emitted) == sorted(a["rule_id"] for a in reference.alerts())
+
+
+def test_restore_drops_alerts_of_removed_rules():
+    keep = Rule(id="keep", name="", metric="depth", operator=">", threshold=1)
+    gone = Rule(id="gone", name="", metric="depth", operator=">", threshold=2)
+    evaluator = RuleSet([keep, gone]).evaluator("example.com")
+    evaluator.observe_page("https://example.com/a", {"depth": 5.0})
+    state = evaluator.state()
+
+    resumed = RuleSet([keep]).evaluator("example.com")
+    resumed.restore(state)
+    resumed.finish({})
+    assert [a["rule_id"] for a in resumed.alerts()] == ["keep"]
+
+
+# =========================
+# RuleSet
+# =========================
+def test_site_rules_only_apply_to_their_host():
+    ruleset = RuleSet.from_dicts([
+        {"id": "all", "metric": "depth", "operator": ">", "threshold": 1},
+        {"id": "shop", "metric": "depth", "operator": ">", "threshold": 1, "sites": ["Shop.example"]},
+        {"id": "off", "metric": "depth", "operator": ">", "threshold": 1, "enabled": False},
+    ])
+    assert ruleset.compiled("shop.example").ids == {"all", "shop"}
+    assert ruleset.compiled("blog.example").ids == {"all"}
+
+
+@pytest.mark.parametrize(
+    "items",
+    [
+        [{"id": "a", "metric": "depth", "operator": ">", "threshold": 1}] * 2,
+        [{"id": "bad id!", "metric": "depth", "operator": ">", "threshold": 1}],
+        [{"id": "a", "metric": "nope", "operator": ">", "threshold": 1}],
+        [{"id": "a", "metric": "depth", "operator": "~", "threshold": 1}],
+        [{"id": "a", "metric": "depth", "operator": ">", "threshold": 1, "priority": "P9"}],
+    ],
+)
+def test_invalid_rules_are_rejected_atomically(items):
+    ruleset = RuleSet.from_dicts([{"id": "x", "metric": "depth", "operator": ">", "threshold": 1}])
+    with pytest.raises(ValueError):
+        ruleset.replace(items)
+    assert [r.id for r in ruleset.rules()] == ["x"]
+
+
+def test_replace_persists_and_recompiles(tmp_path):
+    path = str(tmp_path / "rules.json")
+    ruleset = RuleSet.load(path)
+    assert "health-critical" in {r.id for r in ruleset.rules()}
+    before = ruleset.compiled("example.com")
+    ruleset.replace([{"id": "deep", "metric": "depth", "operator": ">", "threshold": 3, "sites": ["example.com"]}])
+    assert ruleset.compiled("example.com") is not before
+    reloaded = RuleSet.load(path)
+    assert [r.to_dict() for r in reloaded.rules()] == [r.to_dict() for r in ruleset.rules()]
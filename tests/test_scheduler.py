@@ -0,0 +1,286 @@
+# tests/test_scheduler.py
+# Planification des scans récurrents (backend/seo_scheduler.py) : phase et jitter
+# des échéances, budget / report, espacement par host, robustesse de la boucle.
+# Le ScanJobManager est remplacé par un faux (jobs terminés à la main).
+import asyncio
+import random
+
+import pytest
+
+from backend.seo_scheduler import (
+    RUN_RUNNING,
+    RUN_SKIPPED,
+    SCHEDULE_MAX_JITTER_S,
+    ScanScheduler,
+    ScheduleLimitReached,
+    ScheduleStore,
+    next_run_after,
+    schedule_phase,
+)
+
+HOUR = 3600.0
+DAY = 24 * HOUR
+
+
+class FakeJob:
+    def __init__(self, url, params):
+        self.id = f"job-{url}"
+        self.url = url
+        self.params = params
+        self.status = "running"
+        self.result = None
+        self.task = asyncio.get_running_loop().create_future()
+
+    def finish(self, status="done"):
+        self.status = status
+        self.result = {"kpis": {"pages_crawled": 1}, "health": {"score": 100}, "meta": {}}
+        self.task.set_result(None)
+
+
+class FakeJobs:
+    """
+    Sous-ensemble du ScanJobManager utilisé par le scheduler.
+    """
+
+    def __init__(self, max_running=4):
+        self.max_running = max_running
+        self.jobs = []
+        self.fail = None
+
+    def inflight(self):
+        return sum(1 for j in self.jobs if not j.task.done())
+
+    def submit(self, url, pinned=False, **params):
+        if self.fail is not None:
+            raise self.fail
+        job = FakeJob(url, params)
+        job.pinned = pinned
+        self.jobs.append(job)
+        return job, False
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def settle():
+    # Laisse les watchers du scheduler traiter la fin des jobs
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def make_due(scheduler, schedule):
+    scheduler.store.update(schedule.id, next_run_at=0.0)
+
+
+# =========================
+# Phase / jitter
+# =========================
+def test_phase_is_stable_and_within_interval():
+    phases = [schedule_phase(f"https://site{i}.example/", DAY) for i in range(500)]
+    assert phases == [schedule_phase(f"https://site{i}.example/", DAY) for i in range(500)]
+    assert all(0 <= p < DAY for p in phases)
+    # Réparties sur toute la journée : chaque heure reçoit des départs
+    assert len({int(p // HOUR) for p in phases}) == 24
+
+
+def test_first_run_lands_on_url_phase():
+    scheduler = ScanScheduler(FakeJobs(), ScheduleStore())
+    s = scheduler.add("https://example.com/", interval_s=DAY)
+    assert s.next_run_at > s.created_at
+    assert s.next_run_at - s.created_at <= DAY
+    assert s.next_run_at % DAY == pytest.approx(schedule_phase("https://example.com/", DAY), abs=1e-3)
+
+
+@pytest.mark.parametrize("interval_s, max_jitter", [(HOUR, 0.05 * HOUR), (DAY, SCHEDULE_MAX_JITTER_S)])
+def test_jitter_is_bounded(interval_s, max_jitter):
+    rng = random.Random(7)
+    planned = 10 * interval_s
+    runs = [next_run_after(planned, interval_s, planned, rng) for _ in range(500)]
+    offsets = [r - (planned + interval_s) for r in runs]
+    assert all(abs(o) <= max_jitter for o in offsets)
+    # Jitter effectif des deux côtés
+    assert min(offsets) < -max_jitter / 2 and max(offsets) > max_jitter / 2
+
+
+def test_late_run_keeps_phase_and_skips_missed_slots():
+    rng = random.Random(1)
+    planned = 5 * HOUR + 120.0
+    now = planned + 3 * HOUR + 10.0  # 3 échéances manquées
+    nxt = next_run_after(planned, HOUR, now, rng)
+    assert nxt >= now
+    assert abs(nxt - (planned + 4 * HOUR)) <= 0.05 * HOUR
+
+
+# =========================
+# Budget, report, chevauchement
+# =========================
+def test_due_schedules_wait_for_a_free_job_slot():
+    async def scenario():
+        jobs = FakeJobs(max_running=1)
+        scheduler = ScanScheduler(jobs, ScheduleStore(), host_spacing_s=0)
+        interactive, _ = jobs.submit("https://interactive.example/")
+        s = scheduler.add("https://a.example/", interval_s=HOUR)
+        make_due(scheduler, s)
+
+        # Manager plein (scan interactif) : rien ne part, l'échéance reste due
+        assert scheduler.dispatch_due() == 0
+        assert scheduler.get(s.id).next_run_at == 0.0
+        assert scheduler.store.runs(s.id) == []
+
+        interactive.finish()
+        assert scheduler.dispatch_due() == 1
+        assert scheduler.is_running(s.id)
+        assert scheduler.get(s.id).next_run_at > 0.0
+        assert jobs.jobs[-1].pinned
+        await scheduler.stop()
+
+    run(scenario())
+
+
+def test_scheduler_budget_defers_extra_schedules():
+    async def scenario():
+        jobs = FakeJobs(max_running=8)
+        scheduler = ScanScheduler(jobs, ScheduleStore(), max_running=1, host_spacing_s=0)
+        a = scheduler.add("https://a.example/", interval_s=HOUR)
+        b = scheduler.add("https://b.example/", interval_s=HOUR)
+        scheduler.store.update(a.id, next_run_at=0.0)
+        scheduler.store.update(b.id, next_run_at=1.0)
+
+        assert scheduler.dispatch_due() == 1
+        assert scheduler.is_running(a.id) and not scheduler.is_running(b.id)
+        assert scheduler.get(b.id).next_run_at == 1.0
+
+        jobs.jobs[0].finish()
+        await settle()
+        assert not scheduler.is_running(a.id)
+        assert scheduler.store.runs(a.id)[0]["status"] == "done"
+        assert scheduler.dispatch_due() == 1
+        assert scheduler.is_running(b.id)
+        await scheduler.stop()
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("overlap", ["skip", "defer"])
+def test_overlap_policy(overlap):
+    async def scenario():
+        jobs = FakeJobs()
+        scheduler = ScanScheduler(jobs, ScheduleStore(), host_spacing_s=0)
+        s = scheduler.add("https://a.example/", interval_s=HOUR, overlap=overlap)
+        make_due(scheduler, s)
+        assert scheduler.dispatch_due() == 1
+
+        # Nouvelle échéance alors que le run précédent tourne encore
+        make_due(scheduler, s)
+        assert scheduler.dispatch_due() == 0
+        statuses = [r["status"] for r in scheduler.store.runs(s.id)]
+        if overlap == "skip":
+            assert statuses == [RUN_SKIPPED, RUN_RUNNING]
+            assert scheduler.get(s.id).next_run_at > 0.0
+        else:
+            assert statuses == [RUN_RUNNING]
+            assert scheduler.get(s.id).next_run_at == 0.0
+            # "defer" : relancé dès la fin du run en cours
+            jobs.jobs[0].finish()
+            await settle()
+            assert scheduler.dispatch_due() == 1
+        await scheduler.stop()
+
+    run(scenario())
+
+
+# =========================
+# Espacement par host
+# =========================
+def test_host_spacing_between_starts():
+    async def scenario():
+        jobs = FakeJobs()
+        scheduler = ScanScheduler(jobs, ScheduleStore(), host_spacing_s=300.0)
+        home = scheduler.add("https://a.example/", interval_s=HOUR)
+        blog = scheduler.add("https://a.example/blog", interval_s=HOUR)
+        other = scheduler.add("https://b.example/", interval_s=HOUR)
+        for s in (home, blog, other):
+            make_due(scheduler, s)
+
+        # Un seul scan par host à la fois ; les autres hosts ne sont pas bloqués
+        assert scheduler.dispatch_due() == 2
+        assert scheduler.is_running(home.id) != scheduler.is_running(blog.id)
+        assert scheduler.is_running(other.id)
+
+        # Run terminé, mais départ trop récent sur ce host : toujours en attente
+        for job in list(jobs.jobs):
+            job.finish()
+        await settle()
+        assert scheduler.dispatch_due() == 0
+
+        # Espacement écoulé
+        for host in list(scheduler._host_started):
+            scheduler._host_started[host] -= 301.0
+        assert scheduler.dispatch_due() == 1
+        assert scheduler.is_running(home.id) or scheduler.is_running(blog.id)
+        await scheduler.stop()
+
+    run(scenario())
+
+
+# =========================
+# Erreurs et limites
+# =========================
+def test_failing_submit_does_not_block_other_schedules():
+    async def scenario():
+        jobs = FakeJobs()
+        scheduler = ScanScheduler(jobs, ScheduleStore(), host_spacing_s=0)
+        a = scheduler.add("https://a.example/", interval_s=HOUR)
+        make_due(scheduler, a)
+        jobs.fail = ValueError("bad params")
+        assert scheduler.dispatch_due() == 0
+        assert scheduler.stats()["errors"] == 1
+        assert "bad params" in scheduler.last_error
+
+        jobs.fail = None
+        assert scheduler.dispatch_due() == 1
+        await scheduler.stop()
+
+    run(scenario())
+
+
+def test_loop_survives_unexpected_errors():
+    async def scenario():
+        store = ScheduleStore()
+        scheduler = ScanScheduler(FakeJobs(), store)
+        real_due = store.due
+        calls = []
+
+        def broken_due(now, limit=100):
+            calls.append(now)
+            if len(calls) == 1:
+                raise RuntimeError("corrupted row")
+            return real_due(now, limit)
+
+        store.due = broken_due
+        scheduler.start()
+        await asyncio.sleep(0.01)
+        assert scheduler.last_error == "RuntimeError: corrupted row"
+        # Toujours vivante : un réveil relance un dispatch
+        scheduler._notify()
+        await asyncio.sleep(0.01)
+        assert len(calls) == 2
+        assert not scheduler._task.done()
+        await scheduler.stop()
+
+    run(scenario())
+
+
+def test_schedule_limits():
+    scheduler = ScanScheduler(FakeJobs(), ScheduleStore(max_schedules=3, max_per_host=2))
+    first = scheduler.add("https://a.example/", interval_s=HOUR)
+    scheduler.add("https://a.example/blog", interval_s=HOUR)
+    with pytest.raises(ScheduleLimitReached):
+        scheduler.add("https://a.example/shop", interval_s=HOUR)
+    # Planification existante : renvoyée sans compter
+    assert scheduler.add("https://a.example/", interval_s=HOUR).id == first.id
+    scheduler.add("https://b.example/", interval_s=HOUR)
+    with pytest.raises(ScheduleLimitReached):
+        scheduler.add("https://c.example/", interval_s=HOUR)
+    assert len(scheduler.schedules()) == 3
@@ -0,0 +1,181 @@
+# tests/test_sitemap.py
+# robots.txt et sitemaps (backend/seo_sitemap.py) : choix du groupe par product
+# token, règle la plus longue, wildcards, gunzip borné, passage par le HostLimiter.
+# Les réponses HTTP viennent d'un httpx.MockTransport.
+import asyncio
+import gzip
+import zlib
+
+import httpx
+import pytest
+
+import backend.seo_sitemap as seo_sitemap
+from backend.seo_sitemap import GUNZIP_CHUNK_BYTES, _gunzip, fetch_robots, iter_sitemap_urls, parse_robots
+from backend.seo_throttle import HostLimiter
+
+UA = "GoogleAdsPilotBot/1.0 (+https://example.com/bot)"
+ORIGIN = "https://example.com/"
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def mock_client(routes):
+    # routes : path -> (status, body, headers)
+    def handler(request):
+        status, body, headers = routes.get(request.url.path, (404, b"", {}))
+        return httpx.Response(status, content=body, headers=headers)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def urlset(locs):
+    items = "".join(f"<url><loc>{loc}</loc></url>" for loc in locs)
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{items}</urlset>'.encode()
+
+
+# =========================
+# robots.txt : groupes
+# =========================
+def test_group_of_our_product_token_wins():
+    robots = parse_robots(
+        "User-agent: *\nDisallow: /\n\nUser-agent: googleadspilotbot\nDisallow: /private\nCrawl-delay: 2\n",
+        UA,
+    )
+    assert robots.can_fetch("https://example.com/page")
+    assert not robots.can_fetch("https://example.com/private/x")
+    assert robots.crawl_delay == 2.0
+
+
+def test_substring_agent_does_not_match():
+    # "GoogleAdsPilot" n'est pas notre product token (RFC 9309 : comparaison exacte)
+    robots = parse_robots("User-agent: GoogleAdsPilot\nDisallow: /\n\nUser-agent: *\nDisallow: /tmp\n", UA)
+    assert robots.can_fetch("https://example.com/page")
+    assert not robots.can_fetch("https://example.com/tmp/a")
+
+
+def test_groups_of_same_agent_are_merged():
+    robots = parse_robots("User-agent: *\nDisallow: /a\n\nUser-agent: other\nDisallow: /\n\nUser-agent: *\nDisallow: /b\n", UA)
+    assert not robots.can_fetch("https://example.com/a")
+    assert not robots.can_fetch("https://example.com/b")
+    assert robots.can_fetch("https://example.com/c")
+
+
+def test_sitemaps_are_collected_outside_groups():
+    robots = parse_robots("Sitemap: https://example.com/s1.xml\nUser-agent: *\nDisallow:\nSitemap: /s2.xml\n", UA)
+    assert robots.sitemaps == ["https://example.com/s1.xml", "/s2.xml"]
+    assert robots.rules == []
+
+
+# =========================
+# robots.txt : règles
+# =========================
+@pytest.mark.parametrize(
+    "rules, path, allowed",
+    [
+        # La règle la plus longue gagne
+        ("Disallow: /shop\nAllow: /shop/public", "/shop/public/item", True),
+        ("Disallow: /shop\nAllow: /shop/public", "/shop/cart", False),
+        ("Allow: /shop\nDisallow: /shop/private", "/shop/private/x", False),
+        # À longueur égale : Allow
+        ("Disallow: /page\nAllow: /page", "/page", True),
+        # "*" : n'importe quelle suite de caractères
+        ("Disallow: /*.pdf", "/docs/file.pdf", False),
+        ("Disallow: /*.pdf", "/docs/file.pdf?dl=1", False),
+        ("Disallow: /*/edit", "/posts/12/edit", False),
+        ("Disallow: /*/edit", "/edit", True),
+        # "$" final : fin d'URL
+        ("Disallow: /*.pdf$", "/docs/file.pdf?dl=1", True),
+        ("Disallow: /*.pdf$", "/docs/file.pdf", False),
+        ("Disallow: /$", "/", False),
+        ("Disallow: /$", "/about", True),
+        # Query prise en compte, caractères spéciaux échappés
+        ("Disallow: /search?q=", "/search?q=shoes", False),
+        ("Disallow: /a.b", "/axb", True),
+    ],
+)
+def test_rule_matching(rules, path, allowed):
+    robots = parse_robots(f"User-agent: *\n{rules}\n", UA)
+    assert robots.can_fetch(f"https://example.com{path}") is allowed
+
+
+def test_fetch_robots_missing_or_error_allows_everything():
+    async def scenario():
+        async with mock_client({"/robots.txt": (500, b"Disallow: /", {})}) as client:
+            robots = await fetch_robots(client, ORIGIN, UA)
+        assert robots.rules == [] and robots.can_fetch("https://example.com/x")
+
+    run(scenario())
+
+
+def test_fetch_robots_goes_through_host_limiter():
+    async def scenario():
+        limiter = HostLimiter()
+        routes = {"/robots.txt": (429, b"", {"Retry-After": "5"})}
+        async with mock_client(routes) as client:
+            await fetch_robots(client, ORIGIN, UA, limiter=limiter)
+        stats = limiter.stats(ORIGIN)
+        assert stats["throttled"] == 1
+        assert stats["backoff_s"] > 4
+
+    run(scenario())
+
+
+# =========================
+# Sitemaps
+# =========================
+def test_bounded_gunzip_yields_small_pieces():
+    raw = b"x" * (10 * GUNZIP_CHUNK_BYTES + 123)
+    packed = gzip.compress(raw)
+    pieces = list(_gunzip(zlib.decompressobj(16 + zlib.MAX_WBITS), packed))
+    assert b"".join(pieces) == raw
+    assert len(pieces) > 10
+    assert max(len(p) for p in pieces) <= GUNZIP_CHUNK_BYTES
+
+
+def test_gzip_sitemap_and_nested_index():
+    async def scenario():
+        index = (
+            b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            b"<sitemap><loc>https://example.com/pages.xml.gz</loc></sitemap></sitemapindex>"
+        )
+        routes = {
+            "/sitemap.xml": (200, index, {}),
+            "/pages.xml.gz": (200, gzip.compress(urlset(["https://example.com/a", "https://example.com/b"])), {}),
+        }
+        limiter = HostLimiter()
+        async with mock_client(routes) as client:
+            urls = [u async for u in iter_sitemap_urls(client, ["https://example.com/sitemap.xml"], 10, limiter=limiter)]
+        assert urls == ["https://example.com/a", "https://example.com/b"]
+        assert limiter.stats(ORIGIN)["rps"] > 0
+
+    run(scenario())
+
+
+def test_decompressed_size_is_capped(monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(seo_sitemap, "SITEMAP_MAX_BYTES", 4096)
+        locs = [f"https://example.com/p{i}" for i in range(1000)]
+        routes = {"/sitemap.xml.gz": (200, gzip.compress(urlset(locs)), {})}
+        async with mock_client(routes) as client:
+            urls = [u async for u in iter_sitemap_urls(client, ["https://example.com/sitemap.xml.gz"], 10000)]
+        # Lecture arrêtée après 4 KiB décompressés : seulement les premières URLs
+        assert 0 < len(urls) < 4096 // 30
+        assert urls == locs[: len(urls)]
+
+    run(scenario())
+
+
+def test_max_urls_and_broken_sitemaps():
+    async def scenario():
+        routes = {
+            "/broken.xml": (200, b"<urlset><url><loc>https://example.com/x", {}),
+            "/ok.xml": (200, urlset([f"https://example.com/p{i}" for i in range(5)]), {}),
+        }
+        sitemaps = ["https://example.com/missing.xml", "https://example.com/broken.xml", "https://example.com/ok.xml"]
+        async with mock_client(routes) as client:
+            urls = [u async for u in iter_sitemap_urls(client, sitemaps, 3)]
+        assert urls == ["https://example.com/p0", "https://example.com/p1", "https://example.com/p2"]
+
+    run(scenario())
@@ -0,0 +1,229 @@
+# tests/test_throttle.py
+# Débit adaptatif par host (backend/seo_throttle.py) : AIMD (fenêtre / intervalle),
+# signaux de saturation et de latence, Retry-After, créneaux de HostLimiter.slot().
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+
+from backend.seo_throttle import (
+    MAX_INTERVAL_S,
+    MAX_RETRY_AFTER_S,
+    MIN_BACKOFF_INTERVAL_S,
+    HostLimiter,
+    parse_retry_after,
+)
+
+URL = "https://example.com/page"
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def observe(limiter, status, latency_s=0.01, retry_after_s=None, new_rtt=True):
+    state = limiter._state("example.com")
+    if new_rtt:
+        # Réduction suivante autorisée (une seule par latence mesurée)
+        state.last_decrease = float("-inf")
+    limiter.observe(state, status, latency_s, retry_after_s)
+    return state
+
+
+# =========================
+# Retry-After
+# =========================
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(" 0 ") == 0.0
+    assert parse_retry_after(formatdate(time.time() + 60, usegmt=True)) == pytest.approx(60, abs=2)
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("") is None and parse_retry_after(None) is None
+
+
+def test_retry_after_blocks_host_and_is_capped():
+    async def scenario():
+        limiter = HostLimiter()
+        observe(limiter, 429, retry_after_s=5)
+        assert limiter.stats(URL)["backoff_s"] == pytest.approx(5, abs=0.1)
+        observe(limiter, 503, retry_after_s=10 * MAX_RETRY_AFTER_S)
+        assert limiter.stats(URL)["backoff_s"] == pytest.approx(MAX_RETRY_AFTER_S, abs=0.1)
+        assert limiter.stats(URL)["throttled"] == 2
+
+    run(scenario())
+
+
+def test_slot_waits_for_retry_after():
+    async def scenario():
+        limiter = HostLimiter()
+        async with limiter.slot(URL) as slot:
+            slot.record(429, "0")
+        state = limiter._state("example.com")
+        state.blocked_until = asyncio.get_running_loop().time() + 0.05
+        started = time.monotonic()
+        async with limiter.slot(URL):
+            pass
+        assert time.monotonic() - started >= 0.04
+
+    run(scenario())
+
+
+# =========================
+# AIMD
+# =========================
+def test_multiplicative_decrease_then_spacing():
+    async def scenario():
+        limiter = HostLimiter(per_host=8)
+        assert [observe(limiter, 429).limit for _ in range(4)] == [4, 2, 1, 1]
+        state = limiter._state("example.com")
+        # À 1 requête simultanée : l'intervalle double, borné
+        assert state.interval_s == MIN_BACKOFF_INTERVAL_S
+        for _ in range(20):
+            observe(limiter, 429)
+        assert state.interval_s == MAX_INTERVAL_S
+        assert state.decreases == 24
+
+    run(scenario())
+
+
+def test_one_decrease_per_round_trip():
+    async def scenario():
+        limiter = HostLimiter(per_host=8)
+        observe(limiter, 429)
+        # Réponses des requêtes déjà en vol : même signal, pas de nouvelle réduction
+        for _ in range(3):
+            state = observe(limiter, 429, new_rtt=False)
+        assert state.limit == 4 and state.decreases == 1
+
+    run(scenario())
+
+
+def test_additive_increase_up_to_max():
+    async def scenario():
+        limiter = HostLimiter(per_host=4)
+        observe(limiter, 429)
+        state = observe(limiter, 429)
+        assert state.limit == 1
+        limits = [observe(limiter, 200).limit for _ in range(12)]
+        # +1 par fenêtre complète de succès
+        assert limits[:3] == [2, 2.5, pytest.approx(2.9)]
+        assert limits == sorted(limits) and limits[-1] == 4
+
+    run(scenario())
+
+
+def test_spacing_recovers_before_window():
+    async def scenario():
+        limiter = HostLimiter(per_host=4)
+        for _ in range(4):
+            state = observe(limiter, 429)
+        assert (state.limit, state.interval_s) == (1, 0.5)
+        intervals = []
+        while state.interval_s > 0:
+            intervals.append(observe(limiter, 200).interval_s)
+        # Débit +0.2 req/s par succès (2 -> 8 req/s en 30 succès), puis intervalle supprimé
+        assert intervals[0] == pytest.approx(1 / 2.2)
+        assert len(intervals) == 30
+        assert state.limit == 1
+        assert observe(limiter, 200).limit == 2
+
+    run(scenario())
+
+
+def test_only_saturation_errors_count():
+    async def scenario():
+        limiter = HostLimiter(per_host=8)
+        for _ in range(20):
+            state = observe(limiter, 404)
+            observe(limiter, 500)
+        assert state.limit == 8 and state.error_rate == 0
+        for _ in range(4):
+            state = observe(limiter, "error")
+        assert state.error_rate > 0.3
+        assert state.limit < 8
+
+    run(scenario())
+
+
+def test_latency_spike_decreases_window():
+    async def scenario():
+        limiter = HostLimiter(per_host=8)
+        for _ in range(5):
+            state = observe(limiter, 200, latency_s=0.1)
+        assert state.limit == 8
+        for _ in range(20):
+            state = observe(limiter, 200, latency_s=2.0)
+        assert state.limit < 8
+        assert state.base_latency_s == pytest.approx(0.1)
+
+    run(scenario())
+
+
+def test_non_adaptive_limiter_keeps_fixed_rate():
+    async def scenario():
+        limiter = HostLimiter(per_host=4, adaptive=False)
+        for _ in range(5):
+            state = observe(limiter, 429, retry_after_s=30)
+        assert state.limit == 4 and state.interval_s == 0
+        assert limiter.stats(URL)["backoff_s"] == 0
+        assert limiter.stats(URL)["throttled"] == 5
+
+    run(scenario())
+
+
+# =========================
+# Créneaux
+# =========================
+def test_slots_bound_concurrency_per_host():
+    async def scenario():
+        limiter = HostLimiter(per_host=2)
+        active = {"example.com": 0, "other.example": 0}
+        peak = dict(active)
+
+        async def request(url, host):
+            async with limiter.slot(url) as slot:
+                active[host] += 1
+                peak[host] = max(peak[host], active[host])
+                await asyncio.sleep(0.01)
+                active[host] -= 1
+                slot.record(200)
+
+        await asyncio.gather(
+            *(request(URL, "example.com") for _ in range(6)),
+            *(request("https://other.example/", "other.example") for _ in range(6)),
+        )
+        assert peak == {"example.com": 2, "other.example": 2}
+        assert limiter.stats(URL)["rps"] > 0
+
+    run(scenario())
+
+
+def test_polite_delay_spaces_requests():
+    async def scenario():
+        limiter = HostLimiter(per_host=4, delay_s=0.02)
+        starts = []
+
+        async def request():
+            async with limiter.slot(URL):
+                starts.append(time.monotonic())
+
+        await asyncio.gather(*(request() for _ in range(4)))
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        assert all(g >= 0.015 for g in gaps)
+
+    run(scenario())
+
+
+def test_exception_in_slot_is_recorded_as_error():
+    async def scenario():
+        limiter = HostLimiter()
+        with pytest.raises(RuntimeError):
+            async with limiter.slot(URL):
+                raise RuntimeError("boom")
+        state = limiter._state("example.com")
+        assert state.inflight == 0
+        assert state.error_rate > 0
+
+    run(scenario())